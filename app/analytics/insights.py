@@ -0,0 +1,136 @@
+"""
+Vectorized spending analytics over a user's full transaction history.
+
+The history is loaded once into contiguous NumPy arrays (TransactionArrays) and every metric is
+computed with array operations: transactions are bucketed into days or months with np.bincount and
+sliding sums are read off cumulative sums, so the cost is a few passes in C over the arrays
+instead of a Python loop per transaction.
+
+Days and months are counted since the Unix epoch (UTC), matching the naive UTC datetimes stored in MongoDB.
+"""
+
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+MS_PER_DAY = 86_400_000
+
+
+class TransactionArrays(NamedTuple):
+    dates: np.ndarray           # int64 milliseconds since the epoch, ascending
+    amounts: np.ndarray         # float64
+    is_income: np.ndarray       # bool, False for expenses
+    category_codes: np.ndarray  # int64 index into categories, -1 when uncategorized
+    categories: List[str]
+
+
+def from_columns(dates: Sequence[int], amounts: Sequence[float], is_income: Sequence[bool],
+                 categories: Sequence[Optional[str]]) -> TransactionArrays:
+    """
+    Builds the arrays from the columns of a date-ordered history, with dates in milliseconds since
+    the epoch. The numeric lists are converted in C and the categories coded in a single dict pass;
+    see crud_insights.load_transaction_arrays for how the database returns the columns.
+    """
+    codes = {None: -1, '': -1}
+    code = codes.setdefault
+    category_codes = np.array([code(category, len(codes) - 2) for category in categories], dtype=np.int64)
+    return TransactionArrays(
+        dates=np.array(dates, dtype=np.int64),
+        amounts=np.array(amounts, dtype=np.float64),
+        is_income=np.array(is_income, dtype=bool),
+        category_codes=category_codes,
+        categories=list(codes)[2:],
+    )
+
+
+def day_index(dates: np.ndarray) -> np.ndarray:
+    return dates // MS_PER_DAY
+
+
+def month_index(dates: np.ndarray) -> np.ndarray:
+    return dates.astype('datetime64[ms]').astype('datetime64[M]').astype(np.int64)
+
+
+def daily_totals(arrays: TransactionArrays, first_day: int, last_day: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the income and expense totals of each day from first_day to last_day inclusive.
+    """
+    days = day_index(arrays.dates)
+    in_range = (days >= first_day) & (days <= last_day)
+    offsets = days[in_range] - first_day
+    amounts = arrays.amounts[in_range]
+    is_income = arrays.is_income[in_range]
+    length = last_day - first_day + 1
+    income = np.bincount(offsets, weights=np.where(is_income, amounts, 0.0), minlength=length)
+    expense = np.bincount(offsets, weights=np.where(is_income, 0.0, amounts), minlength=length)
+    return income, expense
+
+
+def rolling_spend(arrays: TransactionArrays, last_day: int, days: int, window: int) -> np.ndarray:
+    """
+    Returns, for each of the days ending at last_day, the expenses of the window days ending that day.
+    """
+    _, expense = daily_totals(arrays, last_day - days - window + 2, last_day)
+    cumulative = np.concatenate(([0.0], np.cumsum(expense)))
+    return cumulative[window:] - cumulative[:-window]
+
+
+def monthly_totals(arrays: TransactionArrays) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    Returns the index of the first month with transactions and the income and expense totals of
+    every month from it to the last, months without transactions included.
+    """
+    if not len(arrays.dates):
+        return 0, np.zeros(0), np.zeros(0)
+    months = month_index(arrays.dates)
+    first_month = int(months[0])
+    offsets = months - first_month
+    income = np.bincount(offsets, weights=np.where(arrays.is_income, arrays.amounts, 0.0))
+    expense = np.bincount(offsets, weights=np.where(arrays.is_income, 0.0, arrays.amounts), minlength=len(income))
+    return first_month, income, expense
+
+
+def relative_change(values: np.ndarray) -> np.ndarray:
+    """
+    Returns the change of each value relative to the previous one, NaN where the previous one is 0.
+    """
+    change = np.full(len(values), np.nan)
+    previous = values[:-1]
+    np.divide(values[1:] - previous, previous, out=change[1:], where=previous != 0)
+    return change
+
+
+def category_share(arrays: TransactionArrays, first_day: int, last_day: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the expense total of each category code between first_day and last_day inclusive, with
+    uncategorized expenses first, and the share of each in the total.
+    """
+    days = day_index(arrays.dates)
+    expenses = ~arrays.is_income & (days >= first_day) & (days <= last_day)
+    spend = np.bincount(arrays.category_codes[expenses] + 1, weights=arrays.amounts[expenses],
+                        minlength=len(arrays.categories) + 1)
+    total = spend.sum()
+    share = spend / total if total else np.zeros_like(spend)
+    return spend, share
+
+
+def balance(arrays: TransactionArrays) -> float:
+    return float(arrays.amounts[arrays.is_income].sum() - arrays.amounts[~arrays.is_income].sum())
+
+
+def forecast(arrays: TransactionArrays, last_day: int, lookback: int, horizon: int,
+             starting_balance: Optional[float] = None) -> Tuple[float, np.ndarray]:
+    """
+    Fits a line to the cumulative net cash flow of the lookback days ending at last_day and extends
+    it over the horizon.
+
+    Returns:
+        Tuple[float, np.ndarray]: The fitted daily net cash flow and the projected balance at the end
+            of each of the horizon days following last_day.
+    """
+    income, expense = daily_totals(arrays, last_day - lookback + 1, last_day)
+    cumulative = np.cumsum(income - expense)
+    daily_net = float(np.polyfit(np.arange(lookback), cumulative, 1)[0]) if lookback > 1 else float(cumulative[-1])
+    if starting_balance is None:
+        starting_balance = balance(arrays)
+    return daily_net, starting_balance + daily_net * np.arange(1, horizon + 1)
@@ -0,0 +1,89 @@
+from app.schemas import budget as budget_schema
+from app.crud import async_crud_budgets
+from typing import List
+from mongoengine.errors import ValidationError
+from fastapi import APIRouter, HTTPException, status, Depends
+from app.schemas.user import Principal
+from app.utils import security, logger
+
+router = APIRouter(
+    prefix='/budgets',
+    tags=['budgets'],
+    responses={404: {"description": "Not found"}}
+)
+
+logger = logger.setup_logger(__name__)
+
+
+@router.post("/", response_model=budget_schema.BudgetStatus, status_code=status.HTTP_201_CREATED)
+async def create_budget(budget: budget_schema.BudgetCreate,
+                        current_user: Principal = Depends(security.get_current_user)) -> budget_schema.BudgetStatus:
+    """
+    Create a spending limit on an expense category for the authenticated user.
+
+    Parameters:
+        budget (BudgetCreate): The category, period and limit of the budget.
+
+    Returns:
+        BudgetStatus: The budget with the amount already spent in the current period.
+
+    Raises:
+        HTTPException: 409 error if a budget already exists for this category and period.
+    """
+    try:
+        return await async_crud_budgets.create_budget(user_id=current_user.id, budget=budget)
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while creating budget: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while creating the budget."
+        )
+
+
+@router.get("/", response_model=List[budget_schema.BudgetStatus])
+async def get_budgets(current_user: Principal = Depends(security.get_current_user)) -> List[budget_schema.BudgetStatus]:
+    """
+    The spent and remaining amounts of the authenticated user's budgets in their current periods.
+    """
+    try:
+        return await async_crud_budgets.get_budget_statuses(user_id=current_user.id)
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while retrieving budgets: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while retrieving the budgets."
+        )
+
+
+@router.get("/{budget_id}", response_model=budget_schema.BudgetStatus)
+async def get_budget(budget_id: str,
+                     current_user: Principal = Depends(security.get_current_user)) -> budget_schema.BudgetStatus:
+    try:
+        statuses = await async_crud_budgets.get_budget_statuses(user_id=current_user.id, budget_id=budget_id)
+
+    except ValidationError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid budget id format"
+        )
+
+    if not statuses:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Budget not found."
+        )
+    return statuses[0]
+
+
+@router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_budget(budget_id: str, current_user: Principal = Depends(security.get_current_user)) -> None:
+    if not await async_crud_budgets.delete_budget(user_id=current_user.id, budget_id=budget_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Budget not found."
+        )
@@ -0,0 +1,84 @@
+from app.schemas import category as category_schema
+from app.crud import async_crud_categories
+from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends
+from app.schemas.user import Principal
+from app.utils import security, logger
+
+router = APIRouter(
+    prefix='/categories',
+    tags=['categories'],
+    responses={404: {"description": "Not found"}}
+)
+
+logger = logger.setup_logger(__name__)
+
+
+@router.get("/rules", response_model=List[category_schema.CategoryRule])
+async def get_rules(current_user: Principal = Depends(security.get_current_user)) -> List[category_schema.CategoryRule]:
+    """
+    The authenticated user's categorization rules, highest priority first.
+    """
+    return await async_crud_categories.get_rules(user_id=current_user.id)
+
+
+@router.post("/rules", response_model=category_schema.CategoryRule, status_code=status.HTTP_201_CREATED)
+async def create_rule(rule: category_schema.CategoryRuleCreate,
+                      current_user: Principal = Depends(security.get_current_user)) -> category_schema.CategoryRule:
+    """
+    Add a rule assigning a category to the transactions whose description matches a keyword or a regular expression.
+    New rules apply to later imports; run /categories/recategorize to apply them to stored transactions.
+
+    Parameters:
+        rule (CategoryRuleCreate): The category, the pattern, whether it is a regular expression and its priority.
+
+    Returns:
+        CategoryRule: The created rule.
+
+    Raises:
+        HTTPException: 400 error if the pattern is invalid.
+    """
+    try:
+        return await async_crud_categories.create_rule(user_id=current_user.id, rule=rule)
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while creating category rule: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while creating the category rule."
+        )
+
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(rule_id: str, current_user: Principal = Depends(security.get_current_user)) -> None:
+    if not await async_crud_categories.delete_rule(user_id=current_user.id, rule_id=rule_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category rule not found."
+        )
+
+
+@router.post("/recategorize", response_model=category_schema.RecategorizeResult)
+async def recategorize(overwrite: bool = False,
+                       current_user: Principal = Depends(security.get_current_user)) -> category_schema.RecategorizeResult:
+    """
+    Apply the authenticated user's rules to their stored transactions.
+
+    Parameters:
+        overwrite (bool): Also replace existing categories when a rule matches.
+
+    Returns:
+        RecategorizeResult: The number of transactions scanned and updated.
+    """
+    try:
+        return await async_crud_categories.recategorize_transactions(user_id=current_user.id, overwrite=overwrite)
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while recategorizing transactions: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while recategorizing the transactions."
+        )
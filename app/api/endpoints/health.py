@@ -0,0 +1,28 @@
+from app.schemas import health as health_schema
+from fastapi import APIRouter, Response, status
+from app.database import database
+from app.utils.concurrency import run_in_db_pool
+
+router = APIRouter(
+    tags=['health'],
+)
+
+
+@router.get("/health")
+async def health() -> dict:
+    """
+    Liveness probe: the process is up and serving requests. Does not touch the database.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready", response_model=health_schema.Readiness)
+async def ready(response: Response) -> health_schema.Readiness:
+    """
+    Readiness probe: pings MongoDB and reports connection pool saturation.
+    Answers 503 when the database cannot be reached.
+    """
+    readiness = await run_in_db_pool(database.check_readiness)
+    if not readiness["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return health_schema.Readiness(**readiness)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+from app.utils import metrics
+
+router = APIRouter(
+    tags=['metrics'],
+)
+
+
+@router.get("/metrics", response_class=Response)
+async def get_metrics() -> Response:
+    """
+    Metrics of this worker process in the Prometheus text format: request latency per route, CRUD and
+    bcrypt call durations, serialization time, cache hit ratios and pool usage.
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
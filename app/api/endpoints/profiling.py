@@ -0,0 +1,47 @@
+from app.schemas.profile import ProfileSummary
+from typing import List
+from fastapi import APIRouter, HTTPException, Response, status, Depends
+from app.schemas.user import Principal
+from app.utils import security, profiling
+
+router = APIRouter(
+    prefix='/profiles',
+    tags=['profiling'],
+    responses={404: {"description": "Not found"}}
+)
+
+
+@router.get("/", response_model=List[ProfileSummary])
+async def get_profiles(current_user: Principal = Depends(security.get_current_active_admin)) -> List[ProfileSummary]:
+    """
+    The request profiles kept by this worker process, most recent first. Admin only.
+    Profiles are only recorded when PROFILING_ENABLED is set, see app.utils.profiling.
+    """
+    return [profile.summary() for profile in profiling.get_store().list()]
+
+
+@router.get("/{profile_id}", response_class=Response)
+async def get_profile(profile_id: str, current_user: Principal = Depends(security.get_current_active_admin)) -> Response:
+    """
+    Download a profile as collapsed stacks, one "frame;frame;frame samples" line per stack,
+    for flamegraph.pl or speedscope. Admin only.
+
+    Raises:
+        HTTPException: 404 error if the profile does not exist or was dropped from storage.
+    """
+    profile = profiling.get_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return Response(
+        content=profile.collapsed(),
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed"'}
+    )
+
+
+@router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_profiles(current_user: Principal = Depends(security.get_current_active_admin)):
+    """
+    Drop every stored profile. Admin only.
+    """
+    profiling.get_store().clear()
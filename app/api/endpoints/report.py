@@ -0,0 +1,164 @@
+from app.schemas import report as report_schema
+from app.crud import async_crud_reports
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from app.schemas.user import Principal
+from app.utils import security, logger, http_cache
+from app.utils.http_cache import ConditionalRequest
+
+router = APIRouter(
+    prefix='/reports',
+    tags=['reports'],
+    responses={404: {"description": "Not found"}}
+)
+
+logger = logger.setup_logger(__name__)
+
+
+@router.get("/summary", response_model=report_schema.ReportSummary)
+async def get_summary(
+        period: report_schema.Period = 'month',
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+        current_user: Principal = Depends(security.get_current_user),
+        conditional: ConditionalRequest = Depends(http_cache.conditional_request)) -> report_schema.ReportSummary:
+    """
+    Income, expense and net totals with running balances, grouped by user and day, week or month.
+
+    Parameters:
+        period (Period): The bucket granularity.
+        date_from (Optional[datetime]): Inclusive lower bound of the transaction date.
+        date_to (Optional[datetime]): Inclusive upper bound of the transaction date.
+        user_id (Optional[str]): Admins only, the user to report on. Admins get every user when omitted.
+
+    Returns:
+        ReportSummary: The overall totals and the per-period buckets.
+    """
+    if not current_user.is_admin:
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="The user doesn't have enough privileges"
+            )
+        user_id = current_user.id
+
+    cached = conditional.cached_response()
+    if cached is not None:
+        return cached
+
+    try:
+        return conditional.respond(await async_crud_reports.get_summary(
+            period=period, user_id=user_id, date_from=date_from, date_to=date_to))
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while computing summary report: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while computing the report."
+        )
+
+
+@router.get("/balance", response_model=report_schema.Balance)
+async def get_balance(current_user: Principal = Depends(security.get_current_user),
+                      conditional: ConditionalRequest = Depends(http_cache.conditional_request)) -> report_schema.Balance:
+    """
+    The authenticated user's all-time income, expense and balance, read from the monthly rollups.
+    """
+    cached = conditional.cached_response()
+    if cached is not None:
+        return cached
+
+    try:
+        return conditional.respond(await async_crud_reports.get_balance(user_id=current_user.id))
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while computing balance: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while computing the balance."
+        )
+
+
+@router.get("/balance/as-of", response_model=report_schema.BalanceAsOf)
+async def get_balance_as_of(date: Optional[datetime] = None,
+                            current_user: Principal = Depends(security.get_current_user),
+                            conditional: ConditionalRequest = Depends(http_cache.conditional_request)) -> report_schema.BalanceAsOf:
+    """
+    The authenticated user's balance including every transaction up to the given date, now by default.
+    Starts from the nearest monthly balance checkpoint and only sums the transactions after it.
+    """
+    cached = conditional.cached_response()
+    if cached is not None:
+        return cached
+
+    try:
+        return conditional.respond(await async_crud_reports.get_balance_as_of(user_id=current_user.id, as_of=date or datetime.utcnow()))
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while computing balance as of %s: %s", date, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while computing the balance."
+        )
+
+
+@router.get("/dashboard", response_model=report_schema.Dashboard)
+async def get_dashboard(months: int = Query(12, ge=1, le=120),
+                        current_user: Principal = Depends(security.get_current_user),
+                        conditional: ConditionalRequest = Depends(http_cache.conditional_request)) -> report_schema.Dashboard:
+    """
+    The authenticated user's balance and the totals of their most recent months, read from the monthly rollups.
+    """
+    cached = conditional.cached_response()
+    if cached is not None:
+        return cached
+
+    try:
+        return conditional.respond(await async_crud_reports.get_dashboard(user_id=current_user.id, months=months))
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while building dashboard: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while building the dashboard."
+        )
+
+
+@router.get("/insights", response_model=report_schema.Insights)
+async def get_insights(
+        as_of: Optional[datetime] = None,
+        window_days: int = Query(30, ge=1, le=366),
+        months: int = Query(12, ge=1, le=120),
+        lookback_days: int = Query(90, ge=1, le=3660),
+        forecast_days: int = Query(30, ge=1, le=366),
+        current_user: Principal = Depends(security.get_current_user),
+        conditional: ConditionalRequest = Depends(http_cache.conditional_request)) -> report_schema.Insights:
+    """
+    Spending insights computed over the authenticated user's full history up to as_of, now by default.
+
+    Parameters:
+        window_days (int): The window of the rolling spend and of the category shares.
+        months (int): The number of most recent months compared month over month.
+        lookback_days (int): The number of days the cash flow forecast is fitted on.
+        forecast_days (int): The number of days forecast.
+
+    Returns:
+        Insights: The rolling spend, month-over-month totals, category shares and balance forecast.
+    """
+    cached = conditional.cached_response()
+    if cached is not None:
+        return cached
+
+    try:
+        return conditional.respond(await async_crud_reports.get_insights(
+            user_id=current_user.id, as_of=as_of, window_days=window_days, months=months,
+            lookback_days=lookback_days, forecast_days=forecast_days))
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while computing insights: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while computing the insights."
+        )
@@ -1,11 +1,19 @@
 from app.schemas import transaction as transaction_schema
-from app.crud import crud_transactions
-from typing import List, Optional
+from app.crud import crud_transactions, async_crud_transactions
+from app.importers import statement
+from typing import List, Literal, Optional
+import io
+import json
+from datetime import datetime
 from mongoengine.errors import DoesNotExist, NotUniqueError, ValidationError
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
 from jose import JWTError
+from app.schemas.user import Principal
 from app.schemas.token import Token, TokenData
-from app.utils import security, logger
+from app.utils import security, logger, http_cache, serialization
+from app.utils.http_cache import ConditionalRequest
+from app.utils.concurrency import run_in_db_pool
 
 router = APIRouter(
     prefix='/transactions',
@@ -13,35 +21,271 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-logger = logger.setup_logger()
+logger = logger.setup_logger(__name__)
 
 
-@router.get("/", response_model=List[transaction_schema.TransactionBase])
-async def get_all_transactions(current_user: TokenData = Depends(security.get_current_active_admin)) -> Optional[
-    List[transaction_schema.TransactionBase]]:
+@router.get("/", response_model=transaction_schema.TransactionPage)
+async def get_all_transactions(
+        limit: int = Query(crud_transactions.DEFAULT_PAGE_SIZE, ge=1, le=crud_transactions.MAX_PAGE_SIZE),
+        after: Optional[str] = None,
+        current_user: TokenData = Depends(security.get_current_active_admin),
+        conditional: ConditionalRequest = Depends(http_cache.conditional_request)) -> transaction_schema.TransactionPage:
+    """
+    List transactions one keyset page at a time, ordered by (date, _id).
+    Supports conditional requests with If-None-Match.
+
+    Parameters:
+        limit (int): Maximum number of transactions to return.
+        after (Optional[str]): The next_cursor value of the previous page.
+
+    Returns:
+        TransactionPage: The transactions of the page and the cursor of the next one.
+    """
+    cached = conditional.cached_response()
+    if cached is not None:
+        return cached
+
     try:
-        transactions = crud_transactions.get_all_transactions()
-        if transactions:
-            return transactions
-        else:
-            logger.warning(f"No transaction found")
-            return []
-    except DoesNotExist as e:
-        logger.warning(f"Transactions not found")
+        transactions, next_cursor = await async_crud_transactions.get_transactions_page(limit=limit, after=after)
+        if not transactions:
+            logger.warning("No transaction found")
+        return conditional.respond(transaction_schema.TransactionPage(items=transactions, next_cursor=next_cursor))
+
+    except ValueError as e:
+        logger.warning("Invalid pagination cursor: %s", e)
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transactions not found."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
         )
 
     except JWTError as jwt_error:
-        logger.error(f"JWT Error: {jwt_error}")
+        logger.error("JWT Error: %s", jwt_error)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error processing get transactions request."
         )
 
     except Exception as e:
-        logger.error(f"Unexpected error occurred while retrieving transactions: {e}")
+        logger.error("Unexpected error occurred while retrieving transactions: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred."
+        )
+
+
+@router.post("/", response_model=transaction_schema.TransactionBase, status_code=status.HTTP_201_CREATED)
+async def create_transaction(transaction: transaction_schema.TransactionCreate,
+                             current_user: Principal = Depends(security.get_current_user)) -> transaction_schema.TransactionBase:
+    """
+    Record a new transaction for the authenticated user.
+    """
+    try:
+        return await async_crud_transactions.create_transaction(user_id=current_user.id, transaction=transaction)
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while creating transaction: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while creating the transaction."
+        )
+
+
+@router.post("/bulk", response_model=transaction_schema.BulkImportResult)
+async def bulk_create_transactions(
+        request: Request,
+        chunk_size: int = Query(crud_transactions.BULK_CHUNK_SIZE, ge=1, le=crud_transactions.MAX_BULK_CHUNK_SIZE),
+        current_user: Principal = Depends(security.get_current_user)) -> transaction_schema.BulkImportResult:
+    """
+    Import many transactions for the authenticated user in one request.
+
+    The body is either a JSON array of transactions or, with the application/x-ndjson content type,
+    one transaction per line. NDJSON bodies are consumed as a stream, chunk by chunk.
+    Rows are validated and inserted in chunks of chunk_size; failed rows are reported by their
+    0-based position and do not abort the import.
+
+    Returns:
+        BulkImportResult: The number of inserted rows and the per-row errors.
+    """
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            return await _import_ndjson(request, current_user.id, chunk_size)
+
+        rows = await request.json()
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a JSON array of transactions."
+            )
+        return await async_crud_transactions.bulk_create_transactions(user_id=current_user.id, rows=rows, chunk_size=chunk_size)
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except json.JSONDecodeError as e:
+        logger.warning("Invalid JSON body in bulk import: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid JSON body."
+        )
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while importing transactions: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while importing the transactions."
+        )
+
+
+@router.post("/import", response_model=transaction_schema.BulkImportResult)
+async def import_statement(
+        file: UploadFile = File(...),
+        format: Optional[statement.StatementFormat] = None,
+        delimiter: str = ",",
+        date_format: Optional[str] = None,
+        encoding: str = "utf-8-sig",
+        chunk_size: int = Query(crud_transactions.BULK_CHUNK_SIZE, ge=1, le=crud_transactions.MAX_BULK_CHUNK_SIZE),
+        current_user: Principal = Depends(security.get_current_user)) -> transaction_schema.BulkImportResult:
+    """
+    Import a CSV or OFX bank statement for the authenticated user.
+    The upload is spooled to disk and parsed as a stream. Importing the same statement twice is a no-op:
+    rows already imported are counted as duplicates.
+
+    Parameters:
+        file (UploadFile): The statement file.
+        format (Optional[StatementFormat]): 'csv' or 'ofx', detected from the file name when omitted.
+        delimiter (str): The CSV field delimiter.
+        date_format (Optional[str]): The strptime format of CSV dates, guessed when omitted.
+        encoding (str): The text encoding of the file.
+
+    Returns:
+        BulkImportResult: The numbers of inserted, duplicate and failed rows.
+    """
+    statement_format = format or statement.detect_format(file.filename or "")
+    if statement_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown statement format, pass format=csv or format=ofx."
+        )
+
+    try:
+        stream = io.TextIOWrapper(file.file, encoding=encoding, errors="replace", newline="")
+        return await run_in_db_pool(statement.import_statement, current_user.id, stream, statement_format,
+                                    delimiter=delimiter, date_format=date_format, chunk_size=chunk_size)
+
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown encoding."
+        )
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while importing statement %s: %s", file.filename, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while importing the statement."
+        )
+
+
+async def _import_ndjson(request: Request, user_id, chunk_size: int) -> transaction_schema.BulkImportResult:
+    """
+    Reads an NDJSON body line by line and imports it one chunk at a time.
+    """
+    result = transaction_schema.BulkImportResult()
+    chunk = []
+    row_number = 0
+
+    def add_line(line: bytes):
+        nonlocal row_number
+        if not line.strip():
+            return
+        try:
+            chunk.append((row_number, json.loads(line)))
+        except json.JSONDecodeError as e:
+            result.errors.append(transaction_schema.BulkRowError(row=row_number, error=f"Invalid JSON: {e}"))
+            result.failed += 1
+        row_number += 1
+
+    buffer = b""
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            add_line(line)
+            if len(chunk) >= chunk_size:
+                crud_transactions.merge_import_results(result, await async_crud_transactions.import_transaction_rows(user_id, chunk))
+                chunk = []
+    add_line(buffer)
+    if chunk:
+        crud_transactions.merge_import_results(result, await async_crud_transactions.import_transaction_rows(user_id, chunk))
+
+    logger.info("NDJSON import finished: %s inserted, %s failed.", result.inserted, result.failed)
+    return result
+
+
+@router.get("/stream")
+async def stream_transactions(
+        batch_size: int = Query(crud_transactions.STREAM_BATCH_SIZE, ge=1, le=crud_transactions.MAX_PAGE_SIZE),
+        current_user: TokenData = Depends(security.get_current_active_admin)) -> StreamingResponse:
+    """
+    Stream every transaction as newline-delimited JSON.
+    Rows are read and written one batch at a time, so memory stays flat regardless of collection size.
+    """
+
+    def generate_lines():
+        for batch in crud_transactions.iter_transaction_batches(batch_size=batch_size):
+            yield b"".join(serialization.dumps(transaction) + b"\n" for transaction in batch)
+
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+
+@router.get("/me", response_model=transaction_schema.TransactionPage)
+async def get_my_transactions(
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        type: Optional[Literal['income', 'expense']] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        limit: int = Query(crud_transactions.DEFAULT_PAGE_SIZE, ge=1, le=crud_transactions.MAX_PAGE_SIZE),
+        after: Optional[str] = None,
+        current_user: Principal = Depends(security.get_current_user),
+        conditional: ConditionalRequest = Depends(http_cache.conditional_request)) -> transaction_schema.TransactionPage:
+    """
+    List the authenticated user's transactions, filtered by date range, type and amount.
+    Supports conditional requests with If-None-Match.
+
+    Returns:
+        TransactionPage: The transactions of the page and the cursor of the next one.
+    """
+    cached = conditional.cached_response()
+    if cached is not None:
+        return cached
+
+    try:
+        transactions, next_cursor = await async_crud_transactions.get_user_transactions(
+            user_id=current_user.id,
+            date_from=date_from,
+            date_to=date_to,
+            transaction_type=type,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            limit=limit,
+            after=after
+        )
+        return conditional.respond(transaction_schema.TransactionPage(items=transactions, next_cursor=next_cursor))
+
+    except ValueError as e:
+        logger.warning("Invalid pagination cursor: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
+
+    except Exception as e:
+        logger.error("Unexpected error occurred while retrieving transactions of user %s: %s",
+                     current_user.username, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred."
@@ -49,37 +293,59 @@ async def get_all_transactions(current_user: TokenData = Depends(security.get_cu
 
 
 @router.get("/{transaction_id}", response_model=transaction_schema.TransactionBase)
-async def get_transaction(transaction_id: int) -> Optional[transaction_schema.TransactionBase]:
+async def get_transaction(transaction_id: str,
+                          current_user: Principal = Depends(security.get_current_user)) -> transaction_schema.TransactionBase:
+    """
+    Retrieve one of the authenticated user's transactions.
+
+    Raises:
+        HTTPException: 404 error if the transaction does not exist or belongs to another user.
+    """
     try:
-        db_transaction = crud_transactions.get_transaction_by_id(transaction_id=transaction_id)
-        return db_transaction
-    except DoesNotExist:
-        logger.warning(f"Transaction not found")
+        db_transaction = await async_crud_transactions.get_transaction_by_id(transaction_id=transaction_id,
+                                                                             user_id=current_user.id)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        logger.error("Unexpected error occurred while checking transaction by id %s: %s", transaction_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while retrieving the transaction."
+        )
+
+    if db_transaction is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Transaction not found"
         )
-    except Exception as e:
-        logger.error(f"Unexpected error occurred while checking transaction by id {transaction_id}: {e}")
+    return db_transaction
 
 
 @router.delete("/{transaction_id}", response_model=transaction_schema.TransactionBase)
-async def delete_transaction(transaction_id: int) -> transaction_schema.TransactionBase | False:
+async def delete_transaction(transaction_id: str,
+                             current_user: Principal = Depends(security.get_current_user)) -> Optional[transaction_schema.TransactionBase]:
+    """
+    Delete one of the authenticated user's transactions.
+
+    Raises:
+        HTTPException: 404 error if the transaction does not exist or belongs to another user.
+    """
     try:
-        transaction_to_delete = crud_transactions.delete_transaction_by_id(transaction_id=transaction_id)
+        transaction_to_delete = await async_crud_transactions.delete_transaction_by_id(transaction_id=transaction_id,
+                                                                                       user_id=current_user.id)
         if not transaction_to_delete:
-            logger.info(f"Transaction with ID {transaction_id} not found")
+            logger.info("Transaction with ID %s not found", transaction_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transaction not found."
             )
         if transaction_to_delete:
-            logger.info(f"Transaction with id: {transaction_id} deleted successfully")
+            logger.info("Transaction with id: %s deleted successfully", transaction_id)
             return transaction_to_delete
 
         else:
             logger.warning(
-                f"Failed to delete transaction with ID {transaction_id}. Transaction may not exists or deleted already.")
+                "Failed to delete transaction with ID %s. Transaction may not exists or deleted already.", transaction_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transaction not found or already deleted"
@@ -88,16 +354,40 @@ async def delete_transaction(transaction_id: int) -> transaction_schema.Transact
         raise http_exc
 
     except Exception as e:
-        logger.error(f"Unexpected error occurred while deleting transaction with ID {transaction_id}: {e}")
+        logger.error("Unexpected error occurred while deleting transaction with ID %s: %s", transaction_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while deleting the transaction."
         )
 
+
 @router.put("/{transaction_id}", response_model=transaction_schema.TransactionBase)
-async def update_transaction(transaction_id: int, transactoin_data: transaction_schema.TransactionCreate) -> transaction_schema.TransactionBase | bool:
+async def update_transaction(transaction_id: str, transaction_data: transaction_schema.TransactionCreate,
+                             current_user: Principal = Depends(security.get_current_user)) -> Optional[transaction_schema.TransactionBase]:
+    """
+    Replace one of the authenticated user's transactions.
+
+    Raises:
+        HTTPException: 404 error if the transaction does not exist or belongs to another user.
+    """
     try:
-        updated_transaction = crud_transactions.update_transaction(transaction_id=transaction_id, transaction_data=transactoin_data)
+        updated_transaction = await async_crud_transactions.update_transaction(transaction_id=transaction_id,
+                                                                               transaction_data=transaction_data,
+                                                                               user_id=current_user.id)
+        if not updated_transaction:
+            logger.info("Transaction with ID %s not found", transaction_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Transaction not found"
+            )
+        return updated_transaction
 
-    except Exception as e:
-        pass
\ No newline at end of file
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except ValidationError as e:
+        logger.warning("Validation error while updating transaction with ID %s: %s", transaction_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid transaction."
+        )
@@ -1,12 +1,14 @@
+import math
 from typing import List, Optional
 from mongoengine.errors import DoesNotExist, NotUniqueError, ValidationError
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from jose import JWTError
 from app.models.user import User
 from app.schemas import user as user_schema
 from app.schemas.token import Token, TokenData
-from app.crud import crud_user
-from app.utils import security, logger
+from app.crud import async_crud_user
+from app.utils import security, logger, serialization, rate_limit
+from app.utils.password_pool import PasswordPoolSaturated
 
 router = APIRouter(
     prefix='/users',
@@ -14,7 +16,7 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}
 )
 
-logger = logger.setup_logger()
+logger = logger.setup_logger(__name__)
 
 
 @router.post("/register", response_model=user_schema.UserBase)
@@ -32,20 +34,31 @@ async def create_user(user: user_schema.UserCreate):
 
     Raises:
         HTTPException: 400 error if the user could not be created due to validation or other issues.
+        HTTPException: 503 error if too many passwords are being hashed, with a Retry-After header.
     """
 
     try:
-        new_user = crud_user.create_user(user)
+        new_user = await async_crud_user.create_user(user)
         if new_user:
-            logger.info(f"New user registered: {new_user.username}")
+            logger.info("New user registered: %s", new_user.username)
+            return new_user
         else:
-            logger.error(f"Failed to register user: {user.username}")
+            logger.error("Failed to register user: %s", user.username)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to create the user. The username or email might already be in use."
             )
+    except HTTPException:
+        raise
+    except PasswordPoolSaturated:
+        logger.warning("Password hashing pool saturated, rejecting registration of: %s", user.username)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many registrations in progress, try again later.",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
-        logger.exception(f"Unexpected error occurred while registering user: {e}")
+        logger.exception("Unexpected error occurred while registering user: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred"
@@ -53,7 +66,7 @@ async def create_user(user: user_schema.UserCreate):
 
 
 @router.post("/login")
-async def login(user: user_schema.UserLogin) -> Token:
+async def login(user: user_schema.UserLogin, request: Request) -> Token:
     """
             Authenticate a user and provide an access token for future requests.
             This endpoint verifies the user's credentials and, if valid, generates a new access token for the user.
@@ -61,36 +74,57 @@ async def login(user: user_schema.UserLogin) -> Token:
             Args:
                 user (UserLogin): The user's login information including username and password.
 
+            Attempts are rate limited per client IP and per username before any lookup or password check.
+
             Raises:
                 HTTPException: 401 error if the username or password is incorrect.
+                HTTPException: 429 error if too many attempts were made, with a Retry-After header.
 
             Returns:
                 Token: An object containing the access token and token type.
     """
 
+    wait = rate_limit.check_login(request.client.host if request.client else None, user.username)
+    if wait:
+        logger.warning("Login rate limit exceeded for username: %s", user.username)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
     try:
-        user_obj = security.authenticate_user(user.username, user.password)
+        user_obj = await security.authenticate_user_async(user.username, user.password)
         if not user_obj:
-            logger.info(f"Login attempt for username: {user.username}")
+            logger.info("Login attempt for username: %s", user.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        rate_limit.reset_login(user.username)
         access_token = security.create_access_token(data={"sub": user.username})
-        logger.info(f"User {user_obj.username} logged in successfully.")
+        logger.info("User %s logged in successfully.", user_obj.username)
         return Token(access_token=access_token, token_type="bearer")
 
     except DoesNotExist:
-        logger.warning(f"User not found: {user.username}")
+        logger.warning("User not found: %s", user.username)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
+    except PasswordPoolSaturated:
+        logger.warning("Password hashing pool saturated, rejecting login for: %s", user.username)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, try again later.",
+            headers={"Retry-After": "1"},
+        )
+
     except JWTError as jwt_error:
-        logger.error(f"JWT Error: {jwt_error}")
+        logger.error("JWT Error: %s", jwt_error)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error processing login request."
@@ -100,38 +134,38 @@ async def login(user: user_schema.UserLogin) -> Token:
 @router.get("/", response_model=List[user_schema.UserBase])
 async def read_users(current_user: TokenData = Depends(security.get_current_active_admin)):
     try:
-        users = crud_user.get_all_users()
-        return users
+        users = await async_crud_user.get_all_users()
+        return serialization.response(users)
     except DoesNotExist:
-        logger.warning(f"Users not found")
+        logger.warning("Users not found")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Users not found"
         )
     except JWTError as jwt_error:
-        logger.error(f"JWT Error: {jwt_error}")
+        logger.error("JWT Error: %s", jwt_error)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error processing login request."
         )
     except Exception as e:
-        logger.error(f"Error occurred while processing getting users: {e}")
+        logger.error("Error occurred while processing getting users: %s", e)
 
 
 @router.get("/{user_id}", response_model=user_schema.UserBase)
 async def read_user(user_id: int, current_user: TokenData = Depends(security.get_current_active_admin)):
     try:
-        user = crud_user.get_user_by_id(user_id=user_id)
+        user = await async_crud_user.get_user_by_id(user_id=user_id)
         return user
     except DoesNotExist:
-        logger.warning(f"User not found")
+        logger.warning("User not found")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
     except Exception as e:
-        logger.error(f"Error occurred while processing getting user: {e}")
+        logger.error("Error occurred while processing getting user: %s", e)
 
 
 @router.delete("/{user_id}", response_model=user_schema.UserBase)
@@ -149,20 +183,20 @@ async def delete_user(user_id: int, current_user: TokenData = Depends(security.g
             HTTPException: With appropriate status code and detail message when errors occur.
     """
     try:
-        db_user = crud_user.get_user_by_id(user_id=user_id)
+        db_user = await async_crud_user.get_user_by_id(user_id=user_id)
         if not db_user:
-            logger.info(f"User with ID {user_id} not found")
+            logger.info("User with ID %s not found", user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found."
             )
 
-        if crud_user.delete_user(user_id=user_id):
-            logger.info(f"User with ID {user_id} has been deleted.")
+        if await async_crud_user.delete_user(user_id=user_id):
+            logger.info("User with ID %s has been deleted.", user_id)
             return db_user
 
         else:
-            logger.warning(f"Failed to delete user with ID {user_id}. User may not exist.")
+            logger.warning("Failed to delete user with ID %s. User may not exist.", user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found or already deleted."
@@ -172,7 +206,7 @@ async def delete_user(user_id: int, current_user: TokenData = Depends(security.g
         raise http_exc
 
     except Exception as e:
-        logger.error(f"Unexpected error occurred while deleting user with ID {user_id}: {e}")
+        logger.error("Unexpected error occurred while deleting user with ID %s: %s", user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while deleting the user."
@@ -192,18 +226,18 @@ async def update_user(user_id: int, user_data: user_schema.UserCreate, current_u
             Optional[UserBase]: The updated user's information if the update was successful, None otherwise.
     """
     try:
-        user_in_db = crud_user.update_user(user_id=user_id, user_data=user_data)
+        user_in_db = await async_crud_user.update_user(user_id=user_id, user_data=user_data)
         return user_in_db
 
     except ValidationError as e:
-        logger.error(f"Validation Error: {e}")
+        logger.error("Validation Error: %s", e)
         # Todo: handle with custom exception
 
     except NotUniqueError as e:
-        logger.error(f"Unique Constraint Error: {e}")
+        logger.error("Unique Constraint Error: %s", e)
         # Todo: handle cases where the update might violate a unique constraint.
 
     except Exception as e:
-        logger.error(f"Unexpected error occurred while updating user with ID {user_id}: {e}")
+        logger.error("Unexpected error occurred while updating user with ID %s: %s", user_id, e)
         # Todo: handle any other unexpected errors
     return None
@@ -0,0 +1,10 @@
+"""
+Awaitable counterparts of crud_budgets, run in the database thread pool.
+"""
+
+from app.crud import crud_budgets
+from app.utils.concurrency import asyncify
+
+create_budget = asyncify(crud_budgets.create_budget)
+get_budget_statuses = asyncify(crud_budgets.get_budget_statuses)
+delete_budget = asyncify(crud_budgets.delete_budget)
@@ -0,0 +1,11 @@
+"""
+Awaitable counterparts of crud_categories, run in the database thread pool.
+"""
+
+from app.crud import crud_categories
+from app.utils.concurrency import asyncify
+
+get_rules = asyncify(crud_categories.get_rules)
+create_rule = asyncify(crud_categories.create_rule)
+delete_rule = asyncify(crud_categories.delete_rule)
+recategorize_transactions = asyncify(crud_categories.recategorize_transactions)
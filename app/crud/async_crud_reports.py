@@ -0,0 +1,21 @@
+"""
+Awaitable counterparts of crud_reports, crud_rollups, crud_balances and crud_insights,
+run in the database thread pool.
+"""
+
+from app.crud import crud_reports, crud_rollups, crud_balances
+from app.utils.concurrency import asyncify
+
+get_summary = asyncify(crud_reports.get_summary)
+get_balance = asyncify(crud_rollups.get_balance)
+get_dashboard = asyncify(crud_rollups.get_dashboard)
+get_balance_as_of = asyncify(crud_balances.get_balance_as_of)
+
+
+def _get_insights(*args, **kwargs):
+    # Imported on first use, so that workers and tests that never serve insights do not load NumPy.
+    from app.crud import crud_insights
+    return crud_insights.get_insights(*args, **kwargs)
+
+
+get_insights = asyncify(_get_insights, name="crud_insights.get_insights")
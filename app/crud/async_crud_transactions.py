@@ -0,0 +1,17 @@
+"""
+Awaitable counterparts of crud_transactions. Each function has the signature of its synchronous original
+and runs it in the database thread pool, so request handlers do not block the event loop.
+"""
+
+from app.crud import crud_transactions
+from app.utils.concurrency import asyncify
+
+get_all_transactions = asyncify(crud_transactions.get_all_transactions)
+get_transactions_page = asyncify(crud_transactions.get_transactions_page)
+get_user_transactions = asyncify(crud_transactions.get_user_transactions)
+get_transaction_by_id = asyncify(crud_transactions.get_transaction_by_id)
+create_transaction = asyncify(crud_transactions.create_transaction)
+import_transaction_rows = asyncify(crud_transactions.import_transaction_rows)
+bulk_create_transactions = asyncify(crud_transactions.bulk_create_transactions)
+delete_transaction_by_id = asyncify(crud_transactions.delete_transaction_by_id)
+update_transaction = asyncify(crud_transactions.update_transaction)
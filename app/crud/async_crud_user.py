@@ -0,0 +1,15 @@
+"""
+Awaitable counterparts of crud_user. Each function has the signature of its synchronous original
+and runs it in the database thread pool, so request handlers do not block the event loop.
+"""
+
+from app.crud import crud_user
+from app.utils.concurrency import asyncify
+
+create_user = asyncify(crud_user.create_user)
+get_all_users = asyncify(crud_user.get_all_users)
+get_user_by_username = asyncify(crud_user.get_user_by_username)
+get_user_by_id = asyncify(crud_user.get_user_by_id)
+get_user_by_email = asyncify(crud_user.get_user_by_email)
+delete_user = asyncify(crud_user.delete_user)
+update_user = asyncify(crud_user.update_user)
@@ -0,0 +1,133 @@
+from app.schemas.report import BalanceAsOf
+from typing import Dict, Iterable, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+from app.models.balance import BalanceCheckpoint
+from app.models.rollup import MonthlyRollup
+from app.models.transaction import Transaction
+from app.crud import crud_rollups
+from app.utils import logger
+
+logger = logger.setup_logger(__name__)
+
+
+def month_end(month: str) -> datetime:
+    """
+    Returns the first instant after the given YYYY-MM month.
+    """
+    year, month_number = map(int, month.split('-'))
+    return datetime(year + month_number // 12, month_number % 12 + 1, 1)
+
+
+def build_checkpoints(user_id, now: Optional[datetime] = None) -> int:
+    """
+    Extends a user's monthly balance checkpoints up to the last completed month.
+    Cumulative balances are computed from the monthly rollups, starting at the latest checkpoint
+    that is still valid, so a periodic run only touches the months added since the previous one.
+
+    Parameters:
+        user_id: The ID of the user.
+        now (Optional[datetime]): The current time, months ending after it are not checkpointed.
+
+    Returns:
+        int: The number of checkpoints written.
+    """
+    now = now or datetime.utcnow()
+    latest = BalanceCheckpoint.objects(user=user_id).order_by('-as_of').only('as_of', 'balance').first()
+    balance = latest.balance if latest else 0.0
+    start_month = crud_rollups.month_key(latest.as_of) if latest else None
+
+    filters = {'user': user_id}
+    if start_month is not None:
+        filters['month__gte'] = start_month
+    net_by_month: Dict[str, float] = {}
+    for rollup in MonthlyRollup.objects(**filters).only('month', 'type', 'total').as_pymongo():
+        sign = 1 if rollup['type'] == 'income' else -1
+        net_by_month[rollup['month']] = net_by_month.get(rollup['month'], 0.0) + sign * rollup['total']
+
+    written = 0
+    for month in sorted(net_by_month):
+        as_of = month_end(month)
+        if as_of > now:
+            break
+        balance += net_by_month[month]
+        BalanceCheckpoint.objects(user=user_id, as_of=as_of).update_one(set__balance=balance, upsert=True)
+        written += 1
+
+    logger.info("Wrote %s balance checkpoints for user %s.", written, user_id)
+    return written
+
+
+def build_all_checkpoints(now: Optional[datetime] = None) -> int:
+    """
+    Extends the checkpoints of every user with monthly rollups. Meant to run periodically.
+    """
+    return sum(build_checkpoints(user_id, now=now) for user_id in MonthlyRollup.objects.distinct('user'))
+
+
+def _sum_transactions(user_id, date_from: Optional[datetime], date_to: datetime) -> float:
+    filters = {'user': user_id, 'date__lte': date_to}
+    if date_from is not None:
+        filters['date__gte'] = date_from
+    pipeline = [{'$group': {
+        '_id': None,
+        'balance': {'$sum': {'$cond': [{'$eq': ['$type', 'income']}, '$amount', {'$multiply': ['$amount', -1]}]}},
+    }}]
+    rows = list(Transaction.objects(**filters).aggregate(pipeline))
+    return rows[0]['balance'] if rows else 0.0
+
+
+def get_balance_as_of(user_id, as_of: datetime) -> BalanceAsOf:
+    """
+    Computes a user's balance including every transaction dated up to as_of.
+    The nearest checkpoint at or before as_of provides the starting balance, and only the transactions
+    after it are summed, so at most about a month of history is read.
+
+    Parameters:
+        user_id: The ID of the user.
+        as_of (datetime): The inclusive date of the balance.
+
+    Returns:
+        BalanceAsOf: The balance and the checkpoint it started from, if any.
+    """
+    checkpoint = BalanceCheckpoint.objects(user=user_id, as_of__lte=as_of).order_by('-as_of') \
+        .only('as_of', 'balance').first()
+    start_balance = checkpoint.balance if checkpoint else 0.0
+    start_date = checkpoint.as_of if checkpoint else None
+    return BalanceAsOf(
+        user_id=str(user_id),
+        as_of=as_of,
+        balance=start_balance + _sum_transactions(user_id, start_date, as_of),
+        checkpoint=start_date
+    )
+
+
+def invalidate_checkpoints(changes: Iterable[Tuple[dict, int]]) -> int:
+    """
+    Deletes the checkpoints made stale by transaction writes: for each user, every checkpoint
+    after the earliest date touched. build_checkpoints recreates them on its next run.
+    A removal and an addition of the same user, date, type and amount cancel out, so writes that
+    only change other fields, such as the category, leave the checkpoints alone.
+
+    Returns:
+        int: The number of checkpoints deleted.
+    """
+    net: Dict[tuple, int] = defaultdict(int)
+    for fields, sign in changes:
+        if fields.get('date') is None:
+            continue
+        net[(crud_rollups.user_object_id(fields['user']), fields['date'], fields['type'], fields['amount'])] += sign
+
+    earliest: Dict[object, datetime] = {}
+    for (user, date, _, _), count in net.items():
+        if not count:
+            continue
+        if user not in earliest or date < earliest[user]:
+            earliest[user] = date
+
+    deleted = 0
+    for user, date in earliest.items():
+        deleted += BalanceCheckpoint.objects(user=user, as_of__gt=date).delete()
+    if deleted:
+        logger.info("Invalidated %s balance checkpoints after back-dated transaction writes.", deleted)
+    return deleted
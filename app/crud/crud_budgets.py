@@ -0,0 +1,279 @@
+from app.schemas.budget import BudgetCreate, BudgetStatus, BudgetPeriod, BudgetSpendDrift
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.models.budget import Budget, BudgetSpend
+from app.models.transaction import Transaction
+from app.crud import crud_rollups
+from app.utils import logger
+from mongoengine.errors import NotUniqueError, ValidationError
+from fastapi import HTTPException, status
+
+logger = logger.setup_logger(__name__)
+
+SpendKey = Tuple[ObjectId, str, str, str]
+
+
+def period_key(period: BudgetPeriod, date: datetime) -> str:
+    date = crud_rollups.naive_utc(date)
+    if period == 'weekly':
+        year, week, _ = date.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == 'yearly':
+        return date.strftime('%Y')
+    return date.strftime('%Y-%m')
+
+
+def period_start(period: BudgetPeriod, key: str) -> datetime:
+    """
+    Returns the first day of the budget period identified by key, the inverse of period_key.
+    """
+    if period == 'weekly':
+        year, week = key.split('-W')
+        return datetime.fromisocalendar(int(year), int(week), 1)
+    if period == 'yearly':
+        return datetime(int(key), 1, 1)
+    return datetime.strptime(key, '%Y-%m')
+
+
+def period_bounds(period: BudgetPeriod, date: datetime) -> Tuple[datetime, datetime]:
+    """
+    Returns the inclusive start and exclusive end of the budget period containing date.
+    """
+    day = datetime(date.year, date.month, date.day)
+    if period == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if period == 'yearly':
+        return datetime(date.year, 1, 1), datetime(date.year + 1, 1, 1)
+    start = datetime(date.year, date.month, 1)
+    return start, datetime(date.year + date.month // 12, date.month % 12 + 1, 1)
+
+
+def _spent_in_period(user_id, category: str, period: BudgetPeriod, date: datetime) -> float:
+    start, end = period_bounds(period, date)
+    pipeline = [{'$group': {'_id': None, 'spent': {'$sum': '$amount'}}}]
+    rows = list(Transaction.objects(user=user_id, type='expense', category=category,
+                                    date__gte=start, date__lt=end).aggregate(pipeline))
+    return rows[0]['spent'] if rows else 0.0
+
+
+def _to_status(budget: dict, key: str, spent: float) -> BudgetStatus:
+    return BudgetStatus(
+        id=str(budget['_id']),
+        category=budget['category'],
+        period=budget['period'],
+        limit=budget['limit'],
+        period_key=key,
+        spent=spent,
+        remaining=budget['limit'] - spent,
+        over_budget=spent > budget['limit']
+    )
+
+
+def create_budget(user_id, budget: BudgetCreate, now: Optional[datetime] = None) -> BudgetStatus:
+    """
+    Creates a budget and seeds its spend counter for the current period from the existing expenses.
+    From then on the counter is kept up to date by transaction writes.
+
+    Parameters:
+        user_id: The ID of the owner of the budget.
+        budget (BudgetCreate): The category, period and limit of the budget.
+        now (Optional[datetime]): The current time, defaults to utcnow.
+
+    Returns:
+        BudgetStatus: The created budget with its spend in the current period.
+
+    Raises:
+        HTTPException: 409 error if the user already has a budget for this category and period.
+    """
+    now = now or datetime.utcnow()
+    owner = crud_rollups.user_object_id(user_id)
+    try:
+        db_budget = Budget(user=owner, category=budget.category, period=budget.period, limit=budget.limit)
+        db_budget.save()
+    except NotUniqueError:
+        logger.warning("Duplicate %s budget for category %s of user %s.", budget.period, budget.category, user_id)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A budget already exists for this category and period."
+        )
+
+    key = period_key(budget.period, now)
+    spent = _seed_spend(owner, budget.category, budget.period, key)
+    logger.info("Budget %s created for user %s.", db_budget.id, user_id)
+    return _to_status(db_budget.to_mongo().to_dict(), key, spent)
+
+
+def _seed_spend(owner: ObjectId, category: str, period: BudgetPeriod, key: str) -> float:
+    """
+    Seeds the spend counter of a new budget from the existing expenses, without losing the $inc of
+    expenses written meanwhile: the counter is set, then recounted and corrected by the difference
+    with $inc. Writes racing the recount itself can still leave a drift, which verify_budget_spend
+    reports and repair_budget_spend corrects.
+    """
+    counter = BudgetSpend.objects(user=owner, category=category, period=period, period_key=key)
+    start = period_start(period, key)
+    counter.update_one(set__spent=_spent_in_period(owner, category, period, start), upsert=True)
+    spent = _spent_in_period(owner, category, period, start)
+    drift = spent - counter.only('spent').first().spent
+    if drift:
+        counter.update_one(inc__spent=drift)
+    return spent
+
+
+def verify_budget_spend() -> List[BudgetSpendDrift]:
+    """
+    Compares every budget spend counter with the expenses of its period, one aggregation per counter.
+
+    Returns:
+        List[BudgetSpendDrift]: Every counter whose spend differs from the expenses.
+    """
+    drifts = []
+    for counter in BudgetSpend.objects().as_pymongo():
+        expected = _spent_in_period(counter['user'], counter['category'], counter['period'],
+                                    period_start(counter['period'], counter['period_key']))
+        actual = counter.get('spent', 0.0)
+        if abs(expected - actual) > crud_rollups.DRIFT_TOLERANCE * max(1.0, abs(expected)):
+            drifts.append(BudgetSpendDrift(
+                user_id=str(counter['user']), category=counter['category'], period=counter['period'],
+                period_key=counter['period_key'], expected_spent=expected, actual_spent=actual
+            ))
+
+    if drifts:
+        logger.warning("Found %s drifted budget spend counters.", len(drifts))
+    else:
+        logger.info("Budget spend counters match the transactions.")
+    return drifts
+
+
+def repair_budget_spend() -> int:
+    """
+    Corrects the drifted budget spend counters with $inc of the difference, so expenses written
+    while the repair runs are not overwritten.
+
+    Returns:
+        int: The number of counters corrected.
+    """
+    drifts = verify_budget_spend()
+    for drift in drifts:
+        BudgetSpend.objects(user=ObjectId(drift.user_id), category=drift.category, period=drift.period,
+                            period_key=drift.period_key).update_one(inc__spent=drift.expected_spent - drift.actual_spent)
+    logger.info("Repaired %s budget spend counters.", len(drifts))
+    return len(drifts)
+
+
+def get_budget_statuses(user_id, budget_id: Optional[str] = None, now: Optional[datetime] = None) -> List[BudgetStatus]:
+    """
+    Reports the spend and remaining amount of a user's budgets in their current periods.
+    Reads the budgets and their spend counters with one query each, so the cost grows with the
+    number of budgets, not the number of transactions.
+
+    Parameters:
+        user_id: The ID of the owner of the budgets.
+        budget_id (Optional[str]): Restricts the report to a single budget.
+        now (Optional[datetime]): The current time, defaults to utcnow.
+
+    Returns:
+        List[BudgetStatus]: One status per budget.
+    """
+    now = now or datetime.utcnow()
+    filters = {'user': user_id}
+    if budget_id is not None:
+        filters['id'] = budget_id
+    budgets = list(Budget.objects(**filters).as_pymongo())
+    if not budgets:
+        return []
+
+    keys = {(budget['category'], budget['period']): period_key(budget['period'], now) for budget in budgets}
+    spent = {
+        (counter['category'], counter['period'], counter['period_key']): counter['spent']
+        for counter in BudgetSpend.objects(user=user_id, category__in=[category for category, _ in keys],
+                                           period_key__in=list(set(keys.values()))).as_pymongo()
+    }
+    return [
+        _to_status(budget, keys[(budget['category'], budget['period'])],
+                   spent.get((budget['category'], budget['period'], keys[(budget['category'], budget['period'])]), 0.0))
+        for budget in budgets
+    ]
+
+
+def delete_budget(user_id, budget_id: str) -> bool:
+    try:
+        budget = Budget.objects(user=user_id, id=budget_id).modify(remove=True)
+    except ValidationError as e:
+        logger.error("Validation error for budget with id: %s: %s", budget_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid budget id format"
+        )
+    if not budget:
+        logger.info("Budget with ID %s not found.", budget_id)
+        return False
+    BudgetSpend.objects(user=user_id, category=budget.category, period=budget.period).delete()
+    logger.info("Budget with ID %s has been deleted.", budget_id)
+    return True
+
+
+def apply_changes(changes: Iterable[Tuple[dict, int]]) -> int:
+    """
+    Applies expense writes to the spend counters of the matching budgets and flags budgets whose
+    limit was crossed, in either direction, by these writes.
+    Costs one budget lookup, one bulk $inc and one counter read per batch of changes.
+
+    Parameters:
+        changes (Iterable[Tuple[dict, int]]): Pairs of transaction fields and +1 or -1.
+
+    Returns:
+        int: The number of spend counters touched.
+    """
+    expenses = [
+        (crud_rollups.user_object_id(fields['user']), fields['category'], fields['date'], sign * fields['amount'])
+        for fields, sign in changes
+        if fields.get('type') == 'expense' and fields.get('category') and fields.get('date') is not None
+    ]
+    if not expenses:
+        return 0
+
+    budgets: Dict[Tuple[ObjectId, str], List[dict]] = defaultdict(list)
+    for budget in Budget.objects(user__in=list({user for user, _, _, _ in expenses}),
+                                 category__in=list({category for _, category, _, _ in expenses})).as_pymongo():
+        budgets[(budget['user'], budget['category'])].append(budget)
+
+    deltas: Dict[SpendKey, float] = defaultdict(float)
+    for user, category, date, amount in expenses:
+        for budget in budgets.get((user, category), []):
+            deltas[(user, category, budget['period'], period_key(budget['period'], date))] += amount
+
+    operations = [
+        UpdateOne({'user': user, 'category': category, 'period': period, 'period_key': key},
+                  {'$inc': {'spent': amount}}, upsert=True)
+        for (user, category, period, key), amount in deltas.items()
+        if amount
+    ]
+    if not operations:
+        return 0
+    BudgetSpend._get_collection().bulk_write(operations, ordered=False)
+    _detect_over_budget(budgets, deltas)
+    return len(operations)
+
+
+def _detect_over_budget(budgets: Dict[Tuple[ObjectId, str], List[dict]], deltas: Dict[SpendKey, float]) -> None:
+    counters = BudgetSpend._get_collection().find({'$or': [
+        {'user': user, 'category': category, 'period': period, 'period_key': key}
+        for user, category, period, key in deltas
+    ]})
+    for counter in counters:
+        for budget in budgets[(counter['user'], counter['category'])]:
+            if budget['period'] != counter['period']:
+                continue
+            exceeded = counter['spent'] > budget['limit']
+            flagged = budget.get('over_budget_period') == counter['period_key']
+            if exceeded and not flagged:
+                Budget.objects(id=budget['_id']).update_one(set__over_budget_period=counter['period_key'])
+                logger.warning("Budget %s exceeded in %s: %s spent of %s.",
+                               budget['_id'], counter['period_key'], counter['spent'], budget['limit'])
+            elif flagged and not exceeded:
+                Budget.objects(id=budget['_id']).update_one(unset__over_budget_period=True)
@@ -0,0 +1,196 @@
+from app.schemas.category import CategoryRule, CategoryRuleCreate, RecategorizeResult
+from typing import List
+from pymongo import UpdateOne
+from app.models.category_rule import CategoryRule as CategoryRuleDocument
+from app.models.transaction import Transaction
+from app.crud import crud_rollups
+from app.utils import logger, metrics
+from app.utils.cache import TTLCache
+from app.utils.config import get_settings
+from app.utils.categorizer import Categorizer, Rule, validate_rule
+from mongoengine.errors import ValidationError
+from fastapi import HTTPException, status
+import functools
+
+logger = logger.setup_logger(__name__)
+
+RECATEGORIZE_BATCH_SIZE = 5000
+
+
+@functools.lru_cache(maxsize=None)
+def get_categorizer_cache() -> TTLCache[Categorizer]:
+    settings = get_settings()
+    return TTLCache(maxsize=settings.categorizer_cache_size, ttl=settings.categorizer_cache_ttl_seconds)
+
+
+metrics.register_cache("categorizer", get_categorizer_cache)
+
+
+def _to_schema(rule: dict) -> CategoryRule:
+    return CategoryRule(
+        id=str(rule['_id']),
+        category=rule['category'],
+        pattern=rule['pattern'],
+        is_regex=rule.get('is_regex', False),
+        priority=rule.get('priority', 0)
+    )
+
+
+def _rule_documents(owner) -> List[dict]:
+    return list(CategoryRuleDocument.objects(user=owner).order_by('-priority', 'id').as_pymongo())
+
+
+def build_categorizer(user_id) -> Categorizer:
+    """
+    Compiles the user's rules, bypassing the cache.
+    """
+    return Categorizer(
+        Rule(rule['category'], rule['pattern'], rule.get('is_regex', False), rule.get('priority', 0))
+        for rule in _rule_documents(crud_rollups.user_object_id(user_id))
+    )
+
+
+def get_categorizer(user_id) -> Categorizer:
+    """
+    Returns the user's compiled rules, compiling them at most once per cache lifetime.
+    """
+    key = str(user_id)
+    categorizer = get_categorizer_cache().get(key)
+    if categorizer is None:
+        categorizer = build_categorizer(user_id)
+        get_categorizer_cache().set(key, categorizer)
+    return categorizer
+
+
+def get_rules(user_id) -> List[CategoryRule]:
+    return [_to_schema(rule) for rule in _rule_documents(crud_rollups.user_object_id(user_id))]
+
+
+def create_rule(user_id, rule: CategoryRuleCreate) -> CategoryRule:
+    """
+    Adds a categorization rule for the user.
+
+    Parameters:
+        user_id: The ID of the owner of the rule.
+        rule (CategoryRuleCreate): The category assigned and the keyword or regular expression matched.
+
+    Returns:
+        CategoryRule: The created rule.
+
+    Raises:
+        HTTPException: 400 error if the pattern can't be compiled.
+    """
+    try:
+        validate_rule(rule.pattern, rule.is_regex)
+    except ValueError as e:
+        logger.warning("Rejected category rule pattern %r: %s", rule.pattern, e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    db_rule = CategoryRuleDocument(user=crud_rollups.user_object_id(user_id), **rule.dict())
+    db_rule.save()
+    get_categorizer_cache().invalidate(str(user_id))
+    logger.info("Category rule %s created for user %s.", db_rule.id, user_id)
+    return _to_schema(db_rule.to_mongo().to_dict())
+
+
+def delete_rule(user_id, rule_id: str) -> bool:
+    try:
+        deleted = CategoryRuleDocument.objects(user=user_id, id=rule_id).delete()
+    except ValidationError as e:
+        logger.error("Validation error for category rule with id: %s: %s", rule_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid category rule id format"
+        )
+    if not deleted:
+        logger.info("Category rule with ID %s not found.", rule_id)
+        return False
+    get_categorizer_cache().invalidate(str(user_id))
+    logger.info("Category rule with ID %s has been deleted.", rule_id)
+    return True
+
+
+def categorize_documents(user_id, documents: List[dict]) -> int:
+    """
+    Fills in the category of the uncategorized transaction documents from the user's rules, in place.
+
+    Returns:
+        int: The number of documents categorized.
+    """
+    pending = [document for document in documents if not document.get('category')]
+    if not pending:
+        return 0
+    categorizer = get_categorizer(user_id)
+    if not len(categorizer):
+        return 0
+
+    categorized = 0
+    for document, category in zip(pending, categorizer.categorize_many(document.get('description') for document in pending)):
+        if category is not None:
+            document['category'] = category
+            categorized += 1
+    return categorized
+
+
+def recategorize_transactions(user_id, overwrite: bool = False,
+                              batch_size: int = RECATEGORIZE_BATCH_SIZE) -> RecategorizeResult:
+    """
+    Applies the user's current rules to their stored transactions, one bulk write per batch.
+    Category changes go through the transaction write hook so budget spend follows them.
+
+    Parameters:
+        user_id: The ID of the owner of the transactions.
+        overwrite (bool): Also replace existing categories when a rule matches. By default only
+            uncategorized transactions are considered.
+        batch_size (int): The number of transactions categorized and written together.
+
+    Returns:
+        RecategorizeResult: The number of transactions scanned and updated.
+    """
+    owner = crud_rollups.user_object_id(user_id)
+    categorizer = build_categorizer(owner)
+    get_categorizer_cache().set(str(user_id), categorizer)
+    result = RecategorizeResult()
+    if not len(categorizer):
+        return result
+
+    query = {'user': owner}
+    if not overwrite:
+        query['category'] = None
+    cursor = Transaction._get_collection().find(
+        query, {'user': 1, 'type': 1, 'amount': 1, 'date': 1, 'description': 1, 'category': 1}
+    ).sort('_id', 1).batch_size(batch_size)
+
+    batch: List[dict] = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) == batch_size:
+            result.updated += _recategorize_batch(categorizer, batch)
+            result.scanned += len(batch)
+            batch = []
+    if batch:
+        result.updated += _recategorize_batch(categorizer, batch)
+        result.scanned += len(batch)
+
+    logger.info("Recategorized %s of %s transactions of user %s.", result.updated, result.scanned, user_id)
+    return result
+
+
+def _recategorize_batch(categorizer: Categorizer, documents: List[dict]) -> int:
+    # Imported here as crud_transactions itself categorizes imports through this module.
+    from app.crud import crud_transactions
+
+    changes, operations = [], []
+    for document, category in zip(documents, categorizer.categorize_many(document.get('description') for document in documents)):
+        if category is None or category == document.get('category'):
+            continue
+        operations.append(UpdateOne({'_id': document['_id']}, {'$set': {'category': category}}))
+        changes.append((document, -1))
+        changes.append(({**document, 'category': category}, 1))
+    if operations:
+        Transaction._get_collection().bulk_write(operations, ordered=False)
+        crud_transactions._record_changes(changes)
+    return len(operations)
@@ -0,0 +1,78 @@
+from typing import Iterable, List, Set, Tuple
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.models.export import ExportPartition
+from app.models.rollup import MonthlyRollup
+from app.crud import crud_rollups
+from app.utils import logger
+
+logger = logger.setup_logger(__name__)
+
+
+def mark_changes(changes: Iterable[Tuple[dict, int]]) -> int:
+    """
+    Bumps the version of the (user, month) export partitions touched by transaction writes,
+    one bulk write per batch of changes.
+
+    Returns:
+        int: The number of partitions marked.
+    """
+    partitions: Set[Tuple[ObjectId, str]] = {
+        (crud_rollups.user_object_id(fields['user']), crud_rollups.month_key(fields['date']))
+        for fields, _ in changes
+        if fields.get('date') is not None
+    }
+    if not partitions:
+        return 0
+    ExportPartition._get_collection().bulk_write([
+        UpdateOne({'user': user, 'month': month}, {'$inc': {'version': 1}}, upsert=True)
+        for user, month in partitions
+    ], ordered=False)
+    return len(partitions)
+
+
+def track_existing_partitions() -> int:
+    """
+    Registers the partitions holding transactions written before export tracking existed,
+    read from the monthly rollups, so the first export covers them.
+
+    Returns:
+        int: The number of partitions registered.
+    """
+    tracked = {
+        (partition['user'], partition['month'])
+        for partition in ExportPartition.objects.only('user', 'month').as_pymongo()
+    }
+    partitions = {
+        (rollup['user'], rollup['month'])
+        for rollup in MonthlyRollup.objects.only('user', 'month').as_pymongo()
+    } - tracked
+    if not partitions:
+        return 0
+    result = ExportPartition._get_collection().bulk_write([
+        UpdateOne({'user': user, 'month': month}, {'$setOnInsert': {'version': 1, 'exported_version': 0}}, upsert=True)
+        for user, month in partitions
+    ], ordered=False)
+    return result.upserted_count
+
+
+def get_stale_partitions() -> List[dict]:
+    """
+    Returns the partitions written to since their last export, each with the version to export.
+    """
+    return list(ExportPartition._get_collection().find(
+        {'$expr': {'$gt': ['$version', {'$ifNull': ['$exported_version', 0]}]}},
+        {'user': 1, 'month': 1, 'version': 1}
+    ).sort([('user', 1), ('month', 1)]))
+
+
+def mark_exported(partition: dict, exported_at: datetime) -> None:
+    """
+    Advances the watermark of a partition to the version read before exporting it. Writes made
+    during the export raised the version further, so the partition stays stale for the next run.
+    """
+    ExportPartition._get_collection().update_one(
+        {'_id': partition['_id']},
+        {'$max': {'exported_version': partition['version']}, '$set': {'exported_at': exported_at}}
+    )
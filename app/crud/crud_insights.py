@@ -0,0 +1,112 @@
+from app.schemas.report import Insights, RollingSpend, MonthOverMonth, CategoryShare, ForecastPoint
+from typing import Optional
+from datetime import datetime
+import math
+import numpy as np
+from app.analytics import insights
+from app.analytics.insights import TransactionArrays
+from app.models.transaction import Transaction
+from app.crud import crud_rollups
+from app.utils import logger
+
+logger = logger.setup_logger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def load_transaction_arrays(user_id, until: datetime) -> TransactionArrays:
+    """
+    Reads the transactions of a user dated up to until into contiguous arrays, in date order over the
+    (user, date, id) index. The server groups them into one document of columns per month, with dates
+    as milliseconds since the epoch, so the client decodes a few arrays per month instead of a
+    document per transaction.
+    """
+    groups = Transaction._get_collection().aggregate([
+        {'$match': {'user': crud_rollups.user_object_id(user_id), 'date': {'$lte': until}}},
+        {'$sort': {'date': 1, '_id': 1}},
+        {'$group': {
+            '_id': {'$dateToString': {'format': '%Y-%m', 'date': '$date'}},
+            'dates': {'$push': {'$subtract': ['$date', EPOCH]}},
+            'amounts': {'$push': '$amount'},
+            'is_income': {'$push': {'$eq': ['$type', 'income']}},
+            'categories': {'$push': {'$ifNull': ['$category', None]}},
+        }},
+        {'$sort': {'_id': 1}},
+    ])
+    dates, amounts, is_income, categories = [], [], [], []
+    for group in groups:
+        dates.extend(group['dates'])
+        amounts.extend(group['amounts'])
+        is_income.extend(group['is_income'])
+        categories.extend(group['categories'])
+    return insights.from_columns(dates, amounts, is_income, categories)
+
+
+def _day(day: int) -> str:
+    return str(np.datetime64(day, 'D'))
+
+
+def _month(month: int) -> str:
+    return str(np.datetime64(month, 'M'))
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+def get_insights(user_id, as_of: Optional[datetime] = None, window_days: int = 30, months: int = 12,
+                 lookback_days: int = 90, forecast_days: int = 30) -> Insights:
+    """
+    Computes the spending insights of a user from their transactions up to as_of.
+
+    Parameters:
+        user_id: The ID of the user.
+        as_of (Optional[datetime]): The end of the analysed history, now by default.
+        window_days (int): The window of the rolling spend and of the category shares, also the
+            number of days of rolling spend returned.
+        months (int): The number of most recent months compared month over month.
+        lookback_days (int): The number of days the cash flow forecast is fitted on.
+        forecast_days (int): The number of days forecast.
+
+    Returns:
+        Insights: The rolling spend, month-over-month totals, category shares and balance forecast.
+    """
+    as_of = as_of or datetime.utcnow()
+    arrays = load_transaction_arrays(user_id, as_of)
+    last_day = int(np.datetime64(as_of, 'ms').astype(np.int64) // insights.MS_PER_DAY)
+
+    rolling = insights.rolling_spend(arrays, last_day, days=window_days, window=window_days)
+    first_month, income, expense = insights.monthly_totals(arrays)
+    income_change = insights.relative_change(income)
+    expense_change = insights.relative_change(expense)
+    spend, share = insights.category_share(arrays, last_day - window_days + 1, last_day)
+    balance = insights.balance(arrays)
+    daily_net, projected = insights.forecast(arrays, last_day, lookback_days, forecast_days, starting_balance=balance)
+
+    categories = [None] + arrays.categories
+    return Insights(
+        user_id=str(user_id),
+        as_of=as_of,
+        window_days=window_days,
+        balance=balance,
+        rolling_spend=[
+            RollingSpend(day=_day(last_day - window_days + 1 + offset), spend=float(value))
+            for offset, value in enumerate(rolling)
+        ],
+        month_over_month=[
+            MonthOverMonth(month=_month(first_month + offset), income=float(income[offset]),
+                           expense=float(expense[offset]), net=float(income[offset] - expense[offset]),
+                           income_change=_optional(income_change[offset]),
+                           expense_change=_optional(expense_change[offset]))
+            for offset in range(max(0, len(income) - months), len(income))
+        ],
+        category_share=[
+            CategoryShare(category=categories[code], spend=float(spend[code]), share=float(share[code]))
+            for code in np.argsort(-spend, kind='stable') if spend[code]
+        ],
+        daily_net=daily_net,
+        forecast=[
+            ForecastPoint(day=_day(last_day + 1 + offset), balance=float(value))
+            for offset, value in enumerate(projected)
+        ]
+    )
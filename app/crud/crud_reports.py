@@ -0,0 +1,93 @@
+from app.schemas.report import ReportBucket, ReportSummary, Period
+from typing import List, Optional
+from datetime import datetime
+from app.models.transaction import Transaction
+from app.utils import logger
+
+logger = logger.setup_logger(__name__)
+
+PERIOD_FORMATS = {
+    'day': '%Y-%m-%d',
+    'week': '%G-W%V',
+    'month': '%Y-%m',
+}
+
+
+def build_summary_pipeline(period: Period) -> List[dict]:
+    """
+    Builds the aggregation pipeline grouping transactions by user and period,
+    with income and expense summed side by side in each bucket.
+
+    Parameters:
+        period (Period): The bucket granularity, one of 'day', 'week' (ISO week) or 'month'.
+
+    Returns:
+        List[dict]: The pipeline stages following the $match stage.
+    """
+    return [
+        {'$group': {
+            '_id': {
+                'user': '$user',
+                'period': {'$dateToString': {'format': PERIOD_FORMATS[period], 'date': '$date'}},
+            },
+            'income': {'$sum': {'$cond': [{'$eq': ['$type', 'income']}, '$amount', 0]}},
+            'expense': {'$sum': {'$cond': [{'$eq': ['$type', 'expense']}, '$amount', 0]}},
+            'count': {'$sum': 1},
+        }},
+        {'$sort': {'_id.user': 1, '_id.period': 1}},
+    ]
+
+
+def get_summary(period: Period = 'month', user_id=None, date_from: Optional[datetime] = None,
+                date_to: Optional[datetime] = None) -> ReportSummary:
+    """
+    Computes income, expense and net totals per user and period on the database server.
+    Only one document per bucket is transferred, and running balances are accumulated
+    over those buckets, so the Python-side cost does not grow with the number of transactions.
+
+    Parameters:
+        period (Period): The bucket granularity, one of 'day', 'week' or 'month'.
+        user_id: Restricts the report to a single user, None to report on every user.
+        date_from (Optional[datetime]): Inclusive lower bound of the transaction date.
+        date_to (Optional[datetime]): Inclusive upper bound of the transaction date.
+
+    Returns:
+        ReportSummary: The overall totals and the buckets ordered by user and period.
+    """
+    filters = {'date__ne': None}
+    if user_id is not None:
+        filters['user'] = user_id
+    if date_from is not None:
+        filters['date__gte'] = date_from
+    if date_to is not None:
+        filters['date__lte'] = date_to
+
+    buckets = []
+    running_balance = 0.0
+    current_user = None
+    for row in Transaction.objects(**filters).aggregate(build_summary_pipeline(period)):
+        if row['_id']['user'] != current_user:
+            current_user = row['_id']['user']
+            running_balance = 0.0
+        net = row['income'] - row['expense']
+        running_balance += net
+        buckets.append(ReportBucket(
+            user_id=str(current_user),
+            period=row['_id']['period'],
+            income=row['income'],
+            expense=row['expense'],
+            net=net,
+            running_balance=running_balance,
+            count=row['count']
+        ))
+
+    total_income = sum(bucket.income for bucket in buckets)
+    total_expense = sum(bucket.expense for bucket in buckets)
+    logger.info("Summary report computed with %s buckets.", len(buckets))
+    return ReportSummary(
+        period=period,
+        total_income=total_income,
+        total_expense=total_expense,
+        net=total_income - total_expense,
+        buckets=buckets
+    )
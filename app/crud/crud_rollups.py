@@ -0,0 +1,209 @@
+from app.schemas.report import MonthlyTotals, Balance, Dashboard, RollupDrift
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.models.rollup import MonthlyRollup
+from app.models.transaction import Transaction
+from app.utils import logger
+
+logger = logger.setup_logger(__name__)
+
+DRIFT_TOLERANCE = 1e-6
+
+RollupKey = Tuple[ObjectId, str, str]
+
+
+def naive_utc(date: datetime) -> datetime:
+    """
+    Converts an offset-aware datetime to the naive UTC datetime MongoDB stores and returns, leaving naive ones as is.
+    """
+    if date.tzinfo is None:
+        return date
+    return date.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def month_key(date: datetime) -> str:
+    # The month of the stored UTC date, as bucketed by $dateToString in rebuild_rollups.
+    return naive_utc(date).strftime('%Y-%m')
+
+
+def user_object_id(user) -> ObjectId:
+    """
+    Normalizes a User document, ObjectId or string ID into the ObjectId stored on transactions.
+    """
+    if hasattr(user, 'id'):
+        return user.id
+    return user if isinstance(user, ObjectId) else ObjectId(str(user))
+
+
+def apply_changes(changes: Iterable[Tuple[dict, int]]) -> int:
+    """
+    Applies transaction writes to the monthly rollups with atomic $inc upserts.
+    Changes hitting the same (user, month, type) are merged first and net-zero
+    changes are dropped, so a batch costs one bulk write of at most one update per rollup.
+
+    Parameters:
+        changes (Iterable[Tuple[dict, int]]): Pairs of transaction fields (user, type, amount, date)
+            and a sign, +1 when the transaction was added and -1 when it was removed.
+
+    Returns:
+        int: The number of rollup documents touched.
+    """
+    deltas: Dict[RollupKey, List[float]] = defaultdict(lambda: [0.0, 0])
+    for fields, sign in changes:
+        if fields.get('date') is None:
+            continue
+        delta = deltas[(user_object_id(fields['user']), month_key(fields['date']), fields['type'])]
+        delta[0] += sign * fields['amount']
+        delta[1] += sign
+
+    operations = [
+        UpdateOne(
+            {'user': user, 'month': month, 'type': transaction_type},
+            {'$inc': {'total': total, 'count': count}},
+            upsert=True
+        )
+        for (user, month, transaction_type), (total, count) in deltas.items()
+        if total or count
+    ]
+    if operations:
+        MonthlyRollup._get_collection().bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def get_monthly_totals(user_id, month_from: Optional[str] = None, month_to: Optional[str] = None) -> List[MonthlyTotals]:
+    """
+    Reads a user's income and expense totals per month from the rollups.
+
+    Parameters:
+        user_id: The ID of the user.
+        month_from (Optional[str]): Inclusive first month, formatted YYYY-MM.
+        month_to (Optional[str]): Inclusive last month, formatted YYYY-MM.
+
+    Returns:
+        List[MonthlyTotals]: One entry per month with activity, ordered by month.
+    """
+    filters = {'user': user_id}
+    if month_from is not None:
+        filters['month__gte'] = month_from
+    if month_to is not None:
+        filters['month__lte'] = month_to
+
+    months: Dict[str, Dict[str, float]] = defaultdict(lambda: {'income': 0.0, 'expense': 0.0})
+    for rollup in MonthlyRollup.objects(**filters).only('month', 'type', 'total').as_pymongo():
+        months[rollup['month']][rollup['type']] += rollup['total']
+
+    return [
+        MonthlyTotals(month=month, income=totals['income'], expense=totals['expense'],
+                      net=totals['income'] - totals['expense'])
+        for month, totals in sorted(months.items())
+    ]
+
+
+def get_balance(user_id) -> Balance:
+    """
+    Computes a user's all-time income, expense and balance from the rollups.
+    """
+    return _balance_from_months(user_id, get_monthly_totals(user_id))
+
+
+def get_dashboard(user_id, months: int = 12) -> Dashboard:
+    """
+    Builds the dashboard of a user: the all-time balance and the totals of the most recent months.
+
+    Parameters:
+        user_id: The ID of the user.
+        months (int): The number of most recent months with activity to include.
+
+    Returns:
+        Dashboard: The balance and the monthly totals, oldest first.
+    """
+    monthly_totals = get_monthly_totals(user_id)
+    balance = _balance_from_months(user_id, monthly_totals)
+    return Dashboard(**balance.dict(), months=monthly_totals[-months:])
+
+
+def _balance_from_months(user_id, monthly_totals: List[MonthlyTotals]) -> Balance:
+    total_income = sum(totals.income for totals in monthly_totals)
+    total_expense = sum(totals.expense for totals in monthly_totals)
+    return Balance(user_id=str(user_id), total_income=total_income, total_expense=total_expense,
+                   balance=total_income - total_expense)
+
+
+def compute_rollups_from_transactions() -> Dict[RollupKey, Tuple[float, int]]:
+    """
+    Recomputes every rollup from the raw transactions with a single aggregation.
+
+    Returns:
+        Dict[RollupKey, Tuple[float, int]]: The total and count per (user, month, type).
+    """
+    pipeline = [
+        {'$group': {
+            '_id': {
+                'user': '$user',
+                'month': {'$dateToString': {'format': '%Y-%m', 'date': '$date'}},
+                'type': '$type',
+            },
+            'total': {'$sum': '$amount'},
+            'count': {'$sum': 1},
+        }},
+    ]
+    return {
+        (row['_id']['user'], row['_id']['month'], row['_id']['type']): (row['total'], row['count'])
+        for row in Transaction.objects(date__ne=None).aggregate(pipeline)
+    }
+
+
+def verify_rollups() -> List[RollupDrift]:
+    """
+    Compares the stored rollups with totals recomputed from the raw transactions.
+
+    Returns:
+        List[RollupDrift]: Every rollup whose total or count differs, including missing and orphaned ones.
+    """
+    expected = compute_rollups_from_transactions()
+    actual = {
+        (rollup['user'], rollup['month'], rollup['type']): (rollup['total'], rollup['count'])
+        for rollup in MonthlyRollup.objects().as_pymongo()
+    }
+
+    drifts = []
+    for key in expected.keys() | actual.keys():
+        expected_total, expected_count = expected.get(key, (0.0, 0))
+        actual_total, actual_count = actual.get(key, (0.0, 0))
+        if expected_count != actual_count or \
+                abs(expected_total - actual_total) > DRIFT_TOLERANCE * max(1.0, abs(expected_total)):
+            user, month, transaction_type = key
+            drifts.append(RollupDrift(
+                user_id=str(user), month=month, type=transaction_type,
+                expected_total=expected_total, actual_total=actual_total,
+                expected_count=expected_count, actual_count=actual_count
+            ))
+
+    if drifts:
+        logger.warning("Found %s drifted monthly rollups.", len(drifts))
+    else:
+        logger.info("Monthly rollups match the transactions.")
+    return drifts
+
+
+def rebuild_rollups() -> int:
+    """
+    Replaces every rollup with totals recomputed from the raw transactions.
+    Transactions written while the rebuild runs may be missed; run verify_rollups afterwards.
+
+    Returns:
+        int: The number of rollups written.
+    """
+    expected = compute_rollups_from_transactions()
+    collection = MonthlyRollup._get_collection()
+    collection.delete_many({})
+    if expected:
+        collection.insert_many([
+            {'user': user, 'month': month, 'type': transaction_type, 'total': total, 'count': count}
+            for (user, month, transaction_type), (total, count) in expected.items()
+        ])
+    logger.info("Rebuilt %s monthly rollups.", len(expected))
+    return len(expected)
@@ -1,90 +1,491 @@
 from app.schemas.user import UserCreate, UserBase, UserInDB
-from app.schemas.transaction import Transaction, TransactionCreate, TransactionBase
-from typing import List, Optional
+from app.schemas.transaction import Transaction, TransactionCreate, TransactionBase, BulkImportResult, BulkRowError
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from itertools import islice
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
 from app.models.user import User
 from app.models.transaction import Transaction
-from app.utils import security, logger
+from app.crud import crud_rollups, crud_balances, crud_budgets, crud_categories, crud_exports
+from app.crud.projection import schema_fields, build_model
+from app.utils import security, logger, versions
 from mongoengine.errors import NotUniqueError, ValidationError, DoesNotExist
+from mongoengine.queryset.visitor import Q
 from fastapi import HTTPException, status
+from pydantic import ValidationError as SchemaValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import base64
+import hashlib
+import binascii
+import json
 
-logger = logger.setup_logger()
+logger = logger.setup_logger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+BULK_CHUNK_SIZE = 1000
+MAX_BULK_CHUNK_SIZE = 10000
+DUPLICATE_KEY_ERROR = 11000
+
+TRANSACTION_FIELDS = schema_fields(TransactionBase)
+
+
+def encode_cursor(date: Optional[datetime], transaction_id: ObjectId) -> str:
+    """
+    Encodes the (date, _id) sort key of the last returned transaction into an opaque cursor.
+    """
+    payload = {"d": date.isoformat() if date else None, "id": str(transaction_id)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        date = datetime.fromisoformat(payload["d"]) if payload["d"] else None
+        return date, ObjectId(payload["id"])
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _after_cursor(cursor: str) -> Q:
+    """
+    Builds the keyset filter selecting every transaction sorted after the cursor on (date, _id).
+    Transactions without a date sort first in MongoDB, so they are handled separately.
+    """
+    date, transaction_id = decode_cursor(cursor)
+    if date is None:
+        return Q(date=None, id__gt=transaction_id) | Q(date__ne=None)
+    return Q(date__gt=date) | Q(date=date, id__gt=transaction_id)
+
+
+def _paginate(queryset, limit: int, after: Optional[str] = None) -> Tuple[List[TransactionBase], Optional[str]]:
+    """
+    Reads a single keyset page from the queryset ordered by (date, _id).
+    One extra row is fetched to find out whether another page follows.
+    """
+    if after:
+        queryset = queryset.filter(_after_cursor(after))
+
+    rows = list(queryset.order_by('date', 'id').only(*TRANSACTION_FIELDS).as_pymongo().limit(limit + 1))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor(rows[-1].get('date'), rows[-1]['_id']) if has_more else None
+    items = [build_model(TransactionBase, row) for row in rows]
+    return items, next_cursor
+
+
+def get_transactions_page(limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None) -> Tuple[List[TransactionBase], Optional[str]]:
+    """
+    Retrieves one page of transactions using keyset pagination on (date, _id).
+
+    Parameters:
+        limit (int): Maximum number of transactions in the page.
+        after (Optional[str]): Cursor returned with the previous page, None for the first page.
+
+    Returns:
+        Tuple[List[TransactionBase], Optional[str]]: The transactions and the cursor of the next page,
+        None when this is the last page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    return _paginate(Transaction.objects(), limit=limit, after=after)
+
+
+def get_user_transactions(user_id, date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                          transaction_type: Optional[str] = None, min_amount: Optional[float] = None,
+                          max_amount: Optional[float] = None, limit: int = DEFAULT_PAGE_SIZE,
+                          after: Optional[str] = None) -> Tuple[List[TransactionBase], Optional[str]]:
+    """
+    Retrieves one page of a user's transactions matching the given filters.
+    The equality filters (user, type) come first and the date range last so the
+    (user, date) and (user, type, date) compound indexes serve both the filter and the sort.
+
+    Parameters:
+        user_id: The ID of the owner of the transactions.
+        date_from (Optional[datetime]): Inclusive lower bound of the transaction date.
+        date_to (Optional[datetime]): Inclusive upper bound of the transaction date.
+        transaction_type (Optional[str]): Either 'income' or 'expense'.
+        min_amount (Optional[float]): Inclusive lower bound of the amount.
+        max_amount (Optional[float]): Inclusive upper bound of the amount.
+        limit (int): Maximum number of transactions in the page.
+        after (Optional[str]): Cursor returned with the previous page, None for the first page.
+
+    Returns:
+        Tuple[List[TransactionBase], Optional[str]]: The transactions and the cursor of the next page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    filters = {'user': user_id}
+    if transaction_type is not None:
+        filters['type'] = transaction_type
+    if date_from is not None:
+        filters['date__gte'] = date_from
+    if date_to is not None:
+        filters['date__lte'] = date_to
+    if min_amount is not None:
+        filters['amount__gte'] = min_amount
+    if max_amount is not None:
+        filters['amount__lte'] = max_amount
+
+    return _paginate(Transaction.objects(**filters), limit=limit, after=after)
+
+
+def iter_transaction_batches(batch_size: int = STREAM_BATCH_SIZE) -> Iterator[List[TransactionBase]]:
+    """
+    Lazily yields every transaction in batches, one keyset query per batch,
+    so only a single batch is held in memory at a time.
+    """
+    after = None
+    while True:
+        items, after = get_transactions_page(limit=batch_size, after=after)
+        if items:
+            yield items
+        if after is None:
+            return
 
 
 def get_all_transactions() -> List[TransactionBase]:
     try:
-        transactions = Transaction.objects().all()
-        return [TransactionBase(**transaction.to_mongo().to_dict()) for transaction in transactions]
+        rows = Transaction.objects().only(*TRANSACTION_FIELDS).as_pymongo()
+        return [build_model(TransactionBase, row) for row in rows]
     except Exception as e:
-        logger.error(f"Error retrieving users: {e}")
+        logger.error("Error retrieving users: %s", e)
+
 
+def _by_id(transaction_id, user_id=None) -> dict:
+    """
+    Filters a transaction by ID and, when user_id is given, by owner, so other users' transactions are not found.
+    """
+    filters = {'id': transaction_id}
+    if user_id is not None:
+        filters['user'] = crud_rollups.user_object_id(user_id)
+    return filters
 
-def get_transaction_by_id(transaction_id) -> Optional[TransactionBase]:
+
+def get_transaction_by_id(transaction_id, user_id=None) -> Optional[TransactionBase]:
+    """
+    Retrieves a transaction, None if it does not exist or, when user_id is given, is owned by another user.
+    """
     try:
-        db_transaction = Transaction.objects(id=transaction_id).first()
-        if db_transaction:
-            return TransactionBase(**db_transaction.to_mongo().to_dict())
+        row = Transaction.objects(**_by_id(transaction_id, user_id)).only(*TRANSACTION_FIELDS).as_pymongo().first()
+        if row:
+            return build_model(TransactionBase, row)
         else:
-            logger.info(f"Transaction not found with ID {transaction_id}")
+            logger.info("Transaction not found with ID %s", transaction_id)
             return None
 
     except ValidationError as e:
-        logger.error(f"Error validating while retrieving transaction with ID {transaction_id}: {e}")
+        logger.error("Error validating while retrieving transaction with ID %s: %s", transaction_id, e)
 
     except Exception as e:
-        logger.error(f"Error retrieving transaction by id {transaction_id}: {e}")
+        logger.error("Error retrieving transaction by id %s: %s", transaction_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error while retrieving the transaction."
         )
 
 
-def delete_transaction_by_id(transaction_id: int) -> TransactionBase | bool:
+def _record_changes(changes: List[Tuple[dict, int]]) -> None:
+    """
+    Propagates transaction writes to the collections derived from them, then bumps the data versions
+    of the users. The bump comes last: a report read under the new ETag must already see the derived
+    data, or its stale body would be cached under that ETag.
+
+    Parameters:
+        changes (List[Tuple[dict, int]]): Pairs of transaction fields and +1 for an added
+            transaction or -1 for a removed one. An update is a removal followed by an addition.
+    """
+    try:
+        crud_rollups.apply_changes(changes)
+    except Exception as e:
+        logger.error("Error updating monthly rollups, run the rollup verification: %s", e)
+
     try:
-        transaction_to_delete = get_transaction_by_id(transaction_id=transaction_id)
-        if not transaction_to_delete:
-            logger.warning(f"No transaction found")
+        crud_balances.invalidate_checkpoints(changes)
+    except Exception as e:
+        logger.error("Error invalidating balance checkpoints: %s", e)
+
+    try:
+        crud_budgets.apply_changes(changes)
+    except Exception as e:
+        logger.error("Error updating budget spend counters: %s", e)
+
+    try:
+        crud_exports.mark_changes(changes)
+    except Exception as e:
+        logger.error("Error marking export partitions, they are re-exported once written to again: %s", e)
+
+    versions.bump({fields['user'] for fields, _ in changes})
+
+
+def transaction_fields(transaction: TransactionCreate) -> dict:
+    """
+    The fields of a transaction as stored, with the date converted to naive UTC. MongoDB returns stored
+    dates as naive UTC, so the derived data updated from these fields sees the same dates as later reads.
+    """
+    fields = transaction.dict()
+    fields['date'] = crud_rollups.naive_utc(fields['date'])
+    return fields
+
+
+def create_transaction(user_id, transaction: TransactionCreate) -> TransactionBase:
+    """
+    Creates a new transaction owned by the given user.
+
+    Parameters:
+        user_id: The ID of the owner of the transaction.
+        transaction (TransactionCreate): The transaction data.
+
+    Returns:
+        TransactionBase: The created transaction.
+    """
+    try:
+        db_transaction = Transaction(user=crud_rollups.user_object_id(user_id), **transaction_fields(transaction))
+        db_transaction.save()
+        _record_changes([(db_transaction.to_mongo().to_dict(), 1)])
+        logger.info("Transaction with ID: %s created successfully.", db_transaction.id)
+        return TransactionBase(**db_transaction.to_mongo().to_dict())
+
+    except ValidationError as e:
+        logger.error("Validation error while creating transaction: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid transaction."
+        )
+
+
+def transaction_import_hash(fields: dict) -> str:
+    """
+    Digest of the (user, date, type, amount, description) identity of an imported transaction.
+    The unique index on it makes importing the same statement twice idempotent. Amounts are stored
+    unsigned, so the type tells a purchase from a refund of the same amount.
+    """
+    date = fields.get('date')
+    identity = "|".join([
+        str(fields['user']),
+        date.isoformat() if date else "",
+        fields['type'],
+        repr(float(fields['amount'])),
+        (fields.get('description') or "").strip().lower(),
+    ])
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def rehash_imported_transactions(batch_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    Recomputes the import hash of every imported transaction, so rows imported before a change to
+    transaction_import_hash are still recognized as duplicates.
+
+    Returns:
+        int: The number of transactions whose hash changed.
+    """
+    collection = Transaction._get_collection()
+    rows = collection.find({'import_hash': {'$ne': None}},
+                           {'user': 1, 'date': 1, 'type': 1, 'amount': 1, 'description': 1, 'import_hash': 1})
+    updated = 0
+    operations = []
+    for row in rows:
+        import_hash = transaction_import_hash(row)
+        if import_hash != row['import_hash']:
+            operations.append(UpdateOne({'_id': row['_id']}, {'$set': {'import_hash': import_hash}}))
+        if len(operations) == batch_size:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+    logger.info("Rehashed %s imported transactions.", updated)
+    return updated
+
+
+def import_transaction_rows(user_id, rows: List[Tuple[int, Any]], deduplicate: bool = False) -> BulkImportResult:
+    """
+    Validates a chunk of raw rows, categorizes the uncategorized ones from the user's rules and writes
+    the valid ones with a single unordered insert_many. Invalid rows and rows rejected by the server are reported individually without aborting the chunk.
+
+    Parameters:
+        user_id: The ID of the owner of the transactions.
+        rows (List[Tuple[int, Any]]): The row numbers in the request paired with the raw row data.
+        deduplicate (bool): Skip rows whose import hash was already imported, in this chunk or before.
+
+    Returns:
+        BulkImportResult: The number of inserted and duplicate rows and the errors of the failed ones.
+    """
+    owner = crud_rollups.user_object_id(user_id)
+    result = BulkImportResult()
+    row_numbers, documents = [], []
+    for row_number, row in rows:
+        try:
+            db_transaction = Transaction(user=owner, **transaction_fields(TransactionCreate(**row)))
+            db_transaction.validate()
+        except (SchemaValidationError, ValidationError, TypeError) as e:
+            result.errors.append(BulkRowError(row=row_number, error=str(e)))
+            continue
+        row_numbers.append(row_number)
+        documents.append(db_transaction.to_mongo().to_dict())
+
+    if deduplicate and documents:
+        documents, row_numbers, result.duplicates = _skip_imported(documents, row_numbers)
+
+    try:
+        crud_categories.categorize_documents(owner, documents)
+    except Exception as e:
+        logger.error("Error categorizing imported transactions, run the recategorization: %s", e)
+
+    failed_indexes = set()
+    if documents:
+        try:
+            Transaction._get_collection().insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get('writeErrors', []):
+                failed_indexes.add(write_error['index'])
+                if deduplicate and write_error.get('code') == DUPLICATE_KEY_ERROR:
+                    result.duplicates += 1
+                else:
+                    result.errors.append(BulkRowError(row=row_numbers[write_error['index']], error=write_error['errmsg']))
+
+    inserted = [document for index, document in enumerate(documents) if index not in failed_indexes]
+    _record_changes([(document, 1) for document in inserted])
+    result.inserted = len(inserted)
+    result.failed = len(result.errors)
+    return result
+
+
+def _skip_imported(documents: List[dict], row_numbers: List[int]) -> Tuple[List[dict], List[int], int]:
+    """
+    Stamps the import hash on each document and drops those already stored or repeated in the chunk,
+    using a single $in lookup on the import hash index.
+    """
+    for document in documents:
+        document['import_hash'] = transaction_import_hash(document)
+
+    seen = {
+        existing['import_hash'] for existing in Transaction._get_collection().find(
+            {'import_hash': {'$in': [document['import_hash'] for document in documents]}},
+            {'import_hash': 1, '_id': 0}
+        )
+    }
+    kept_documents, kept_row_numbers = [], []
+    for document, row_number in zip(documents, row_numbers):
+        if document['import_hash'] in seen:
+            continue
+        seen.add(document['import_hash'])
+        kept_documents.append(document)
+        kept_row_numbers.append(row_number)
+    return kept_documents, kept_row_numbers, len(documents) - len(kept_documents)
+
+
+def merge_import_results(total: BulkImportResult, chunk: BulkImportResult) -> BulkImportResult:
+    total.inserted += chunk.inserted
+    total.duplicates += chunk.duplicates
+    total.failed += chunk.failed
+    total.errors.extend(chunk.errors)
+    return total
+
+
+def bulk_create_transactions(user_id, rows: Iterable[Any], chunk_size: int = BULK_CHUNK_SIZE,
+                             deduplicate: bool = False) -> BulkImportResult:
+    """
+    Imports an iterable of raw rows in chunks of chunk_size, one insert_many round trip per chunk.
+    The iterable is consumed lazily, so only one chunk is held in memory at a time.
+
+    Parameters:
+        user_id: The ID of the owner of the transactions.
+        rows (Iterable[Any]): The raw rows, numbered from 0 in error reports.
+        chunk_size (int): The number of rows validated and inserted together.
+        deduplicate (bool): Skip rows that were already imported, see transaction_import_hash.
+
+    Returns:
+        BulkImportResult: The number of inserted rows and the per-row errors.
+    """
+    result = BulkImportResult()
+    numbered_rows = enumerate(rows)
+    while True:
+        chunk = list(islice(numbered_rows, chunk_size))
+        if not chunk:
+            break
+        merge_import_results(result, import_transaction_rows(user_id, chunk, deduplicate=deduplicate))
+
+    logger.info("Bulk import finished: %s inserted, %s duplicates, %s failed.",
+                result.inserted, result.duplicates, result.failed)
+    return result
+
+
+def delete_transaction_by_id(transaction_id: str, user_id=None) -> TransactionBase | bool:
+    """
+    Deletes a transaction, returning False if it does not exist or, when user_id is given, is owned by another user.
+    """
+    try:
+        deleted_transaction = Transaction.objects(**_by_id(transaction_id, user_id)).modify(remove=True)
+        if not deleted_transaction:
+            logger.warning("No transaction found")
             return False
 
-        transaction_to_delete.delete()
-        logger.info(f"Transaction with ID: {transaction_id} deleted successfully.")
-        return TransactionBase(**transaction_to_delete.to_mongo().to_dict())
+        fields = deleted_transaction.to_mongo().to_dict()
+        _record_changes([(fields, -1)])
+        logger.info("Transaction with ID: %s deleted successfully.", transaction_id)
+        return TransactionBase(**fields)
 
     except ValidationError as e:
-        logger.error(f"Validation error for transaction with id: {transaction_id}: {e}")
+        logger.error("Validation error for transaction with id: %s: %s", transaction_id, e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid transaction id format"
         )
     except Exception as e:
-        logger.error(f"Unexpected error occurred while deleting transaction with id: {transaction_id}: {e}")
+        logger.error("Unexpected error occurred while deleting transaction with id: %s: %s", transaction_id, e)
+
 
+def update_transaction(transaction_id: str, transaction_data: TransactionCreate, user_id=None) -> TransactionBase | bool:
+    """
+    Replaces the fields of a transaction.
 
-def update_transaction(transaction_id: int, transaction_data: TransactionCreate) -> TransactionBase | bool:
+    Raises:
+        HTTPException: 404 error if the transaction does not exist or, when user_id is given, is owned by another user.
+    """
     try:
-        transaction_to_update = get_transaction_by_id(transaction_id=transaction_id)
-        if not transaction_to_update:
+        fields = transaction_fields(transaction_data)
+        previous_transaction = Transaction.objects(**_by_id(transaction_id, user_id)).modify(
+            set__type=fields['type'],
+            set__amount=fields['amount'],
+            set__description=fields['description'],
+            set__date=fields['date'],
+            set__category=fields['category']
+        )
+        if not previous_transaction:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transaction not found"
             )
 
-        transaction_to_update.update(
-            amount = transaction_data.amount,
-            description=transaction_data.description,
-            date=transaction_data.date
-        )
+        previous_fields = previous_transaction.to_mongo().to_dict()
+        updated_fields = {**previous_fields, **fields}
+        _record_changes([(previous_fields, -1), (updated_fields, 1)])
 
-        logger.info(f"Transaction updated successfully.")
-        return TransactionBase(**transaction_to_update.to_mongo().to_dict())
+        logger.info("Transaction updated successfully.")
+        return TransactionBase(**updated_fields)
 
+    except HTTPException:
+        raise
     except ValidationError as e:
-        logger.error(f"Validation Error: {e}")
+        logger.error("Validation Error: %s", e)
         raise e
     except NotUniqueError as e:
-        logger.error(f"Unique Constraint Error: {e}")
+        logger.error("Unique Constraint Error: %s", e)
         raise e
 
     except Exception as e:
-        logger.error(f"Unexpected error occurred while updating transaction with id: {transaction_id}: {e}")
+        logger.error("Unexpected error occurred while updating transaction with id: %s: %s", transaction_id, e)
 
-    return False
\ No newline at end of file
+    return False
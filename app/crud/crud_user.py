@@ -1,11 +1,15 @@
 from app.schemas.user import UserCreate, UserBase, UserInDB
 from typing import List, Optional
 from app.models.user import User
+from app.crud.projection import schema_fields, build_model
 from app.utils import security, logger
+from app.utils.password_pool import PasswordPoolSaturated
 from mongoengine.errors import NotUniqueError, ValidationError, DoesNotExist
 from fastapi import HTTPException, status
 
-logger = logger.setup_logger()
+logger = logger.setup_logger(__name__)
+
+USER_FIELDS = schema_fields(UserBase)
 
 
 def create_user(user: UserCreate) -> UserBase | None:
@@ -18,20 +22,24 @@ def create_user(user: UserCreate) -> UserBase | None:
     Returns:
         UserBase: The created user's public information or None if creation failed.
 
+    Raises:
+        PasswordPoolSaturated: If too many password hashing calls are already queued.
     """
 
     try:
         hashed_pwd = security.hash_plain_password(user.password)
         db_user = User(username=user.username, email=user.email, hashed_password=hashed_pwd)
         db_user.save()
-        logger.info(f"User {user.username} created successfully.")
+        logger.info("User %s created successfully.", user.username)
         return UserBase(username=user.username, email=user.email)
     except NotUniqueError as e:
-        logger.error(f"Attempt to create a duplicate user {user.username}: {e}")
+        logger.error("Attempt to create a duplicate user %s: %s", user.username, e)
     except ValidationError as e:
-        logger.error(f"Validation error while creating user {user.username}: {e}")
+        logger.error("Validation error while creating user %s: %s", user.username, e)
+    except PasswordPoolSaturated:
+        raise
     except Exception as e:
-        logger.error(f"Unexpected error while creating user {user.username}: {e}")
+        logger.error("Unexpected error while creating user %s: %s", user.username, e)
 
     return None
 
@@ -42,23 +50,23 @@ def get_all_users() -> List[UserBase]:
     Returns a list of UserBase objects representing the users.
     """
     try:
-        users = User.objects.all()
-        return [UserBase(**user.to_mongo().to_dict()) for user in users]
+        rows = User.objects.only(*USER_FIELDS).as_pymongo()
+        return [build_model(UserBase, row) for row in rows]
     except Exception as e:
-        logger.error(f"Error retrieving users: {e}")
+        logger.error("Error retrieving users: %s", e)
 
 
 def get_user_by_username(username: str) -> UserBase | None:
     try:
-        db_user = User.objects(username=username).first()
-        if db_user:
-            return UserBase(**db_user.to_mongo().to_dict())
+        row = User.objects(username=username).only(*USER_FIELDS).as_pymongo().first()
+        if row:
+            return build_model(UserBase, row)
         else:
-            logger.info(f"User not found: {username}")
+            logger.info("User not found: %s", username)
             return None
 
     except Exception as e:
-        logger.error(f"Error retrieving user by username {username}: {e}")
+        logger.error("Error retrieving user by username %s: %s", username, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while retrieving the user."
@@ -67,15 +75,15 @@ def get_user_by_username(username: str) -> UserBase | None:
 
 def get_user_by_id(user_id: int) -> UserBase | None:
     try:
-        db_user = User.objects(id=user_id).first()
-        if db_user:
-            return UserBase(**db_user.to_mongo().to_dict())
+        row = User.objects(id=user_id).only(*USER_FIELDS).as_pymongo().first()
+        if row:
+            return build_model(UserBase, row)
         else:
-            logger.info(f"User not found: user_id: {user_id}")
+            logger.info("User not found: user_id: %s", user_id)
             return None
 
     except Exception as e:
-        logger.error(f"Error retrieving user by user_id: {user_id}: {e}")
+        logger.error("Error retrieving user by user_id: %s: %s", user_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while retrieving the user."
@@ -84,14 +92,14 @@ def get_user_by_id(user_id: int) -> UserBase | None:
 
 def get_user_by_email(email: str) -> UserBase | None:
     try:
-        db_user = User.objects(email=email).first()
-        if db_user:
-            return UserBase(**db_user.to_mongo().to_dict())
+        row = User.objects(email=email).only(*USER_FIELDS).as_pymongo().first()
+        if row:
+            return build_model(UserBase, row)
         else:
-            logger.info(f"User not found: email: {email}")
+            logger.info("User not found: email: %s", email)
             return None
     except Exception as e:
-        logger.error(f"Error retrieving user by user mail: {e}")
+        logger.error("Error retrieving user by user mail: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occured while retrieving the user."
@@ -102,25 +110,26 @@ def delete_user(user_id: int) -> bool:
     try:
         db_user = User.objects(id=user_id).first()
         if not db_user:
-            logger.info(f"User with ID {user_id} not found.")
+            logger.info("User with ID %s not found.", user_id)
             return False
         db_user.delete()
-        logger.info(f"User with ID {user_id} has been deleted.")
+        security.invalidate_principal(db_user.username)
+        logger.info("User with ID %s has been deleted.", user_id)
         return True
 
     except ValidationError as e:
-        logger.error(f"Validation Error: Invalid user ID format: {e}")
+        logger.error("Validation Error: Invalid user ID format: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid user ID format."
         )
 
     except DoesNotExist:
-        logger.warning(f"User with ID {user_id} does not exist.")
+        logger.warning("User with ID %s does not exist.", user_id)
         return False
 
     except Exception as e:
-        logger.error(f"Unexpected error occurred while deleting user with ID {user_id}.")
+        logger.error("Unexpected error occurred while deleting user with ID %s.", user_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while deleting the user."
@@ -132,7 +141,7 @@ def update_user(user_id: int, user_data: UserCreate) -> Optional[UserBase]:
         user_in_db = User.objects(id=user_id).first()
 
         if not user_in_db:
-            logger.info(f"User with ID {user_id} not found.")
+            logger.info("User with ID %s not found.", user_id)
             return None
 
         user_in_db.update(
@@ -140,22 +149,22 @@ def update_user(user_id: int, user_data: UserCreate) -> Optional[UserBase]:
             email=user_data.email,
             username=user_data.username
         )
+        security.invalidate_principal(user_in_db.username, user_data.username)
 
-        logger.info(f"User with ID {user_id} has been updated.")
+        logger.info("User with ID %s has been updated.", user_id)
 
-        updated_user = User.objects(id=user_id).first()
-        return UserBase(**updated_user.to_mongo().to_dict())
+        return get_user_by_id(user_id)
 
     except ValidationError as e:
-        logger.error(f"Validation Error: {e}")
+        logger.error("Validation Error: %s", e)
         # Todo: custom exception needed
 
     except NotUniqueError as e:
-        logger.error(f"Unique Constraint Error: {e}")
+        logger.error("Unique Constraint Error: %s", e)
         # # Todo: handling cases where the update might violate a unique constraint.
 
     except Exception as e:
-        logger.error(f"Unexpected error occurred while updating user with ID {user_id}")
+        logger.error("Unexpected error occurred while updating user with ID %s", user_id)
         # Todo: handle any other unexpected errors
     return None
 
@@ -0,0 +1,30 @@
+"""
+Helpers for the projected read path: fetch only the fields a response schema needs as raw
+pymongo dicts, and build the schema from them without another round of validation.
+The values come from typed mongoengine fields, so re-validating them would only repeat work.
+"""
+
+from typing import Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def schema_fields(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    """
+    Returns the field names of a pydantic model, to be passed to QuerySet.only().
+    """
+    fields = getattr(schema, "model_fields", None)
+    if fields is None:
+        fields = schema.__fields__
+    return tuple(fields)
+
+
+def build_model(schema: Type[M], row: dict) -> M:
+    """
+    Builds a pydantic model from a projected row without validation. Fields missing from the row get their default.
+    """
+    construct = getattr(schema, "model_construct", None) or schema.construct
+    row.pop("_id", None)
+    return construct(**row)
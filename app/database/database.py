@@ -1,33 +1,210 @@
-from mongoengine import connect
-from dotenv import load_dotenv
-import os
+from mongoengine import connect, disconnect, get_connection
+from pymongo.monitoring import ConnectionPoolListener
+from concurrent.futures import ThreadPoolExecutor
+from app.models.transaction import Transaction
+from app.models.rollup import MonthlyRollup
+from app.models.balance import BalanceCheckpoint
+from app.models.budget import Budget, BudgetSpend
+from app.models.category_rule import CategoryRule
+from app.models.export import ExportPartition
+from app.utils import logger, metrics
+from app.utils.config import get_settings
+import threading
+
+logger = logger.setup_logger(__name__)
 
 
 def parse_database_creds():
     """
-    Parses user creds and db host from config file
+    Returns user creds and db host from the settings
     :return:
     List - List[hostname, db_user, db_password]
 
     """
     try:
-        load_dotenv()
-        host = os.getenv("DB_HOST")
-        user = os.getenv("DB_USER")
-        password = os.getenv("DB_PASS")
-        return [host, user, password]
+        settings = get_settings()
+        return [settings.db_host, settings.db_user, settings.db_password]
     except Exception as e:
-        print(f"Error while getting creds from .env: {e}")
+        logger.error("Error while getting creds from .env: %s", e)
+
+
+def parse_pool_settings() -> dict:
+    """
+    Returns the connection pool size and timeouts from the settings.
+    :return:
+    dict - keyword arguments for MongoClient
+    """
+    settings = get_settings()
+    pool = {
+        "maxPoolSize": settings.db_max_pool_size,
+        "minPoolSize": settings.db_min_pool_size,
+        "serverSelectionTimeoutMS": settings.db_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.db_connect_timeout_ms,
+        "socketTimeoutMS": settings.db_socket_timeout_ms,
+    }
+    if settings.db_wait_queue_timeout_ms:
+        pool["waitQueueTimeoutMS"] = settings.db_wait_queue_timeout_ms
+    return pool
+
+
+class PoolMonitor(ConnectionPoolListener):
+    """
+    Tracks connection pool usage from pymongo's pool events, summed over every server.
+    A growing number of waiting checkouts means requests are queueing for a connection.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkout_failures = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def stats(self, max_pool_size: int) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": max_pool_size,
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "checkout_failures": self.checkout_failures,
+                "saturation": self.checked_out / max_pool_size if max_pool_size else 0.0,
+            }
+
+
+pool_monitor = PoolMonitor()
+pool_settings = {}
+
+
+def _collect_pool_metrics():
+    stats = pool_monitor.stats(pool_settings.get("maxPoolSize", 0))
+    gauges = []
+    for key, documentation in (("open", "Open MongoDB connections."),
+                               ("checked_out", "MongoDB connections in use."),
+                               ("waiting", "Operations waiting for a MongoDB connection.")):
+        gauge = metrics.Gauge(f"db_pool_{key}", documentation, registry=[])
+        gauge.set(stats[key])
+        gauges.append(gauge)
+    failures = metrics.Counter("db_pool_checkout_failures_total", "Failed MongoDB connection checkouts.",
+                               registry=[])
+    failures.inc(stats["checkout_failures"])
+    return gauges + [failures]
+
+
+metrics.register_collector(_collect_pool_metrics)
 
 
 def global_init():
     """
-    Function to connect MongoDB DB
+    Function to connect MongoDB DB with the configured pool size and timeouts.
+    The client connects lazily; call warm_up_pool to open connections and verify the server is reachable.
     :return:
     """
     try:
         creds = parse_database_creds()
-        connect(host=creds[0], username=creds[1], password=creds[2])
-        print("DB Connection successfully done")
+        pool_settings.update(parse_pool_settings())
+        connect(host=creds[0], username=creds[1], password=creds[2], event_listeners=[pool_monitor], **pool_settings)
+        logger.info("DB Connection successfully done")
+    except Exception as e:
+        logger.error("Error when connecting to DB: %s", e)
+        raise
+
+
+def close():
+    """
+    Closes the connection pool.
+    :return:
+    """
+    disconnect()
+
+
+def ping():
+    """
+    Runs a ping on the server, raising if it cannot be reached within the server selection timeout.
+    :return:
+    """
+    get_connection().admin.command("ping")
+
+
+def warm_up_pool(connections: int = None):
+    """
+    Opens connections up front by running concurrent pings, so the first requests after startup
+    do not pay for connection and authentication handshakes.
+    :param connections: The number of connections to open, defaults to minPoolSize.
+    :return:
+    """
+    connections = connections or pool_settings.get("minPoolSize") or 1
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="db-warmup") as executor:
+        for future in [executor.submit(ping) for _ in range(connections)]:
+            future.result()
+    logger.info("DB connection pool warmed up with %s connections", connections)
+
+
+def check_readiness() -> dict:
+    """
+    Pings the server and reports the state of the connection pool.
+    :return:
+    dict - ready flag, error message if any, and pool statistics
+    """
+    try:
+        ping()
+        ready, error = True, None
     except Exception as e:
-        print(f"Error when connecting to DB: {e}")
+        ready, error = False, str(e)
+    return {"ready": ready, "error": error, "pool": pool_monitor.stats(pool_settings.get("maxPoolSize", 0))}
+
+
+def ensure_indexes():
+    """
+    Creates the indexes declared in the models' meta.
+    Models opt out of mongoengine's lazy index creation, so this runs once at application startup.
+    :return:
+    """
+    Transaction.ensure_indexes()
+    MonthlyRollup.ensure_indexes()
+    BalanceCheckpoint.ensure_indexes()
+    Budget.ensure_indexes()
+    BudgetSpend.ensure_indexes()
+    CategoryRule.ensure_indexes()
+    ExportPartition.ensure_indexes()
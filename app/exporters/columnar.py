@@ -0,0 +1,209 @@
+"""
+Incremental columnar export of transactions for offline analytics.
+
+Transactions are exported to one partition per user and month, laid out Hive-style so that
+pyarrow.dataset, pandas, DuckDB or Spark can read the whole export as a single table:
+
+    <root>/user=<user id>/month=<YYYY-MM>/transactions.parquet
+
+Without pyarrow each partition is a directory of NumPy .npy files, one per column.
+
+Every transaction write bumps the version of its partition (see crud_exports.mark_changes) and the
+export records the version it wrote as the partition's watermark. A run only rewrites the partitions
+whose version moved past their watermark, so nightly exports only touch months with new, changed or
+deleted transactions. Each partition is read from MongoDB in batches of batch_size rows over the
+(user, date, id) index and written to a staging directory that then takes the place of the
+previous export of the partition.
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Iterator, List, Literal, Optional
+
+import numpy as np
+
+from app.crud import crud_exports
+from app.crud.crud_balances import month_end
+from app.models.transaction import Transaction
+from app.schemas.export import ExportResult
+from app.utils import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logger.setup_logger(__name__)
+
+ExportFormat = Literal['parquet', 'npy']
+
+EXPORT_BATCH_SIZE = 10000
+PARQUET_FILE = "transactions.parquet"
+COLUMNS = ('id', 'date', 'type', 'amount', 'description', 'category')
+PROJECTION = {'date': 1, 'type': 1, 'amount': 1, 'description': 1, 'category': 1}
+
+
+def default_format() -> ExportFormat:
+    return 'parquet' if pa is not None else 'npy'
+
+
+def partition_path(root: str, user, month: str) -> str:
+    return os.path.join(root, f"user={user}", f"month={month}")
+
+
+def iter_partition_batches(user, month: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[dict]]:
+    """
+    Yields the raw transactions of a user's month in (date, _id) order, batch_size rows at a time.
+    """
+    year, month_number = map(int, month.split('-'))
+    cursor = Transaction._get_collection().find(
+        {'user': user, 'date': {'$gte': datetime(year, month_number, 1), '$lt': month_end(month)}},
+        PROJECTION
+    ).sort([('date', 1), ('_id', 1)]).batch_size(batch_size)
+
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def to_columns(batch: List[dict]) -> dict:
+    """
+    Converts raw transaction documents into NumPy columns.
+    """
+    return {
+        'id': np.array([str(document['_id']) for document in batch], dtype='U24'),
+        'date': np.array([document['date'] for document in batch], dtype='datetime64[ms]'),
+        'type': np.array([document['type'] for document in batch], dtype='U7'),
+        'amount': np.array([document['amount'] for document in batch], dtype=np.float64),
+        'description': np.array([document.get('description') or '' for document in batch], dtype=str),
+        'category': np.array([document.get('category') or '' for document in batch], dtype=str),
+    }
+
+
+def _arrow_schema():
+    return pa.schema([
+        ('id', pa.string()),
+        ('date', pa.timestamp('ms')),
+        ('type', pa.string()),
+        ('amount', pa.float64()),
+        ('description', pa.string()),
+        ('category', pa.string()),
+    ])
+
+
+def write_parquet(path: str, batches: Iterator[List[dict]]) -> int:
+    """
+    Streams the batches into a Parquet file, one row group per batch. Missing descriptions and
+    categories are written as nulls.
+
+    Returns:
+        int: The number of rows written.
+    """
+    schema = _arrow_schema()
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for batch in batches:
+            writer.write_batch(pa.RecordBatch.from_pydict({
+                'id': [str(document['_id']) for document in batch],
+                'date': [document['date'] for document in batch],
+                'type': [document['type'] for document in batch],
+                'amount': [document['amount'] for document in batch],
+                'description': [document.get('description') for document in batch],
+                'category': [document.get('category') for document in batch],
+            }, schema=schema))
+            rows += len(batch)
+    return rows
+
+
+def write_npy(path: str, batches: Iterator[List[dict]]) -> int:
+    """
+    Writes one .npy file per column into the path directory. Missing descriptions and categories
+    are written as empty strings.
+
+    Returns:
+        int: The number of rows written.
+    """
+    parts = [to_columns(batch) for batch in batches]
+    os.makedirs(path, exist_ok=True)
+    for column in COLUMNS:
+        np.save(os.path.join(path, f"{column}.npy"), np.concatenate([part[column] for part in parts]))
+    return sum(len(part['id']) for part in parts)
+
+
+def export_partition(root: str, user, month: str, export_format: ExportFormat,
+                     batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """
+    Rewrites the export of one partition, removing it when the month no longer has transactions.
+
+    Returns:
+        int: The number of rows exported.
+    """
+    batches = iter_partition_batches(user, month, batch_size=batch_size)
+    first = next(batches, None)
+    target = partition_path(root, user, month)
+    if first is None:
+        shutil.rmtree(target, ignore_errors=True)
+        return 0
+
+    def all_batches():
+        yield first
+        yield from batches
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".month={month}.", dir=os.path.dirname(target))
+    try:
+        if export_format == 'parquet':
+            rows = write_parquet(os.path.join(staging, PARQUET_FILE), all_batches())
+        else:
+            rows = write_npy(staging, all_batches())
+        previous = f"{staging}.previous"
+        if os.path.exists(target):
+            os.replace(target, previous)
+        os.replace(staging, target)
+        shutil.rmtree(previous, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return rows
+
+
+def export_transactions(root: str, export_format: Optional[ExportFormat] = None,
+                        batch_size: int = EXPORT_BATCH_SIZE) -> ExportResult:
+    """
+    Exports every partition changed since its last export and advances its watermark.
+
+    Parameters:
+        root (str): The directory of the export.
+        export_format (Optional[ExportFormat]): parquet or npy, parquet when pyarrow is installed by default.
+        batch_size (int): The number of transactions read from MongoDB and converted together.
+
+    Returns:
+        ExportResult: The number of partitions rewritten, rows exported and partitions removed.
+    """
+    export_format = export_format or default_format()
+    if export_format == 'parquet' and pa is None:
+        raise RuntimeError("The parquet format requires pyarrow, use the npy format instead.")
+
+    crud_exports.track_existing_partitions()
+    result = ExportResult(format=export_format)
+    for partition in crud_exports.get_stale_partitions():
+        rows = export_partition(root, partition['user'], partition['month'], export_format, batch_size=batch_size)
+        crud_exports.mark_exported(partition, datetime.utcnow())
+        if rows:
+            result.partitions += 1
+            result.rows += rows
+        else:
+            result.removed += 1
+
+    logger.info("Exported %s transactions in %s %s partitions, removed %s empty partitions.",
+                result.rows, result.partitions, export_format, result.removed)
+    return result
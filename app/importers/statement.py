@@ -0,0 +1,226 @@
+"""
+Streaming importer for CSV and OFX bank statements.
+
+A statement flows through a generator pipeline: the file is read incrementally, parsed into raw
+records, normalized into TransactionCreate-shaped rows, then deduplicated and inserted in chunks by
+crud_transactions.bulk_create_transactions. No stage holds more than one chunk, so memory stays
+bounded regardless of the file size.
+"""
+
+import csv
+import re
+from datetime import datetime
+from typing import Dict, Iterator, Literal, Optional, TextIO
+
+from app.crud import crud_transactions
+from app.schemas.transaction import BulkImportResult
+
+StatementFormat = Literal['csv', 'ofx']
+
+READ_SIZE = 64 * 1024
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d.%m.%Y', '%Y%m%d', '%Y/%m/%d')
+
+DATE_COLUMNS = ('date', 'posted date', 'transaction date', 'booking date')
+AMOUNT_COLUMNS = ('amount', 'value')
+DESCRIPTION_COLUMNS = ('description', 'memo', 'payee', 'name', 'details')
+TYPE_COLUMNS = ('type',)
+DEBIT_COLUMNS = ('debit', 'withdrawal')
+CREDIT_COLUMNS = ('credit', 'deposit')
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+OFX_FIELDS = {'DTPOSTED', 'TRNAMT', 'NAME', 'MEMO', 'TRNTYPE', 'FITID'}
+
+
+def detect_format(filename: str) -> Optional[StatementFormat]:
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in ('ofx', 'qfx'):
+        return 'ofx'
+    if extension in ('csv', 'txt'):
+        return 'csv'
+    return None
+
+
+def parse_csv(stream: TextIO, delimiter: str = ',') -> Iterator[Dict[str, str]]:
+    """
+    Yields one record per CSV row, with header names lower-cased and stripped.
+    """
+    reader = csv.reader(stream, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = [column.strip().lower() for column in header]
+    for values in reader:
+        if values:
+            yield dict(zip(columns, values))
+
+
+def parse_ofx(stream: TextIO) -> Iterator[Dict[str, str]]:
+    """
+    Yields one record per <STMTTRN> block of an OFX (SGML or XML) statement.
+    The file is scanned in READ_SIZE chunks; only the unparsed tail of a chunk is carried over.
+    """
+    record = None
+    buffer = ''
+    while True:
+        data = stream.read(READ_SIZE)
+        buffer += data
+        # Keep a possibly incomplete trailing tag for the next chunk, unless the file is exhausted.
+        cut = buffer.rfind('<') if data else len(buffer)
+        if cut <= 0 and data:
+            continue
+        for closing, tag, value in OFX_TAG.findall(buffer[:cut]):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and record is not None:
+                    yield record
+                    record = None
+                elif not closing:
+                    record = {}
+            elif record is not None and not closing and tag in OFX_FIELDS:
+                record[tag] = value.strip()
+        buffer = buffer[cut:]
+        if not data:
+            return
+
+
+def parse_date(value: str, date_format: Optional[str] = None) -> datetime:
+    value = value.strip()
+    if date_format:
+        return datetime.strptime(value, date_format)
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for candidate in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, candidate)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value}")
+
+
+def _grouped(value: str, separator: str) -> bool:
+    return re.fullmatch(rf'[1-9]\d{{0,2}}(?:{re.escape(separator)}\d{{3}})+', value) is not None
+
+
+def parse_amount(value: str) -> float:
+    """
+    Parses an amount written with either '.' or ',' as the decimal mark, e.g. 1,234.56, 1.234,56 or 12,50.
+    With both present the last one is the decimal mark. A lone separator followed by groups of three
+    digits, as in 1,234 or 1.234.567, is a thousands separator, otherwise it is the decimal mark.
+
+    Raises:
+        ValueError: If the thousands separators are misplaced, so the amount is ambiguous.
+    """
+    value = value.strip().replace(' ', '').replace('\u00a0', '')
+    if value.startswith('(') and value.endswith(')'):
+        value = '-' + value[1:-1]
+    sign = ''
+    if value[:1] in ('-', '+'):
+        sign, value = value[0], value[1:]
+
+    separators = {separator for separator in '.,' if separator in value}
+    if len(separators) == 2:
+        decimal_mark = value[max(value.rfind('.'), value.rfind(','))]
+        integer, _, fraction = value.rpartition(decimal_mark)
+        thousands = ',' if decimal_mark == '.' else '.'
+        if not _grouped(integer, thousands) or not fraction.isdigit():
+            raise ValueError(f"Unrecognized amount: {sign}{value}")
+        value = integer.replace(thousands, '') + '.' + fraction
+    elif separators:
+        separator = separators.pop()
+        if _grouped(value, separator):
+            value = value.replace(separator, '')
+        elif value.count(separator) > 1:
+            raise ValueError(f"Unrecognized amount: {sign}{value}")
+        else:
+            value = value.replace(separator, '.')
+    return float(sign + value)
+
+
+def _first(record: Dict[str, str], columns) -> Optional[str]:
+    for column in columns:
+        value = record.get(column)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def normalize_csv(records: Iterator[Dict[str, str]], date_format: Optional[str] = None) -> Iterator[dict]:
+    """
+    Maps CSV records to TransactionCreate fields. The transaction type comes from a type column when
+    present, otherwise from the sign of the amount or from separate debit/credit columns.
+    Rows that cannot be normalized are passed through unchanged so validation reports them.
+    """
+    for record in records:
+        try:
+            debit, credit = _first(record, DEBIT_COLUMNS), _first(record, CREDIT_COLUMNS)
+            amount_value = _first(record, AMOUNT_COLUMNS)
+            if amount_value is not None:
+                amount = parse_amount(amount_value)
+            elif debit is not None:
+                amount = -abs(parse_amount(debit))
+            else:
+                amount = abs(parse_amount(credit))
+            transaction_type = (_first(record, TYPE_COLUMNS) or '').strip().lower()
+            if transaction_type not in ('income', 'expense'):
+                transaction_type = 'expense' if amount < 0 else 'income'
+            yield {
+                'type': transaction_type,
+                'amount': abs(amount),
+                'description': _first(record, DESCRIPTION_COLUMNS),
+                'date': parse_date(_first(record, DATE_COLUMNS) or '', date_format),
+            }
+        except (AttributeError, TypeError, ValueError):
+            yield record
+
+
+def normalize_ofx(records: Iterator[Dict[str, str]]) -> Iterator[dict]:
+    """
+    Maps OFX transaction records to TransactionCreate fields.
+    """
+    for record in records:
+        try:
+            amount = parse_amount(record['TRNAMT'])
+            description = ' - '.join(part for part in (record.get('NAME'), record.get('MEMO')) if part)
+            yield {
+                'type': 'expense' if amount < 0 else 'income',
+                'amount': abs(amount),
+                'description': description or None,
+                'date': datetime.strptime(record['DTPOSTED'][:8], '%Y%m%d'),
+            }
+        except (KeyError, ValueError):
+            yield record
+
+
+def read_statement(stream: TextIO, statement_format: StatementFormat, delimiter: str = ',',
+                   date_format: Optional[str] = None) -> Iterator[dict]:
+    """
+    Parses and normalizes a statement into a lazy stream of TransactionCreate-shaped rows.
+    """
+    if statement_format == 'ofx':
+        return normalize_ofx(parse_ofx(stream))
+    return normalize_csv(parse_csv(stream, delimiter=delimiter), date_format=date_format)
+
+
+def import_statement(user_id, stream: TextIO, statement_format: StatementFormat, delimiter: str = ',',
+                     date_format: Optional[str] = None,
+                     chunk_size: int = crud_transactions.BULK_CHUNK_SIZE) -> BulkImportResult:
+    """
+    Imports a CSV or OFX statement for a user.
+    Rows already imported earlier, e.g. when the same statement is uploaded twice, are counted as
+    duplicates and skipped.
+
+    Parameters:
+        user_id: The ID of the owner of the transactions.
+        stream (TextIO): The statement opened in text mode.
+        statement_format (StatementFormat): Either 'csv' or 'ofx'.
+        delimiter (str): The CSV field delimiter.
+        date_format (Optional[str]): The strptime format of CSV dates, guessed when omitted.
+        chunk_size (int): The number of rows deduplicated and inserted together.
+
+    Returns:
+        BulkImportResult: The numbers of inserted, duplicate and failed rows, numbered from 0 in data order.
+    """
+    rows = read_statement(stream, statement_format, delimiter=delimiter, date_format=date_format)
+    return crud_transactions.bulk_create_transactions(user_id, rows, chunk_size=chunk_size, deduplicate=True)
@@ -1,11 +1,38 @@
-# from fastapi import FastAPI
-# from app.api.endpoints import user, transaction
-from app.database.database import global_init
+from fastapi import FastAPI
+from app.api.endpoints import user, transaction, report, budget, category, health, metrics, profiling
+from app.database import database
+from app.utils.concurrency import shutdown_db_executor
+from app.utils.password_pool import shutdown_password_pool
+from app.utils.logger import shutdown_logging
+from app.utils.config import get_settings
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
 
-global_init()
 
+app = FastAPI()
+if get_settings().profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(user.router)
+app.include_router(transaction.router)
+app.include_router(report.router)
+app.include_router(budget.router)
+app.include_router(category.router)
+app.include_router(profiling.router)
 
-# app = FastAPI()
-# app.include_router(user.router, prefix="/users", tags=["users"])
-# app.include_router(transaction.router, prefix="/transactions", tags=["transactions"])
-#
+
+@app.on_event("startup")
+def connect_database():
+    database.global_init()
+    database.warm_up_pool()
+    database.ensure_indexes()
+
+
+@app.on_event("shutdown")
+def stop_worker_pools():
+    shutdown_db_executor()
+    shutdown_password_pool()
+    database.close()
+    shutdown_logging()
@@ -0,0 +1,16 @@
+from mongoengine import Document, FloatField, DateTimeField, ReferenceField
+from .user import User
+
+
+class BalanceCheckpoint(Document):
+    user = ReferenceField(User, required=True)
+    # Exclusive upper bound: the balance covers every transaction dated before as_of.
+    as_of = DateTimeField(required=True)
+    balance = FloatField(required=True)
+
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ('user', '-as_of'), 'unique': True},
+        ]
+    }
@@ -0,0 +1,35 @@
+from mongoengine import Document, StringField, FloatField, ReferenceField
+from .user import User
+
+BUDGET_PERIODS = ['weekly', 'monthly', 'yearly']
+
+
+class Budget(Document):
+    user = ReferenceField(User, required=True)
+    category = StringField(required=True)
+    period = StringField(required=True, choices=BUDGET_PERIODS)
+    limit = FloatField(required=True, min_value=0)
+    # Key of the period in which the limit was exceeded, None while within budget.
+    over_budget_period = StringField()
+
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ('user', 'category', 'period'), 'unique': True},
+        ]
+    }
+
+
+class BudgetSpend(Document):
+    user = ReferenceField(User, required=True)
+    category = StringField(required=True)
+    period = StringField(required=True, choices=BUDGET_PERIODS)
+    period_key = StringField(required=True)
+    spent = FloatField(default=0.0)
+
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ('user', 'category', 'period', 'period_key'), 'unique': True},
+        ]
+    }
@@ -0,0 +1,18 @@
+from mongoengine import Document, StringField, BooleanField, IntField, ReferenceField
+from .user import User
+
+
+class CategoryRule(Document):
+    user = ReferenceField(User, required=True)
+    category = StringField(required=True)
+    # A keyword matched as whole words, or a regular expression when is_regex is set.
+    pattern = StringField(required=True)
+    is_regex = BooleanField(default=False)
+    priority = IntField(default=0)
+
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            ('user', '-priority', 'id'),
+        ]
+    }
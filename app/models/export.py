@@ -0,0 +1,19 @@
+from mongoengine import Document, StringField, IntField, DateTimeField, ReferenceField
+from .user import User
+
+
+class ExportPartition(Document):
+    user = ReferenceField(User, required=True)
+    month = StringField(required=True, regex=r'^\d{4}-\d{2}$')
+    # Incremented by every write to the partition's transactions.
+    version = IntField(default=0)
+    # Watermark: the version last written to the export, stale while lower than version.
+    exported_version = IntField(default=0)
+    exported_at = DateTimeField()
+
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ('user', 'month'), 'unique': True},
+        ]
+    }
@@ -0,0 +1,17 @@
+from mongoengine import Document, StringField, FloatField, IntField, ReferenceField
+from .user import User
+
+
+class MonthlyRollup(Document):
+    user = ReferenceField(User, required=True)
+    month = StringField(required=True, regex=r'^\d{4}-\d{2}$')
+    type = StringField(required=True, choices=['income', 'expense'])
+    total = FloatField(default=0.0)
+    count = IntField(default=0)
+
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ('user', 'month', 'type'), 'unique': True},
+        ]
+    }
@@ -7,4 +7,16 @@ class Transaction(Document):
     type = StringField(required=True, choices=['income', 'expense'])
     amount = FloatField(required=True)
     description = StringField()
+    category = StringField()
     date = DateTimeField()
+    import_hash = StringField()
+
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            ('date', 'id'),
+            ('user', 'date', 'id'),
+            ('user', 'type', 'date', 'id'),
+            {'fields': ['import_hash'], 'unique': True, 'sparse': True},
+        ]
+    }
@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from typing import Literal
+
+BudgetPeriod = Literal['weekly', 'monthly', 'yearly']
+
+
+class BudgetBase(BaseModel):
+    category: str
+    period: BudgetPeriod
+    limit: float = Field(..., gt=0)
+
+
+class BudgetCreate(BudgetBase):
+    pass
+
+
+class BudgetStatus(BudgetBase):
+    id: str
+    period_key: str
+    spent: float
+    remaining: float
+    over_budget: bool
+
+
+class BudgetSpendDrift(BaseModel):
+    user_id: str
+    category: str
+    period: BudgetPeriod
+    period_key: str
+    expected_spent: float
+    actual_spent: float
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+
+class CategoryRuleBase(BaseModel):
+    category: str
+    pattern: str
+    is_regex: bool = False
+    priority: int = 0
+
+
+class CategoryRuleCreate(CategoryRuleBase):
+    pass
+
+
+class CategoryRule(CategoryRuleBase):
+    id: str
+
+
+class RecategorizeResult(BaseModel):
+    scanned: int = 0
+    updated: int = 0
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class ExportResult(BaseModel):
+    format: str
+    partitions: int = 0
+    rows: int = 0
+    removed: int = 0
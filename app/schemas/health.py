@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class PoolStats(BaseModel):
+    max_pool_size: int
+    open: int
+    checked_out: int
+    waiting: int
+    max_waiting: int
+    checkout_failures: int
+    saturation: float
+
+
+class Readiness(BaseModel):
+    ready: bool
+    error: Optional[str] = None
+    pool: PoolStats
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    route: Optional[str] = None
+    status_code: Optional[int] = None
+    started_at: datetime
+    duration_ms: float
+    samples: int
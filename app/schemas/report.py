@@ -0,0 +1,92 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+
+Period = Literal['day', 'week', 'month']
+
+
+class ReportBucket(BaseModel):
+    user_id: str
+    period: str
+    income: float
+    expense: float
+    net: float
+    running_balance: float
+    count: int
+
+
+class ReportSummary(BaseModel):
+    period: Period
+    total_income: float
+    total_expense: float
+    net: float
+    buckets: List[ReportBucket]
+
+
+class MonthlyTotals(BaseModel):
+    month: str
+    income: float
+    expense: float
+    net: float
+
+
+class Balance(BaseModel):
+    user_id: str
+    total_income: float
+    total_expense: float
+    balance: float
+
+
+class Dashboard(Balance):
+    months: List[MonthlyTotals]
+
+
+class RollupDrift(BaseModel):
+    user_id: str
+    month: str
+    type: str
+    expected_total: float
+    actual_total: float
+    expected_count: int
+    actual_count: int
+
+
+class BalanceAsOf(BaseModel):
+    user_id: str
+    as_of: datetime
+    balance: float
+    checkpoint: Optional[datetime] = None
+
+
+class RollingSpend(BaseModel):
+    day: str
+    spend: float
+
+
+class MonthOverMonth(MonthlyTotals):
+    # Relative to the previous month, None when the previous month is 0.
+    income_change: Optional[float] = None
+    expense_change: Optional[float] = None
+
+
+class CategoryShare(BaseModel):
+    category: Optional[str] = None
+    spend: float
+    share: float
+
+
+class ForecastPoint(BaseModel):
+    day: str
+    balance: float
+
+
+class Insights(BaseModel):
+    user_id: str
+    as_of: datetime
+    window_days: int
+    balance: float
+    rolling_spend: List[RollingSpend]
+    month_over_month: List[MonthOverMonth]
+    category_share: List[CategoryShare]
+    daily_net: float
+    forecast: List[ForecastPoint]
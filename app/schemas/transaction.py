@@ -1,12 +1,14 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 
 class TransactionBase(BaseModel):
     type: str
     amount: float
-    description: str = None
+    description: Optional[str] = None
     date: datetime
+    category: Optional[str] = None
 
 
 class TransactionCreate(TransactionBase):
@@ -16,3 +18,20 @@ class TransactionCreate(TransactionBase):
 class Transaction(TransactionBase):
     id: int
     user_id: int
+
+
+class TransactionPage(BaseModel):
+    items: List[TransactionBase]
+    next_cursor: Optional[str] = None
+
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    inserted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: List[BulkRowError] = []
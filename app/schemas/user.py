@@ -16,3 +16,9 @@ class UserLogin(UserCreate):
 
 class UserInDB(UserBase):
     hashed_password: str
+
+
+class Principal(BaseModel):
+    id: str
+    username: str
+    is_admin: bool = False
@@ -0,0 +1,22 @@
+"""
+Extends the monthly balance checkpoints of every user up to the last completed month.
+Meant to run periodically, e.g. nightly from cron.
+
+Usage:
+    python -m app.scripts.balance_checkpoints
+"""
+
+import sys
+from app.database.database import global_init, ensure_indexes
+from app.crud import crud_balances
+
+
+def main() -> int:
+    global_init()
+    ensure_indexes()
+    print(f"Wrote {crud_balances.build_all_checkpoints()} balance checkpoints.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Exports the transactions changed since the last run to a columnar dataset partitioned by user and month.
+Meant to run periodically, e.g. nightly from cron.
+
+Usage:
+    python -m app.scripts.export_transactions /data/exports/transactions
+    python -m app.scripts.export_transactions /data/exports/transactions --format npy
+"""
+
+import argparse
+import sys
+from app.database.database import global_init, ensure_indexes
+from app.exporters import columnar
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="The directory of the export.")
+    parser.add_argument("--format", choices=["parquet", "npy"],
+                        help="Defaults to parquet when pyarrow is installed, npy otherwise.")
+    parser.add_argument("--batch-size", type=int, default=columnar.EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    global_init()
+    ensure_indexes()
+
+    result = columnar.export_transactions(args.root, export_format=args.format, batch_size=args.batch_size)
+    print(f"Exported {result.rows} transactions in {result.partitions} {result.format} partitions, "
+          f"removed {result.removed} empty partitions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
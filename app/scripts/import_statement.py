@@ -0,0 +1,51 @@
+"""
+Imports a CSV or OFX bank statement for a user.
+
+Usage:
+    python -m app.scripts.import_statement --username alice statement.csv
+    python -m app.scripts.import_statement --username alice --format ofx export.qfx
+"""
+
+import argparse
+import sys
+from app.database.database import global_init, ensure_indexes
+from app.importers import statement
+from app.models.user import User
+from app.crud import crud_transactions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--format", choices=["csv", "ofx"])
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--date-format")
+    parser.add_argument("--encoding", default="utf-8-sig")
+    parser.add_argument("--chunk-size", type=int, default=crud_transactions.BULK_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    statement_format = args.format or statement.detect_format(args.path)
+    if statement_format is None:
+        parser.error("Unknown statement format, pass --format.")
+
+    global_init()
+    ensure_indexes()
+
+    user = User.objects(username=args.username).only('id').first()
+    if user is None:
+        print(f"User not found: {args.username}")
+        return 1
+
+    with open(args.path, encoding=args.encoding, errors="replace", newline="") as stream:
+        result = statement.import_statement(user.id, stream, statement_format, delimiter=args.delimiter,
+                                            date_format=args.date_format, chunk_size=args.chunk_size)
+
+    for error in result.errors:
+        print(f"row {error.row}: {error.error}")
+    print(f"{result.inserted} inserted, {result.duplicates} duplicates, {result.failed} failed.")
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Applies the categorization rules to the stored transactions of one user, or of every user with rules.
+
+Usage:
+    python -m app.scripts.recategorize
+    python -m app.scripts.recategorize --user <user id> --overwrite
+"""
+
+import argparse
+import sys
+from app.database.database import global_init, ensure_indexes
+from app.models.category_rule import CategoryRule
+from app.crud import crud_categories
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", help="Only recategorize this user's transactions.")
+    parser.add_argument("--overwrite", action="store_true", help="Also replace existing categories when a rule matches.")
+    parser.add_argument("--batch-size", type=int, default=crud_categories.RECATEGORIZE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    global_init()
+    ensure_indexes()
+
+    user_ids = [args.user] if args.user else CategoryRule.objects.distinct('user')
+    for user_id in user_ids:
+        user_id = getattr(user_id, 'id', user_id)
+        result = crud_categories.recategorize_transactions(user_id, overwrite=args.overwrite, batch_size=args.batch_size)
+        print(f"{user_id}: {result.updated} of {result.scanned} transactions recategorized.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
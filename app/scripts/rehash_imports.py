@@ -0,0 +1,28 @@
+"""
+Recomputes the import hash of the imported transactions after the hashed identity changed,
+so importing an earlier statement again still skips its rows as duplicates.
+
+Usage:
+    python -m app.scripts.rehash_imports
+"""
+
+import argparse
+import sys
+from app.database.database import global_init, ensure_indexes
+from app.crud import crud_transactions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=crud_transactions.BULK_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    global_init()
+    ensure_indexes()
+
+    print(f"Rehashed {crud_transactions.rehash_imported_transactions(batch_size=args.batch_size)} transactions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
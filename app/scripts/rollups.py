@@ -0,0 +1,43 @@
+"""
+Verifies or rebuilds the monthly rollups and the budget spend counters from the raw transactions.
+
+Usage:
+    python -m app.scripts.rollups verify
+    python -m app.scripts.rollups rebuild
+"""
+
+import argparse
+import sys
+from app.database.database import global_init, ensure_indexes
+from app.crud import crud_budgets, crud_rollups
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args()
+
+    global_init()
+    ensure_indexes()
+
+    if args.command == "rebuild":
+        print(f"Rebuilt {crud_rollups.rebuild_rollups()} rollups.")
+        print(f"Repaired {crud_budgets.repair_budget_spend()} budget spend counters.")
+
+    drifts = crud_rollups.verify_rollups()
+    for drift in drifts:
+        print(f"{drift.user_id} {drift.month} {drift.type}: "
+              f"expected {drift.expected_total} ({drift.expected_count} rows), "
+              f"found {drift.actual_total} ({drift.actual_count} rows)")
+    print(f"{len(drifts)} drifted rollups.")
+
+    budget_drifts = crud_budgets.verify_budget_spend()
+    for drift in budget_drifts:
+        print(f"{drift.user_id} {drift.category} {drift.period} {drift.period_key}: "
+              f"expected {drift.expected_spent}, found {drift.actual_spent}")
+    print(f"{len(budget_drifts)} drifted budget spend counters.")
+    return 1 if drifts or budget_drifts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Rule-based categorization of transaction descriptions.
+
+A set of user rules is compiled once into two matchers that each take a single pass over a description:
+- keyword rules go into a dict indexed by their first word, so matching costs one lookup per word of
+  the description regardless of the number of rules;
+- regex rules are combined into one pattern of lookaheads tried in priority order, so the whole rule
+  set is evaluated by a single call into the regex engine.
+
+The matching rule with the highest priority wins. Keywords match whole words, case-insensitively.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+class Rule(NamedTuple):
+    category: str
+    pattern: str
+    is_regex: bool = False
+    priority: int = 0
+
+
+def keyword_words(keyword: str) -> Tuple[str, ...]:
+    return tuple(_WORD.findall(keyword.lower()))
+
+
+def _lookahead(pattern: str) -> str:
+    return f"(?=[\\s\\S]*?(?:{pattern}))"
+
+
+def validate_rule(pattern: str, is_regex: bool) -> None:
+    """
+    Raises:
+        ValueError: If the pattern can't be compiled into a categorizer.
+    """
+    if not is_regex:
+        if not keyword_words(pattern):
+            raise ValueError("A keyword must contain at least one letter or digit.")
+        return
+    try:
+        compiled = re.compile(_lookahead(pattern), re.IGNORECASE)
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression: {e.msg}")
+    if compiled.groups:
+        raise ValueError("Capturing groups are not supported, use non-capturing groups (?:...) instead.")
+
+
+class Categorizer:
+    def __init__(self, rules: Iterable[Rule]):
+        """
+        Parameters:
+            rules (Iterable[Rule]): The rules, ties in priority are won by the earlier rule.
+        """
+        ranked = sorted(enumerate(rules), key=lambda item: (-item[1].priority, item[0]))
+        self.categories: List[str] = [rule.category for _, rule in ranked]
+        self._keywords: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        alternatives = []
+        for rank, (_, rule) in enumerate(ranked):
+            if rule.is_regex:
+                alternatives.append(f"{_lookahead(rule.pattern)}(?P<r{rank}>)")
+            else:
+                words = keyword_words(rule.pattern)
+                self._keywords.setdefault(words[0], []).append((words[1:], rank))
+        self._regex = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def _keyword_rank(self, description: str) -> Optional[int]:
+        best = None
+        words = _WORD.findall(description.lower())
+        for index, word in enumerate(words):
+            for rest, rank in self._keywords.get(word, ()):
+                if (best is None or rank < best) and tuple(words[index + 1:index + 1 + len(rest)]) == rest:
+                    best = rank
+        return best
+
+    def categorize(self, description: Optional[str]) -> Optional[str]:
+        """
+        Returns the category of the highest-priority rule matching the description, None if no rule matches.
+        """
+        if not description:
+            return None
+        best = self._keyword_rank(description) if self._keywords else None
+        if self._regex is not None and best != 0:
+            match = self._regex.match(description)
+            if match is not None:
+                rank = int(match.lastgroup[1:])
+                if best is None or rank < best:
+                    best = rank
+        return None if best is None else self.categories[best]
+
+    def categorize_many(self, descriptions: Iterable[Optional[str]]) -> List[Optional[str]]:
+        categorize = self.categorize
+        return [categorize(description) for description in descriptions]
@@ -0,0 +1,57 @@
+"""
+Offloads blocking work, such as synchronous mongoengine queries, from the event loop to a bounded thread pool.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional, TypeVar
+
+from app.utils import metrics
+from app.utils.config import get_settings
+
+T = TypeVar("T")
+
+_db_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool running database calls, created on first use.
+    Its size caps the number of concurrent queries and should not exceed the MongoDB connection pool size.
+    """
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(max_workers=get_settings().db_thread_pool_size, thread_name_prefix="db")
+    return _db_executor
+
+
+def shutdown_db_executor() -> None:
+    global _db_executor
+    if _db_executor is not None:
+        _db_executor.shutdown(wait=True)
+        _db_executor = None
+
+
+async def run_in_db_pool(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Runs a blocking function in the database thread pool and awaits its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(func, *args, **kwargs))
+
+
+def asyncify(func: Callable[..., T], name: Optional[str] = None) -> Callable[..., Coroutine[Any, Any, T]]:
+    """
+    Wraps a blocking function into a coroutine function with the same signature and docstring
+    that runs it in the database thread pool.
+    Calls are timed in the db_call_duration_seconds metric under name, <module>.<function> by default.
+    """
+    name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+    timed = metrics.DB_CALL_SECONDS.labels(name).time(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> T:
+        return await run_in_db_pool(timed, *args, **kwargs)
+
+    return wrapper
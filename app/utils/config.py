@@ -0,0 +1,157 @@
+"""
+Settings of the application, read from the environment and the .env file once per process.
+
+get_settings() loads .env on its first call and memoizes the result, so importing a module has no
+configuration side effects: modules call get_settings() when they first need a value, and the
+caches and worker pools sized from the settings are built on first use. Tests and benchmarks that
+change the environment call get_settings.cache_clear() to have it read again.
+"""
+
+import functools
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+def _int(key: str, default: int) -> int:
+    value = os.getenv(key)
+    return int(value) if value else default
+
+
+def _float(key: str, default: float) -> float:
+    value = os.getenv(key)
+    return float(value) if value else default
+
+
+def _bool(key: str, default: bool) -> bool:
+    value = os.getenv(key)
+    return value.lower() in ("1", "true", "yes") if value else default
+
+
+def _list(key: str) -> Tuple[str, ...]:
+    return tuple(item.strip() for item in os.getenv(key, "").split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Database
+    db_host: Optional[str]
+    db_user: Optional[str]
+    db_password: Optional[str]
+    db_max_pool_size: int
+    db_min_pool_size: int
+    db_server_selection_timeout_ms: int
+    db_connect_timeout_ms: int
+    db_socket_timeout_ms: int
+    db_wait_queue_timeout_ms: Optional[int]
+    db_thread_pool_size: int
+
+    # Authentication
+    secret_key: Optional[str]
+    algorithm: Optional[str]
+    access_token_expire_minutes: Optional[str]
+    bcrypt_rounds: int
+    password_hash_workers: int
+    password_hash_max_queue: int
+    principal_cache_size: int
+    principal_cache_ttl_seconds: float
+    token_cache_size: int
+
+    # Caching and serialization
+    data_version_cache_size: int
+    data_version_ttl_seconds: float
+    response_cache_size: int
+    response_cache_ttl_seconds: float
+    response_cache_max_body_bytes: int
+    categorizer_cache_size: int
+    categorizer_cache_ttl_seconds: float
+    fast_json: bool
+
+    # Logging
+    log_level: str
+    log_format: str
+    log_rate_limit: int
+    log_rate_limit_interval_seconds: float
+
+    # Rate limiting
+    rate_limit_max_keys: int
+    rate_limit_sweep_interval_seconds: float
+    login_rate_limit_enabled: bool
+    login_ip_burst: int
+    login_ip_per_minute: float
+    login_username_burst: int
+    login_username_per_minute: float
+
+    # Profiling
+    profiling_enabled: bool
+    profiling_sample_rate: float
+    profiling_token: Optional[str]
+    profiling_paths: Tuple[str, ...]
+    profiling_interval_seconds: float
+    profiling_max_profiles: int
+    profiling_max_samples: int
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        wait_queue_timeout = os.getenv("DB_WAIT_QUEUE_TIMEOUT_MS")
+        return cls(
+            db_host=os.getenv("DB_HOST"),
+            db_user=os.getenv("DB_USER"),
+            db_password=os.getenv("DB_PASS"),
+            db_max_pool_size=_int("DB_MAX_POOL_SIZE", 100),
+            db_min_pool_size=_int("DB_MIN_POOL_SIZE", 10),
+            db_server_selection_timeout_ms=_int("DB_SERVER_SELECTION_TIMEOUT_MS", 5000),
+            db_connect_timeout_ms=_int("DB_CONNECT_TIMEOUT_MS", 10000),
+            db_socket_timeout_ms=_int("DB_SOCKET_TIMEOUT_MS", 20000),
+            db_wait_queue_timeout_ms=int(wait_queue_timeout) if wait_queue_timeout else None,
+            db_thread_pool_size=_int("DB_THREAD_POOL_SIZE", 32),
+            secret_key=os.getenv("SECRET_KEY"),
+            algorithm=os.getenv("ALGORITHM"),
+            access_token_expire_minutes=os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"),
+            bcrypt_rounds=_int("BCRYPT_ROUNDS", 12),
+            password_hash_workers=_int("PASSWORD_HASH_WORKERS", os.cpu_count() or 2),
+            password_hash_max_queue=_int("PASSWORD_HASH_MAX_QUEUE", 256),
+            principal_cache_size=_int("PRINCIPAL_CACHE_SIZE", 10000),
+            principal_cache_ttl_seconds=_float("PRINCIPAL_CACHE_TTL_SECONDS", 60),
+            token_cache_size=_int("TOKEN_CACHE_SIZE", 10000),
+            data_version_cache_size=_int("DATA_VERSION_CACHE_SIZE", 100000),
+            data_version_ttl_seconds=_float("DATA_VERSION_TTL_SECONDS", 30),
+            response_cache_size=_int("RESPONSE_CACHE_SIZE", 1000),
+            response_cache_ttl_seconds=_float("RESPONSE_CACHE_TTL_SECONDS", 60),
+            # Larger bodies, e.g. pages of a thousand transactions, are not worth the memory.
+            response_cache_max_body_bytes=_int("RESPONSE_CACHE_MAX_BODY_BYTES", 256 * 1024),
+            categorizer_cache_size=_int("CATEGORIZER_CACHE_SIZE", 1024),
+            # Bounds how long another worker keeps categorizing with rules changed elsewhere.
+            categorizer_cache_ttl_seconds=_float("CATEGORIZER_CACHE_TTL_SECONDS", 300),
+            fast_json=_bool("FAST_JSON", False),
+            log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            log_format=os.getenv("LOG_FORMAT", "json").lower(),
+            log_rate_limit=_int("LOG_RATE_LIMIT", 20),
+            log_rate_limit_interval_seconds=_float("LOG_RATE_LIMIT_INTERVAL_SECONDS", 10),
+            rate_limit_max_keys=_int("RATE_LIMIT_MAX_KEYS", 100000),
+            rate_limit_sweep_interval_seconds=_float("RATE_LIMIT_SWEEP_INTERVAL_SECONDS", 60),
+            login_rate_limit_enabled=_bool("LOGIN_RATE_LIMIT_ENABLED", True),
+            login_ip_burst=_int("LOGIN_IP_BURST", 20),
+            login_ip_per_minute=_float("LOGIN_IP_PER_MINUTE", 10),
+            login_username_burst=_int("LOGIN_USERNAME_BURST", 5),
+            login_username_per_minute=_float("LOGIN_USERNAME_PER_MINUTE", 1),
+            profiling_enabled=_bool("PROFILING_ENABLED", False),
+            profiling_sample_rate=_float("PROFILING_SAMPLE_RATE", 0.0),
+            profiling_token=os.getenv("PROFILING_TOKEN") or None,
+            profiling_paths=_list("PROFILING_PATHS"),
+            profiling_interval_seconds=_float("PROFILING_INTERVAL_SECONDS", 0.005),
+            profiling_max_profiles=_int("PROFILING_MAX_PROFILES", 50),
+            profiling_max_samples=_int("PROFILING_MAX_SAMPLES", 20000),
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Returns the settings of the process, loading .env and reading the environment on the first call only.
+    Variables already set in the environment take precedence over .env.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return Settings.from_env()
@@ -0,0 +1,90 @@
+"""
+Conditional GET support for the endpoints serving a user's transactions and reports.
+
+The ETag of a response is derived from the data version of the user (see app.utils.versions),
+the authenticated principal and the request URL, so it is known before any query runs:
+- a matching If-None-Match is answered with 304 Not Modified without touching MongoDB;
+- otherwise the serialized body of an earlier identical response is served from a bounded LRU cache.
+
+Usage in an endpoint:
+
+    async def endpoint(conditional: ConditionalRequest = Depends(http_cache.conditional_request)):
+        cached = conditional.cached_response()
+        if cached is not None:
+            return cached
+        ...
+        return conditional.respond(result)
+"""
+
+import functools
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import Response
+
+from app.schemas.user import Principal
+from app.utils import metrics, security, serialization, versions
+from app.utils.cache import TTLCache
+from app.utils.config import get_settings
+
+# Clients must revalidate on every use, the ETag makes revalidation cheap.
+CACHE_CONTROL = "private, no-cache"
+
+
+@functools.lru_cache(maxsize=None)
+def get_response_cache() -> TTLCache[bytes]:
+    settings = get_settings()
+    return TTLCache(maxsize=settings.response_cache_size, ttl=settings.response_cache_ttl_seconds)
+
+
+metrics.register_cache("response", get_response_cache)
+
+
+def compute_etag(principal: Principal, version: str, request: Request) -> str:
+    identity = "|".join([principal.id, version, request.url.path, str(request.query_params)])
+    return f'"{hashlib.sha256(identity.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag in candidates
+
+
+class ConditionalRequest:
+    def __init__(self, etag: str):
+        self.etag = etag
+        self.headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    def cached_response(self) -> Optional[Response]:
+        body = get_response_cache().get(self.etag)
+        if body is None:
+            return None
+        return Response(content=body, media_type="application/json", headers=self.headers)
+
+    def respond(self, content: Any) -> Response:
+        """
+        Serializes the result of the endpoint, caches the body under the ETag and returns the response.
+        """
+        body = serialization.dumps(content)
+        if len(body) <= get_settings().response_cache_max_body_bytes:
+            get_response_cache().set(self.etag, body)
+        return Response(content=body, media_type="application/json", headers=self.headers)
+
+
+async def conditional_request(request: Request,
+                              current_user: Principal = Depends(security.get_current_user)) -> ConditionalRequest:
+    """
+    Computes the ETag of the request and answers 304 Not Modified when the client already has it.
+    Admin requests may span every user, so they are versioned by writes of any user.
+
+    Raises:
+        HTTPException: 304 if If-None-Match carries the current ETag.
+    """
+    scope = versions.ALL_USERS if current_user.is_admin else current_user.id
+    conditional = ConditionalRequest(compute_etag(current_user, versions.get_version(scope), request))
+    if etag_matches(request.headers.get("if-none-match"), conditional.etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=conditional.headers)
+    return conditional
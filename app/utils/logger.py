@@ -1,16 +1,150 @@
+"""
+Logging configuration of the application, applied once per process by the first setup_logger call.
+
+Records are put on an in-memory queue by a QueueHandler and written by a QueueListener thread, so
+formatting and stdout I/O stay off the request path. Log calls use lazy %-style arguments: the
+message is only built for records that pass the level check and the rate limit.
+
+Output is one JSON object per line by default (LOG_FORMAT=json), or plain text with LOG_FORMAT=text.
+Extra fields passed with extra={...} are included in the JSON object.
+
+Below ERROR, each message template of each logger is limited to LOG_RATE_LIMIT records per
+LOG_RATE_LIMIT_INTERVAL_SECONDS, which keeps hot-path messages such as "User not found" from
+flooding the output. The first record let through after a suppression carries the number of
+records dropped in a "suppressed" field.
+"""
+
+import atexit
+import json
 import logging
+import queue
 import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from app.utils.config import get_settings
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Attributes of every LogRecord; anything else on a record was passed with extra={...}.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `limit` records per `interval` seconds through for each (logger, message template)
+    below `max_level`, counting the dropped ones.
+    """
+
+    MAX_KEYS = 10000
+
+    def __init__(self, limit: int, interval: float, max_level: int = logging.ERROR):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.max_level = max_level
+        self._windows: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.max_level:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                if len(self._windows) >= self.MAX_KEYS:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.limit:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merges the arguments now, as they may change once the call returns, but leaves the
+        # formatting and serialization to the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging() -> None:
+    """
+    Routes every logger through the queue to stdout. Does nothing when already configured.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        settings = get_settings()
+        stream_handler = logging.StreamHandler(sys.stdout)
+        if settings.log_format == "text":
+            stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+        else:
+            stream_handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _DeferredFormatQueueHandler(log_queue)
+        if settings.log_rate_limit > 0:
+            queue_handler.addFilter(RateLimitFilter(settings.log_rate_limit, settings.log_rate_limit_interval_seconds))
+
+        root = logging.getLogger()
+        root.handlers = [queue_handler]
+        root.setLevel(settings.log_level)
+
+        _listener = QueueListener(log_queue, stream_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """
+    Writes out the queued records and stops the listener thread.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
 
 
-def setup_logger():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%Y-%m-%d %H:%M:%S',
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            # logging.FileHandler('app.log', mode='a', encoding='utf-8')
-        ]
-    )
-    logger = logging.getLogger(__name__)
-    logger.info("Logging is configured")
-    return logger
+def setup_logger(name: str = "app") -> logging.Logger:
+    configure_logging()
+    return logging.getLogger(name)
@@ -0,0 +1,305 @@
+"""
+In-process metrics in the Prometheus text exposition format, served on /metrics.
+
+Metrics are module-level counters, gauges and histograms. Each set of label values gets a child
+holding its own pre-allocated values; hot paths bind their child once (at import or decoration time)
+and recording is then a lock-protected float update, with no allocation. Histograms keep one count
+per bucket and are made cumulative only when scraped.
+
+Values that are already counted elsewhere, such as the hit counters of the TTL caches and the pool
+statistics, are read by collectors when /metrics is scraped instead of being recorded twice.
+
+Metrics are per process: with several workers, each one must be scraped, or the values summed.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a cached lookup to a slow aggregation or a bcrypt hash.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The route label of requests that matched no route, so unknown paths don't create new series.
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self, func: Callable[..., T]) -> Callable[..., T]:
+        """
+        Wraps func so that the duration of every call, successful or not, is observed.
+        """
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs) -> T:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(time.perf_counter() - started)
+
+        return timed
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[List["Metric"]] = None):
+        """
+        Parameters:
+            name (str): The metric name, with its unit and _total suffix where they apply.
+            documentation (str): The HELP text.
+            labelnames (Sequence[str]): The names of the labels; values are given to labels() in this order.
+            registry (Optional[List[Metric]]): Where the metric is rendered from, REGISTRY by default.
+                Collectors build unregistered metrics by passing an empty list.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: Any):
+        """
+        Returns the child of the label values, creating it on first use. Hot paths should keep the child.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self, values: Tuple[Any, ...], child) -> Iterable[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._samples(values, child))
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[List[Metric]] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self, values: Tuple[Any, ...], child: _HistogramChild) -> Iterable[str]:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, values)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+REGISTRY: List[Metric] = []
+_collectors: List[Callable[[], Iterable[Metric]]] = []
+_caches: Dict[str, Callable[[], Any]] = {}
+
+
+def register_collector(collect: Callable[[], Iterable[Metric]]) -> None:
+    """
+    Registers a function called on every scrape that returns metrics built from existing statistics.
+    The metrics it builds must pass registry=[] so they are not kept in REGISTRY.
+    """
+    _collectors.append(collect)
+
+
+def register_cache(name: str, get_cache: Callable[[], Any]) -> None:
+    """
+    Reports the hit, miss and eviction counters of a TTLCache, returned by get_cache, under the cache label.
+    """
+    _caches[name] = get_cache
+
+
+def _collect_caches() -> Iterable[Metric]:
+    entries = Gauge("cache_entries", "Number of entries in the cache.", ["cache"], registry=[])
+    hits = Counter("cache_hits_total", "Lookups answered from the cache.", ["cache"], registry=[])
+    misses = Counter("cache_misses_total", "Lookups not found in the cache or expired.", ["cache"], registry=[])
+    evictions = Counter("cache_evictions_total", "Entries evicted to stay within the cache size.", ["cache"],
+                        registry=[])
+    hit_ratio = Gauge("cache_hit_ratio", "Share of lookups answered from the cache since startup.", ["cache"],
+                      registry=[])
+    for name, get_cache in _caches.items():
+        stats = get_cache().stats()
+        entries.labels(name).set(stats["size"])
+        hits.labels(name).inc(stats["hits"])
+        misses.labels(name).inc(stats["misses"])
+        evictions.labels(name).inc(stats["evictions"])
+        hit_ratio.labels(name).set(stats["hit_ratio"])
+    return [entries, hits, misses, evictions, hit_ratio]
+
+
+register_collector(_collect_caches)
+
+
+def render() -> str:
+    """
+    Renders every registered metric and collector in the Prometheus text format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for metric in collect():
+            lines.extend(metric.render())
+    lines.append("")
+    return "\n".join(lines)
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status code.",
+                        ["method", "route", "status"])
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time to serve an HTTP request, by route.",
+                                 ["method", "route"])
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served.")
+DB_CALL_SECONDS = Histogram("db_call_duration_seconds",
+                            "Time spent in a CRUD function on the database thread pool, queueing excluded.",
+                            ["operation"])
+PASSWORD_HASH_SECONDS = Histogram("password_hash_duration_seconds",
+                                  "Time spent in a bcrypt call on the password hashing pool, queueing excluded.",
+                                  ["operation"])
+SERIALIZATION_SECONDS = Histogram("serialization_duration_seconds", "Time to serialize a response body to JSON.",
+                                  ["serializer"])
+
+_in_flight = HTTP_REQUESTS_IN_FLIGHT.labels()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency, status and concurrency of HTTP requests.
+    Requests are labelled with the path template of their route, e.g. /transactions/{transaction_id}.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            _in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], path).observe(duration)
+            HTTP_REQUESTS.labels(scope["method"], path, status_code).inc()
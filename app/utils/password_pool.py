@@ -0,0 +1,130 @@
+"""
+A bounded worker pool for bcrypt hashing and verification.
+
+bcrypt is deliberately slow (hundreds of milliseconds at the default cost) and releases the GIL while
+it works, so running it in a small thread pool keeps the event loop responsive and lets several hashes
+proceed in parallel. The pool size limits how many hashes run at once; calls beyond that wait in a
+queue whose depth is tracked, and which rejects new work once it reaches its limit.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+
+from app.utils import metrics
+from app.utils.config import get_settings
+
+T = TypeVar("T")
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+class PasswordHashPool:
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        """
+        Parameters:
+            max_workers (Optional[int]): The number of hashes run at once, PASSWORD_HASH_WORKERS by default.
+            max_queue (Optional[int]): The number of calls allowed to wait, PASSWORD_HASH_MAX_QUEUE by default.
+        """
+        settings = get_settings()
+        self.max_workers = settings.password_hash_workers if max_workers is None else max_workers
+        self.max_queue = settings.password_hash_max_queue if max_queue is None else max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, func: Callable[..., T], *args) -> "Future[T]":
+        """
+        Schedules func on the pool.
+
+        Raises:
+            PasswordPoolSaturated: If max_queue calls are already waiting for a worker.
+        """
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise PasswordPoolSaturated(f"{self.queued} password hashing calls are already queued")
+            self.queued += 1
+        return self._executor.submit(self._run, func, *args)
+
+    def _run(self, func: Callable[..., T], *args) -> T:
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            metrics.PASSWORD_HASH_SECONDS.labels(func.__name__).observe(time.perf_counter() - started)
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Runs func on the pool and blocks the calling thread until it completes.
+        """
+        return self.submit(func, *args).result()
+
+    async def run_async(self, func: Callable[..., T], *args) -> T:
+        """
+        Runs func on the pool and awaits its result without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_depth": self.queued,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+@functools.lru_cache(maxsize=None)
+def get_password_pool() -> PasswordHashPool:
+    """
+    Returns the password hashing pool of the process, created on first use.
+    """
+    return PasswordHashPool()
+
+
+def _collect_pool_metrics():
+    # Scraping must not create the pool, which is only built by the first hash.
+    if get_password_pool.cache_info().currsize:
+        stats = get_password_pool().stats()
+    else:
+        stats = {"queue_depth": 0, "in_flight": 0, "rejected": 0}
+    queue_depth = metrics.Gauge("password_hash_queue_depth", "bcrypt calls waiting for a worker.", registry=[])
+    queue_depth.set(stats["queue_depth"])
+    in_flight = metrics.Gauge("password_hash_in_flight", "bcrypt calls running.", registry=[])
+    in_flight.set(stats["in_flight"])
+    rejected = metrics.Counter("password_hash_rejected_total", "bcrypt calls rejected with a full queue.",
+                               registry=[])
+    rejected.inc(stats["rejected"])
+    return [queue_depth, in_flight, rejected]
+
+
+metrics.register_collector(_collect_pool_metrics)
+
+
+def shutdown_password_pool() -> None:
+    """
+    Waits for queued hashes and stops the pool if it was created.
+    """
+    if get_password_pool.cache_info().currsize:
+        get_password_pool().shutdown()
+        get_password_pool.cache_clear()
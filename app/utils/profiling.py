@@ -0,0 +1,257 @@
+"""
+Opt-in, per-request wall-clock profiling, stored as collapsed stacks for flame graphs.
+
+With PROFILING_ENABLED set, ProfilingMiddleware profiles a request when it carries the header
+X-Profile with the value of PROFILING_TOKEN, or at random with probability PROFILING_SAMPLE_RATE.
+PROFILING_PATHS, a comma-separated list of path prefixes such as /transactions/, limits profiling
+to matching requests. Without PROFILING_ENABLED the middleware is not installed at all.
+
+While profiled requests are in flight, a sampler thread looks at each of their asyncio tasks every
+PROFILING_INTERVAL_SECONDS. When the task is running, it records the Python stack of the event loop
+thread; when the task is suspended, it records the chain of coroutines it is awaiting through,
+ending in an "<await ...>" frame. Time spent on the database or bcrypt pools therefore appears
+under the coroutine that awaits it, and requests served concurrently do not pollute each other's
+profile.
+
+Profiles are kept in memory, at most PROFILING_MAX_PROFILES per process with the oldest dropped first,
+and at most PROFILING_MAX_SAMPLES samples each. They are listed and downloaded through the admin
+endpoints under /profiles, in the collapsed format read by flamegraph.pl and speedscope:
+
+    frame;frame;frame <samples>
+"""
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.schemas.profile import ProfileSummary
+from app.utils.config import get_settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+_frame_labels: Dict[object, str] = {}
+
+
+def _frame_label(code) -> str:
+    label = _frame_labels.get(code)
+    if label is None:
+        filename = os.path.join(*code.co_filename.replace("\\", "/").split("/")[-2:])
+        label = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+        _frame_labels[code] = label
+    return label
+
+
+class Profile:
+    def __init__(self, method: str, path: str, task: asyncio.Task, thread_id: int, max_samples: int):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = thread_id
+        self.max_samples = max_samples
+
+    def _running_stack(self, frame) -> List[str]:
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            if frame.f_code is _MIDDLEWARE_CODE:
+                stack.reverse()
+                return stack
+            frame = frame.f_back
+        # The loop switched tasks since the frames were read.
+        return []
+
+    def _awaiting_stack(self, task: asyncio.Task) -> List[str]:
+        stack = []
+        awaitable = task.get_coro()
+        recording = False
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                stack.append(f"<await {type(awaitable).__name__}>")
+                break
+            recording = recording or frame.f_code is _MIDDLEWARE_CODE
+            if recording:
+                stack.append(_frame_label(frame.f_code))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        return stack
+
+    def sample(self, frames: dict) -> None:
+        # The sampler may still hold a profile the store has already released.
+        task, loop = self.task, self.loop
+        if task is None or task.done() or self.samples >= self.max_samples:
+            return
+        if asyncio.current_task(loop) is task:
+            stack = self._running_stack(frames.get(self.thread_id))
+        else:
+            stack = self._awaiting_stack(task)
+        if stack:
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> ProfileSummary:
+        return ProfileSummary(
+            id=self.id,
+            method=self.method,
+            path=self.path,
+            route=self.route,
+            status_code=self.status_code,
+            started_at=self.started_at,
+            duration_ms=self.duration * 1000,
+            samples=self.samples,
+        )
+
+
+class Sampler:
+    """
+    Samples the active profiles from a daemon thread, which runs only while at least one is active.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: Dict[str, Profile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile) -> None:
+        with self._lock:
+            self._active[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.pop(profile.id, None)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                profiles = list(self._active.values())
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames)
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """
+    Keeps the most recent profiles, dropping the oldest beyond max_profiles.
+    """
+
+    def __init__(self, max_profiles: int):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        # The task and its frames are no longer needed once the request is over.
+        profile.task = None
+        profile.loop = None
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._profiles)
+            self._profiles.clear()
+            return count
+
+
+_store: Optional[ProfileStore] = None
+
+
+def get_store() -> ProfileStore:
+    global _store
+    if _store is None:
+        _store = ProfileStore(get_settings().profiling_max_profiles)
+    return _store
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the requests selected by header or sampling, see the module docstring.
+    Profiled responses carry the id of their profile in an X-Profile-Id header.
+    """
+
+    def __init__(self, app):
+        settings = get_settings()
+        self.app = app
+        self.sample_rate = settings.profiling_sample_rate
+        self.token = settings.profiling_token.encode() if settings.profiling_token else None
+        self.paths = settings.profiling_paths
+        self.max_samples = settings.profiling_max_samples
+        self.sampler = Sampler(settings.profiling_interval_seconds)
+
+    def _selected(self, scope) -> bool:
+        if scope["type"] != "http":
+            return False
+        if self.paths and not scope["path"].startswith(self.paths):
+            return False
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and value == self.token:
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], asyncio.current_task(), threading.get_ident(),
+                          self.max_samples)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, profile.id.encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        started = time.perf_counter()
+        self.sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.sampler.stop(profile)
+            profile.duration = time.perf_counter() - started
+            profile.route = getattr(scope.get("route"), "path", None)
+            get_store().add(profile)
+
+
+# Stacks are cut at the middleware, leaving out the server and event loop frames above it.
+_MIDDLEWARE_CODE = ProfilingMiddleware.__call__.__code__
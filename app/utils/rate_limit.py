@@ -0,0 +1,149 @@
+"""
+Token bucket rate limiting, used to throttle logins before any database or bcrypt work is done.
+
+A bucket holds up to `burst` tokens and regains `rate` tokens per second; every attempt takes one
+token and is rejected when the bucket is empty. A bucket is stored as the single time at which it will
+be full again (the GCRA formulation of a token bucket), so the in-memory backend keeps one float per
+key, and a bucket that has refilled completely is indistinguishable from a missing one and can be
+dropped. MemoryBackend drops them every RATE_LIMIT_SWEEP_INTERVAL_SECONDS and evicts the least
+recently used keys beyond RATE_LIMIT_MAX_KEYS; an evicted key merely starts again with a full bucket.
+
+Buckets are per worker process with MemoryBackend. Deployments running several workers, where a
+client could spread its attempts over them, can share the buckets by implementing RateLimitBackend
+on a shared store and installing it with set_backend at startup.
+
+Logins are limited per client IP (LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE) and per username
+(LOGIN_USERNAME_BURST, LOGIN_USERNAME_PER_MINUTE). Both tokens are taken before the password is
+checked, so concurrent guesses cannot slip past the limit; a successful login refills the username's
+bucket. The username limit holds however many IPs an attacker uses, at a price: once their failed
+attempts have emptied the bucket, the owner of the account is rejected too until it refills.
+A limit with a burst or a rate of 0 is disabled.
+The client IP is the peer address of the connection: behind a reverse proxy, run uvicorn with
+--proxy-headers so that it is taken from X-Forwarded-For.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+
+from app.utils import metrics
+from app.utils.config import get_settings
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    def consume(self, key: str, burst: int, rate: float) -> float:
+        """
+        Takes a token from the bucket of key.
+
+        Parameters:
+            key (str): The bucket, e.g. "login:ip:203.0.113.7".
+            burst (int): The capacity of the bucket.
+            rate (float): The tokens regained per second.
+
+        Returns:
+            float: 0 when a token was taken, otherwise the seconds until one is available.
+        """
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """
+        Refills the bucket of key.
+        """
+
+
+class MemoryBackend(RateLimitBackend):
+    def __init__(self, max_keys: int, sweep_interval: float, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        # The time at which each bucket is full again, least recently used first.
+        self._full_at: Dict[str, float] = {}
+        self._next_sweep = clock() + sweep_interval
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float) -> None:
+        self._full_at = {key: full_at for key, full_at in self._full_at.items() if full_at > now}
+        self._next_sweep = now + self.sweep_interval
+
+    def consume(self, key: str, burst: int, rate: float) -> float:
+        now = self._clock()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            full_at = max(self._full_at.pop(key, now), now) + 1 / rate
+            # The bucket is empty when it would take longer than a full refill to be full again.
+            wait = full_at - now - burst / rate
+            if wait > 0:
+                self._full_at[key] = full_at - 1 / rate
+                return wait
+            self._full_at[key] = full_at
+            if len(self._full_at) > self.max_keys:
+                del self._full_at[next(iter(self._full_at))]
+            return 0.0
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._full_at.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._full_at)
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_backend() -> RateLimitBackend:
+    """
+    Returns the backend holding the buckets, a MemoryBackend unless another one was installed.
+    """
+    global _backend
+    if _backend is None:
+        settings = get_settings()
+        _backend = MemoryBackend(settings.rate_limit_max_keys, settings.rate_limit_sweep_interval_seconds)
+    return _backend
+
+
+def set_backend(backend: RateLimitBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+RATE_LIMITED = metrics.Counter("rate_limit_rejections_total", "Attempts rejected by a rate limit.", ["limit"])
+_ip_rejections = RATE_LIMITED.labels("login_ip")
+_username_rejections = RATE_LIMITED.labels("login_username")
+
+
+def check_login(client_ip: Optional[str], username: str) -> float:
+    """
+    Takes a login attempt from the buckets of the client IP and of the username.
+
+    Returns:
+        float: 0 when the attempt may proceed, otherwise the seconds to wait before retrying.
+    """
+    settings = get_settings()
+    if not settings.login_rate_limit_enabled:
+        return 0.0
+    backend = get_backend()
+    if client_ip and settings.login_ip_burst > 0 and settings.login_ip_per_minute > 0:
+        wait = backend.consume(f"login:ip:{client_ip}", settings.login_ip_burst, settings.login_ip_per_minute / 60)
+        if wait:
+            _ip_rejections.inc()
+            return wait
+    if settings.login_username_burst > 0 and settings.login_username_per_minute > 0:
+        wait = backend.consume(f"login:user:{username}", settings.login_username_burst,
+                               settings.login_username_per_minute / 60)
+        if wait:
+            _username_rejections.inc()
+            return wait
+    return 0.0
+
+
+def reset_login(username: str) -> None:
+    """
+    Refills the username's bucket after a successful login, returning the token of the attempt and
+    forgiving earlier typos.
+    """
+    if get_settings().login_rate_limit_enabled:
+        get_backend().reset(f"login:user:{username}")
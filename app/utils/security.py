@@ -6,6 +6,9 @@ It utilizes the Passlib library for password hashing and the python-jose library
 """
 
 
+import functools
+import hashlib
+import time
 from passlib.context import CryptContext
 from typing import Optional, Any
 from datetime import datetime, timedelta
@@ -13,44 +16,90 @@ from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import HTTPException, status, Depends
 from app.models.user import User
-from app.schemas.user import UserInDB
+from app.schemas.user import UserInDB, Principal
 from app.schemas.token import TokenData
-from utilities import get_data
-from logger import setup_logger
+from app.utils import metrics
+from app.utils.concurrency import asyncify, run_in_db_pool
+from app.utils.password_pool import get_password_pool, PasswordPoolSaturated
+from app.utils.cache import TTLCache
+from app.utils.config import get_settings
+from app.utils.logger import setup_logger
 
-logger = setup_logger()
+logger = setup_logger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def get_pwd_context() -> CryptContext:
+    """
+    Returns the bcrypt context, built on first use with the configured cost.
+    Pinning min and max rounds to the configured cost makes needs_update() flag hashes made with any
+    other cost, so they are re-hashed on the next successful login.
+    """
+    rounds = get_settings().bcrypt_rounds
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
 
-SECRET_KEY = get_data("SECRET_KEY")
-ALGORITHM = get_data("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = get_data("ACCESS_TOKEN_EXPIRE_MINUTES")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+@functools.lru_cache(maxsize=None)
+def get_principal_cache() -> TTLCache[Principal]:
+    settings = get_settings()
+    return TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl_seconds)
+
+
+@functools.lru_cache(maxsize=None)
+def get_token_cache() -> TTLCache[dict]:
+    # Entries always carry the remaining lifetime of their token, the default ttl is never used.
+    return TTLCache(maxsize=get_settings().token_cache_size, ttl=0)
+
+
+metrics.register_cache("principal", get_principal_cache)
+metrics.register_cache("token", get_token_cache)
+
+
 def hash_plain_password(password: str) -> str:
     """
-    Hashes a plain text password using bcrypt
+    Hashes a plain text password using bcrypt on the password hashing pool.
     Parameters:
         password (str): The plain text password to hash.
     Returns:
         str: The hashed password.
+    Raises:
+        PasswordPoolSaturated: If too many hashing calls are already queued.
     """
     try:
-        return pwd_context.hash(password)
+        return get_password_pool().run(get_pwd_context().hash, password)
+    except PasswordPoolSaturated:
+        raise
     except Exception as e:
-        logger.error(f"Error when hashing password: {e}")
+        logger.error("Error when hashing password: %s", e)
 
 
 def verify_password(plain_text_password: str, hashed_password: str):
     """
-    Verify a password against a hashed version.
+    Verify a password against a hashed version on the password hashing pool.
     :param plain_text_password:
     :param hashed_password:
     :return:
     """
 
-    return pwd_context.verify(plain_text_password, hashed_password)
+    return get_password_pool().run(get_pwd_context().verify, plain_text_password, hashed_password)
+
+
+def _upgrade_password_hash(user: User, new_hash: Optional[str]) -> None:
+    """
+    Stores the re-hashed password produced by verify_and_update when the configured bcrypt cost changed.
+    """
+    if new_hash:
+        User.objects(id=user.id).update_one(set__hashed_password=new_hash)
+        logger.info("Password hash of user %s upgraded to %s rounds.", user.username, get_settings().bcrypt_rounds)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -68,23 +117,38 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + timedelta(minutes=15)
 
     to_encode.update({"exp": expire})
-    encode_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    settings = get_settings()
+    encode_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encode_jwt
 
 
 def decode_token(token: str) -> Optional[dict]:
     """
     Decodes a JWT token.
+    Verified claims are cached by token digest until the token's own expiry, so a bearer token
+    that is sent repeatedly has its signature checked only once.
     :param token: The JWT token to decode.
     :return: The decoded token data, or None if the token is invalid.
     """
 
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = get_token_cache().get(digest)
+    if payload is not None:
+        return dict(payload)
+
+    settings = get_settings()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
         return None
 
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        ttl = expires_at - time.time()
+        if ttl > 0:
+            get_token_cache().set(digest, dict(payload), ttl=ttl)
+    return payload
+
 
 def authenticate_user(username: str, password: str) -> bool | User:
     """
@@ -96,15 +160,71 @@ def authenticate_user(username: str, password: str) -> bool | User:
     user = User.objects(username=username).first()
     if not user:
         return False
-    if not verify_password(plain_text_password=password, hashed_password=user.hashed_password):
+    valid, new_hash = get_password_pool().run(get_pwd_context().verify_and_update, password, user.hashed_password)
+    if not valid:
         return False
+    _upgrade_password_hash(user, new_hash)
     return user
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
+async def authenticate_user_async(username: str, password: str) -> bool | User:
+    """
+    Authenticate a user by username and password without blocking the event loop.
+    The lookup runs on the database pool and bcrypt on the password hashing pool.
+    :param username:
+    :param password:
+    :return:
+    """
+    user = await run_in_db_pool(lambda: User.objects(username=username).first())
+    if not user:
+        return False
+    valid, new_hash = await get_password_pool().run_async(get_pwd_context().verify_and_update, password,
+                                                          user.hashed_password)
+    if not valid:
+        return False
+    if new_hash:
+        await run_in_db_pool(_upgrade_password_hash, user, new_hash)
+    return user
+
+
+def _load_principal(username: str) -> Optional[Principal]:
+    user = User.objects(username=username).only('id', 'username', 'is_admin').first()
+    if user is None:
+        return None
+    return Principal(id=str(user.id), username=user.username, is_admin=user.is_admin)
+
+
+_load_principal_async = asyncify(_load_principal)
+
+
+def invalidate_principal(*usernames: str) -> None:
+    """
+    Drops cached principals. Must be called after a user is updated or deleted.
+    Each worker process keeps its own cache, so other workers see the change once the entry expires.
+    """
+    for username in usernames:
+        get_principal_cache().invalidate(username)
+
+
+async def get_principal(username: str) -> Optional[Principal]:
+    """
+    Resolve a username to its principal, from the principal cache when possible.
+    :param username:
+    :return: The principal, or None if the user does not exist.
+    """
+    principal = get_principal_cache().get(username)
+    if principal is None:
+        principal = await _load_principal_async(username)
+        if principal is not None:
+            get_principal_cache().set(username, principal)
+    return principal
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
 
     """
     Retrieve the current user based on the JWT token.
+    Principals are cached for PRINCIPAL_CACHE_TTL_SECONDS, so repeated requests do not query the database.
 
     Parameters:
         token(str): The JWT token to authenticate.
@@ -113,7 +233,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
         HTTPException: 401 error if the token is invalid or the user does not exist.
 
     Returns:
-         UserInDB: The authenticated User object
+         Principal: The ID, username and admin flag of the authenticated user.
 
     """
 
@@ -125,19 +245,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
 
     try:
         payload = decode_token(token=token)
+        if payload is None:
+            raise credentials_exception
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = User.objects(username=token_data.username).first()
-    if user is None:
+    principal = await get_principal(token_data.username)
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
 
 
-async def get_current_active_admin(current_user: TokenData = Depends(get_current_user)):
+async def get_current_active_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,20 +1,11 @@
-from dotenv import load_dotenv
-from logger import setup_logger
+from app.utils.config import get_settings
 import os
 
-logger = setup_logger()
-
-load_dotenv()
-
 
 def get_data(key: str) -> str | None:
-    try:
-        value = os.getenv(key)
-        if value:
-            logger.info(f"{key} value fetched successfully.")
-        else:
-            logger.error(f"{key} value not found.")
-        return value
-    except Exception as e:
-        logger.error(f"Error while fetching {key} value: {e}")
-        return None
+    """
+    Returns an environment variable, after .env has been loaded.
+    Known settings should be read from app.utils.config.get_settings() instead.
+    """
+    get_settings()
+    return os.getenv(key)
@@ -0,0 +1,61 @@
+"""
+Per-user data version counters, bumped by every transaction write and used to derive HTTP ETags.
+
+Versions are tokens unique to this process: an expired or evicted version is replaced by a new
+token rather than restarted, so an ETag is never reused for different data. Each worker process keeps
+its own versions, so writes made through other workers are picked up once the version expires,
+after at most DATA_VERSION_TTL_SECONDS.
+"""
+
+import functools
+import itertools
+import threading
+import uuid
+from typing import Hashable, Iterable
+
+from app.utils import metrics
+from app.utils.cache import TTLCache
+from app.utils.config import get_settings
+
+# The version of data spanning every user, bumped by any write.
+ALL_USERS = "*"
+
+_PROCESS_TOKEN = uuid.uuid4().hex[:12]
+_counter = itertools.count(1)
+_counter_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def get_versions() -> TTLCache[str]:
+    settings = get_settings()
+    return TTLCache(maxsize=settings.data_version_cache_size, ttl=settings.data_version_ttl_seconds)
+
+
+metrics.register_cache("data_versions", get_versions)
+
+
+def _next_version() -> str:
+    with _counter_lock:
+        return f"{_PROCESS_TOKEN}.{next(_counter)}"
+
+
+def get_version(scope: Hashable) -> str:
+    """
+    Returns the current data version of a user id, or of ALL_USERS.
+    """
+    key = str(scope)
+    versions = get_versions()
+    version = versions.get(key)
+    if version is None:
+        version = _next_version()
+        versions.set(key, version)
+    return version
+
+
+def bump(scopes: Iterable[Hashable]) -> None:
+    """
+    Gives the users a new data version, along with ALL_USERS. Must be called after their transactions change.
+    """
+    versions = get_versions()
+    for key in {str(scope) for scope in scopes} | {ALL_USERS}:
+        versions.set(key, _next_version())
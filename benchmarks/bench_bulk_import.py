@@ -0,0 +1,60 @@
+"""
+Throughput (rows/sec) of crud_transactions.bulk_create_transactions for large imports,
+compared with inserting the same rows one by one through create_transaction.
+
+Usage:
+    python -m benchmarks.bench_bulk_import --uri mongodb://localhost:27017 --rows 100000
+    python -m benchmarks.bench_bulk_import --rows 100000      # mongomock stand-in
+"""
+
+import argparse
+import time
+
+from bson import ObjectId
+
+from app.crud import crud_transactions
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionCreate
+from benchmarks.common import connect_database, synthetic_transactions
+
+
+def import_rows(user_id, count: int):
+    for document in synthetic_transactions([user_id], count):
+        yield {
+            "type": document["type"],
+            "amount": document["amount"],
+            "description": document["description"],
+            "date": document["date"].isoformat(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB URI of a local mongod. Defaults to an in-memory mongomock.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[100, 1_000, 5_000])
+    parser.add_argument("--single-rows", type=int, default=2_000,
+                        help="Rows inserted one by one for the baseline.")
+    args = parser.parse_args()
+
+    connect_database(args.uri)
+    user_id = ObjectId()
+
+    started = time.perf_counter()
+    for row in import_rows(user_id, args.single_rows):
+        crud_transactions.create_transaction(user_id, TransactionCreate(**row))
+    elapsed = time.perf_counter() - started
+    print(f"{'one by one':<20} {args.single_rows:>8} rows  {args.single_rows / elapsed:>10.0f} rows/s")
+
+    for chunk_size in args.chunk_sizes:
+        Transaction._get_collection().delete_many({})
+        started = time.perf_counter()
+        result = crud_transactions.bulk_create_transactions(user_id, import_rows(user_id, args.rows),
+                                                           chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+        print(f"{f'bulk chunk={chunk_size}':<20} {result.inserted:>8} rows  {result.inserted / elapsed:>10.0f} rows/s"
+              f"  ({result.failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
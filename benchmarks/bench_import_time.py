@@ -0,0 +1,89 @@
+"""
+Cold-start cost of importing the application, as reported by python -X importtime.
+
+Each run imports the module in a fresh interpreter, so nothing is cached in sys.modules, and reports
+the median cumulative import time of the module and the modules that took longest on their own.
+Pass --baseline with another checkout of the repository, e.g. one made with
+`git worktree add /tmp/pfm-baseline <ref>`, to compare the two trees.
+
+Usage:
+    python -m benchmarks.bench_import_time --module app.main --runs 10
+    python -m benchmarks.bench_import_time --baseline /tmp/pfm-baseline
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(root: str, module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Imports module in a fresh interpreter with root on the path.
+    :return: The self and cumulative import time in microseconds of every module imported.
+    """
+    env = dict(os.environ, PYTHONPATH=root)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode:
+        raise RuntimeError(f"Importing {module} from {root} failed:\n{completed.stderr}")
+
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def measure(root: str, module: str, runs: int) -> Tuple[float, Dict[str, float]]:
+    """
+    :return: The median cumulative time of module and the median self time of every module, in milliseconds.
+    """
+    # The first run compiles the bytecode of the tree, which is not a cold start cost.
+    import_times(root, module)
+    totals: List[int] = []
+    self_times: Dict[str, List[int]] = defaultdict(list)
+    for _ in range(runs):
+        times = import_times(root, module)
+        totals.append(times[module][1])
+        for name, (self_us, _) in times.items():
+            self_times[name].append(self_us)
+    return (statistics.median(totals) / 1000,
+            {name: statistics.median(values) / 1000 for name, values in self_times.items()})
+
+
+def report(label: str, total: float, self_times: Dict[str, float], top: int, prefix: Optional[str]) -> None:
+    print(f"{label}: {total:.1f} ms")
+    names = [name for name in self_times if prefix is None or name.startswith(prefix)]
+    for name in sorted(names, key=self_times.get, reverse=True)[:top]:
+        print(f"    {self_times[name]:>8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="The number of slowest modules listed.")
+    parser.add_argument("--prefix", default=None, help="Only list modules starting with this, e.g. app.")
+    parser.add_argument("--baseline", default=None, help="Another checkout of the repository to compare with.")
+    args = parser.parse_args()
+
+    total, self_times = measure(ROOT, args.module, args.runs)
+    report(f"import {args.module}", total, self_times, args.top, args.prefix)
+    if args.baseline:
+        baseline_total, baseline_self_times = measure(os.path.abspath(args.baseline), args.module, args.runs)
+        report(f"import {args.module} (baseline)", baseline_total, baseline_self_times, args.top, args.prefix)
+        print(f"Cold start: {baseline_total - total:+.1f} ms faster ({baseline_total / total:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
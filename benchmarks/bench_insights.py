@@ -0,0 +1,137 @@
+"""
+Time to compute the /reports/insights metrics (rolling 30-day spend, month-over-month totals,
+category shares and a cash-flow forecast) over one user's history with the vectorized
+app.analytics.insights module, compared with a pure-Python loop over the transactions.
+Both start from the data in the shape the database returns it, so database time is excluded:
+one document per transaction for the Python loop, the per-month columns of
+crud_insights.load_transaction_arrays for the NumPy path.
+
+Usage:
+    python -m benchmarks.bench_insights --rows 10000 100000 1000000
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+
+from app.analytics import insights
+from benchmarks.common import synthetic_transactions
+
+CATEGORIES = [None, "groceries", "rent", "dining", "fuel", "utilities", "travel"]
+WINDOW = 30
+LOOKBACK = 90
+HORIZON = 30
+
+
+def synthetic_rows(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    rows = [
+        {"date": document["date"], "amount": document["amount"], "type": document["type"],
+         "category": rng.choice(CATEGORIES)}
+        for document in synthetic_transactions([ObjectId()], count, days=10 * 365, seed=seed)
+    ]
+    rows.sort(key=lambda row: row["date"])
+    return rows
+
+
+def pure_python(rows, as_of: datetime):
+    last_day = as_of.date()
+    daily_income, daily_expense = defaultdict(float), defaultdict(float)
+    monthly = defaultdict(lambda: [0.0, 0.0])
+    category_spend = defaultdict(float)
+    balance = 0.0
+    for row in rows:
+        day = row["date"].date()
+        month = (row["date"].year, row["date"].month)
+        if row["type"] == "income":
+            daily_income[day] += row["amount"]
+            monthly[month][0] += row["amount"]
+            balance += row["amount"]
+        else:
+            daily_expense[day] += row["amount"]
+            monthly[month][1] += row["amount"]
+            balance -= row["amount"]
+            if (last_day - day).days < WINDOW:
+                category_spend[row["category"]] += row["amount"]
+
+    rolling = []
+    for offset in range(WINDOW - 1, -1, -1):
+        end = last_day - timedelta(days=offset)
+        rolling.append(sum(daily_expense.get(end - timedelta(days=back), 0.0) for back in range(WINDOW)))
+
+    changes = []
+    ordered = sorted(monthly)
+    for previous, current in zip(ordered, ordered[1:]):
+        before = monthly[previous][1]
+        changes.append((monthly[current][1] - before) / before if before else None)
+
+    total = sum(category_spend.values())
+    shares = {category: spend / total for category, spend in category_spend.items()}
+
+    cumulative, running = [], 0.0
+    for offset in range(LOOKBACK - 1, -1, -1):
+        day = last_day - timedelta(days=offset)
+        running += daily_income.get(day, 0.0) - daily_expense.get(day, 0.0)
+        cumulative.append(running)
+    mean_x = (LOOKBACK - 1) / 2
+    mean_y = sum(cumulative) / LOOKBACK
+    daily_net = (sum((x - mean_x) * (y - mean_y) for x, y in enumerate(cumulative))
+                 / sum((x - mean_x) ** 2 for x in range(LOOKBACK)))
+    forecast = [balance + daily_net * day for day in range(1, HORIZON + 1)]
+    return rolling, changes, shares, forecast
+
+
+def to_columns(rows):
+    epoch = datetime(1970, 1, 1)
+    return (
+        [(row["date"] - epoch) // timedelta(milliseconds=1) for row in rows],
+        [row["amount"] for row in rows],
+        [row["type"] == "income" for row in rows],
+        [row["category"] for row in rows],
+    )
+
+
+def vectorized(columns, as_of: datetime):
+    arrays = insights.from_columns(*columns)
+    last_day = int(np.datetime64(as_of, "ms").astype(np.int64) // insights.MS_PER_DAY)
+    rolling = insights.rolling_spend(arrays, last_day, days=WINDOW, window=WINDOW)
+    _, _, expense = insights.monthly_totals(arrays)
+    changes = insights.relative_change(expense)
+    spend, share = insights.category_share(arrays, last_day - WINDOW + 1, last_day)
+    _, forecast = insights.forecast(arrays, last_day, LOOKBACK, HORIZON)
+    return rolling, changes, share, forecast
+
+
+def best_of(func, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for count in args.rows:
+        rows = synthetic_rows(count)
+        as_of = rows[-1]["date"]
+        python_time, (rolling, _, _, forecast) = best_of(lambda: pure_python(rows, as_of), args.repeat)
+        columns = to_columns(rows)
+        numpy_time, (vector_rolling, _, _, vector_forecast) = best_of(lambda: vectorized(columns, as_of), args.repeat)
+        consistent = np.allclose(rolling, vector_rolling) and np.allclose(forecast, vector_forecast)
+        print(f"{count:>9} rows  pure Python {python_time * 1000:>9.1f} ms  NumPy {numpy_time * 1000:>8.1f} ms  "
+              f"({python_time / numpy_time:.1f}x){'' if consistent else '  RESULTS DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
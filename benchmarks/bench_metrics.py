@@ -0,0 +1,67 @@
+"""
+Overhead of the metrics instrumentation: the cost of recording into a pre-bound histogram child and
+counter, and the requests/sec of a trivial endpoint served with and without MetricsMiddleware.
+
+Usage:
+    python -m benchmarks.bench_metrics --calls 1000000 --requests 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.utils import metrics
+
+
+def record_cost(calls: int) -> dict:
+    histogram = metrics.Histogram("benchmark_seconds", "Benchmark histogram.", ["label"], registry=[]).labels("x")
+    counter = metrics.Counter("benchmark_total", "Benchmark counter.", registry=[]).labels()
+    timings = {}
+    for name, record in (("histogram observe", lambda: histogram.observe(0.003)), ("counter inc", counter.inc)):
+        started = time.perf_counter()
+        for _ in range(calls):
+            record()
+        timings[name] = (time.perf_counter() - started) / calls
+    started = time.perf_counter()
+    for _ in range(calls):
+        pass
+    loop = (time.perf_counter() - started) / calls
+    return {name: elapsed - loop for name, elapsed in timings.items()}
+
+
+async def request_rate(instrumented: bool, requests: int) -> float:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(metrics.MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as http:
+        (await http.get("/items/1")).raise_for_status()
+        started = time.perf_counter()
+        for index in range(requests):
+            (await http.get(f"/items/{index}")).raise_for_status()
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+
+    for name, cost in record_cost(args.calls).items():
+        print(f"{name:<18} {cost * 1e9:>8.0f} ns/call")
+    plain = asyncio.run(request_rate(False, args.requests))
+    instrumented = asyncio.run(request_rate(True, args.requests))
+    print(f"GET without middleware {plain:>8.0f} req/s")
+    print(f"GET with middleware    {instrumented:>8.0f} req/s  ({(1 / instrumented - 1 / plain) * 1e6:+.1f} us/request)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Per-row cost of reading transactions through full mongoengine documents converted with
+to_mongo().to_dict() and re-validated into TransactionBase (the previous read path), compared with
+the projected as_pymongo() path that builds TransactionBase directly.
+
+Usage:
+    python -m benchmarks.bench_projection_reads --uri mongodb://localhost:27017 --rows 100000
+    python -m benchmarks.bench_projection_reads --rows 100000      # mongomock stand-in
+"""
+
+import argparse
+import time
+
+from bson import ObjectId
+
+from app.crud.crud_transactions import TRANSACTION_FIELDS
+from app.crud.projection import build_model
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionBase
+from benchmarks.common import connect_database, synthetic_transactions, insert_in_chunks
+
+
+def document_path():
+    return [TransactionBase(**transaction.to_mongo().to_dict()) for transaction in Transaction.objects()]
+
+
+def projected_path():
+    return [build_model(TransactionBase, row) for row in Transaction.objects().only(*TRANSACTION_FIELDS).as_pymongo()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB URI of a local mongod. Defaults to an in-memory mongomock.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    connect_database(args.uri)
+    insert_in_chunks(Transaction._get_collection(), synthetic_transactions([ObjectId() for _ in range(100)], args.rows))
+
+    for name, read in (("document + to_dict + validate", document_path), ("as_pymongo + only + construct", projected_path)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            rows = len(read())
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:<32} {rows:>8} rows  {best:>8.3f} s  {best / rows * 1e6:>8.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
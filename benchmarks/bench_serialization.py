@@ -0,0 +1,94 @@
+"""
+Serialization time of transaction lists through FastAPI's default response path (response_model
+validation, jsonable_encoder, json.dumps) compared with the FAST_JSON path (FastJSONResponse, orjson).
+Measured both for the serializer alone and for a GET request served in-process through httpx.
+
+Usage:
+    python -m benchmarks.bench_serialization --sizes 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+
+from app.crud.projection import build_model
+from app.schemas.transaction import TransactionBase
+from app.utils import serialization
+from app.utils.config import get_settings
+from benchmarks.common import synthetic_transactions
+
+
+def build_transactions(count: int) -> List[TransactionBase]:
+    """
+    Models built the way the CRUD layer builds them, from projected rows without validation.
+    """
+    return [
+        build_model(TransactionBase, {key: value for key, value in document.items() if key != "user"})
+        for document in synthetic_transactions([ObjectId()], count)
+    ]
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def request_time(transactions: List[TransactionBase], repeat: int) -> dict:
+    app = FastAPI()
+
+    @app.get("/default", response_model=List[TransactionBase])
+    async def default_path():
+        return transactions
+
+    @app.get("/fast", response_model=List[TransactionBase])
+    async def fast_path():
+        return serialization.response(transactions)
+
+    timings = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as http:
+        for path in ("/default", "/fast"):
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                (await http.get(path)).raise_for_status()
+                best = min(best, time.perf_counter() - started)
+            timings[path] = best
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if serialization.orjson is None:
+        print("orjson is not installed, the FAST_JSON path falls back to the standard serializer.")
+    os.environ["FAST_JSON"] = "true"
+    get_settings.cache_clear()
+
+    for size in args.sizes:
+        transactions = build_transactions(size)
+        encoder = best_of(lambda: json.dumps(jsonable_encoder(transactions)).encode(), args.repeat)
+        fast = best_of(lambda: serialization.dumps(transactions), args.repeat)
+        requests = asyncio.run(request_time(transactions, args.repeat))
+        print(f"{size:>8} rows  jsonable_encoder + json.dumps {encoder * 1000:>9.1f} ms  "
+              f"orjson {fast * 1000:>8.1f} ms  ({encoder / fast:.1f}x)")
+        print(f"{'':>8}       GET default response_model  {requests['/default'] * 1000:>9.1f} ms  "
+              f"FAST_JSON {requests['/fast'] * 1000:>5.1f} ms  ({requests['/default'] / requests['/fast']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
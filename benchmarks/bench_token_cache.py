@@ -0,0 +1,76 @@
+"""
+Cost of bearer token verification with and without the decoded-JWT cache in security.decode_token,
+as a micro-benchmark of decode_token and as requests/sec of an authenticated endpoint.
+Tokens are signed with the algorithm configured via ALGORITHM (HS256 by default here).
+
+Usage:
+    python -m benchmarks.bench_token_cache --calls 100000 --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.models.user import User
+from app.schemas.user import Principal
+from app.utils import security
+from app.utils.cache import TTLCache
+from app.utils.config import get_settings
+from benchmarks.common import connect_database
+
+
+def set_token_cache(enabled: bool) -> None:
+    cache = TTLCache(maxsize=get_settings().token_cache_size if enabled else 0, ttl=0)
+    security.get_token_cache = lambda: cache
+
+
+def decode_rate(token: str, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        security.decode_token(token)
+    return calls / (time.perf_counter() - started)
+
+
+async def request_rate(token: str, requests: int) -> float:
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(current_user: Principal = Depends(security.get_current_user)):
+        return current_user
+
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as http:
+        (await http.get("/me", headers=headers)).raise_for_status()
+        started = time.perf_counter()
+        for _ in range(requests):
+            (await http.get("/me", headers=headers)).raise_for_status()
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+
+    connect_database()
+    User(username="benchmark", email="benchmark@example.com", hashed_password="x").save()
+    token = security.create_access_token(data={"sub": "benchmark"})
+
+    print(f"Algorithm: {get_settings().algorithm}")
+    for enabled in (False, True):
+        set_token_cache(enabled)
+        label = "with cache" if enabled else "without cache"
+        print(f"decode_token {label:<14} {decode_rate(token, args.calls):>12.0f} calls/s")
+        print(f"GET /me      {label:<14} {asyncio.run(request_rate(token, args.requests)):>12.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Query latency of the per-user transaction listing with and without the compound indexes
+declared on the Transaction model.
+
+Usage:
+    python -m benchmarks.bench_transaction_indexes --uri mongodb://localhost:27017 --rows 1000000
+    python -m benchmarks.bench_transaction_indexes --rows 100000      # mongomock stand-in
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.models.transaction import Transaction
+from benchmarks.common import connect_database, synthetic_transactions, insert_in_chunks, time_calls, summarize, \
+    format_summary
+
+
+def build_queries(user_ids, seed: int = 7):
+    """
+    The filters issued by crud_transactions.get_user_transactions for typical /transactions/me calls.
+    """
+    rng = random.Random(seed)
+
+    def date_range():
+        start = datetime(2021, 1, 1) + timedelta(days=rng.randrange(3 * 365 - 31))
+        return {"$gte": start, "$lte": start + timedelta(days=30)}
+
+    return {
+        "user + date range": lambda: {"user": rng.choice(user_ids), "date": date_range()},
+        "user + type + date range": lambda: {"user": rng.choice(user_ids), "type": "expense", "date": date_range()},
+        "user + amount": lambda: {"user": rng.choice(user_ids), "amount": {"$gte": 100}},
+    }
+
+
+def run_queries(collection, queries, repeat: int, page_size: int):
+    results = {}
+    for name, make_filter in queries.items():
+        samples = time_calls(
+            lambda: list(collection.find(make_filter()).sort([("date", 1), ("_id", 1)]).limit(page_size + 1)),
+            repeat=repeat
+        )
+        results[name] = summarize(samples)
+    return results
+
+
+def winning_stage(collection, query_filter) -> str:
+    try:
+        plan = collection.find(query_filter).sort([("date", 1), ("_id", 1)]).explain()["queryPlanner"]["winningPlan"]
+    except Exception:
+        return "n/a"
+    while "inputStage" in plan and plan.get("stage") not in ("IXSCAN", "COLLSCAN"):
+        plan = plan["inputStage"]
+    return plan.get("stage", "n/a")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB URI of a local mongod. Defaults to an in-memory mongomock.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    connect_database(args.uri)
+    collection = Transaction._get_collection()
+    user_ids = [ObjectId() for _ in range(args.users)]
+
+    print(f"Seeding {args.rows} transactions for {args.users} users...")
+    insert_in_chunks(collection, synthetic_transactions(user_ids, args.rows))
+
+    collection.drop_indexes()
+    queries = build_queries(user_ids)
+    without_indexes = run_queries(collection, queries, args.repeat, args.page_size)
+    stage_without = winning_stage(collection, {"user": user_ids[0]})
+
+    Transaction.ensure_indexes()
+    with_indexes = run_queries(collection, queries, args.repeat, args.page_size)
+    stage_with = winning_stage(collection, {"user": user_ids[0]})
+
+    print(f"\nWithout indexes (plan: {stage_without})")
+    for name, summary in without_indexes.items():
+        print(format_summary(name, summary))
+    print(f"\nWith indexes (plan: {stage_with})")
+    for name, summary in with_indexes.items():
+        print(format_summary(name, summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Shared helpers for the benchmark scripts: database connection, synthetic data and timing.
+
+Benchmarks run against a local mongod when --uri is given, otherwise against an in-memory
+mongomock stand-in. Mongomock does not use indexes when planning queries, so latency numbers
+involving indexes are only meaningful against a real mongod.
+"""
+
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from bson import ObjectId
+from mongoengine import connect, disconnect
+
+DEFAULT_DB_NAME = "pfm_benchmark"
+
+
+def connect_database(uri: Optional[str] = None, db_name: str = DEFAULT_DB_NAME):
+    """
+    Connects mongoengine to the benchmark database, a real mongod if uri is given, mongomock otherwise.
+    :return: The pymongo database handle.
+    """
+    disconnect()
+    if uri:
+        client = connect(db=db_name, host=uri)
+    else:
+        import mongomock
+
+        client = connect(db=db_name, mongo_client_class=mongomock.MongoClient)
+    client.drop_database(db_name)
+    return client[db_name]
+
+
+def synthetic_transactions(user_ids: List[ObjectId], count: int, days: int = 3 * 365,
+                           seed: int = 42, start: datetime = datetime(2021, 1, 1)):
+    """
+    Yields raw transaction documents spread uniformly over users and dates.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        is_income = rng.random() < 0.2
+        yield {
+            "user": rng.choice(user_ids),
+            "type": "income" if is_income else "expense",
+            "amount": round(rng.uniform(500, 5000) if is_income else rng.uniform(1, 300), 2),
+            "description": rng.choice(["Salary", "Groceries", "Rent", "Coffee", "Fuel", "Cinema", "Utilities"]),
+            "date": start + timedelta(seconds=rng.randrange(days * 86400)),
+        }
+
+
+def insert_in_chunks(collection, documents, chunk_size: int = 10_000) -> int:
+    """
+    Inserts an iterable of documents with unordered insert_many calls of chunk_size rows.
+    :return: The number of inserted documents.
+    """
+    inserted = 0
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) == chunk_size:
+            inserted += len(collection.insert_many(chunk, ordered=False).inserted_ids)
+            chunk = []
+    if chunk:
+        inserted += len(collection.insert_many(chunk, ordered=False).inserted_ids)
+    return inserted
+
+
+def time_calls(func: Callable[[], object], repeat: int) -> List[float]:
+    """
+    Calls func repeat times and returns the duration of each call in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Summarizes per-call durations into ops/sec and latency percentiles in milliseconds.
+    """
+    total = sum(samples)
+    return {
+        "calls": len(samples),
+        "ops_per_sec": len(samples) / total if total else float("inf"),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def format_summary(name: str, summary: Dict[str, float]) -> str:
+    return (f"{name:<40} {summary['ops_per_sec']:>10.1f} ops/s  p50 {summary['p50_ms']:>8.3f} ms  "
+            f"p95 {summary['p95_ms']:>8.3f} ms  p99 {summary['p99_ms']:>8.3f} ms")
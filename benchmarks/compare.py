@@ -0,0 +1,94 @@
+"""
+Compares two result files of benchmarks.suite and flags regressions.
+
+A benchmark regresses when its ops/sec drop, or its p95 latency or peak memory grow, by more than
+--threshold percent. The exit status is 1 when any benchmark regresses, so the comparison can gate CI.
+Runs are only comparable with the same parameters; differing ones are listed before the table.
+
+Usage:
+    python -m benchmarks.compare results/main.json results/branch.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+# (metric, True when higher is better)
+METRICS = (("ops_per_sec", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False),
+           ("peak_memory_kib", False))
+# Metrics that decide whether a benchmark regressed, the others are informative.
+GATED = ("ops_per_sec", "p95_ms", "peak_memory_kib")
+PARAMETERS = ("backend", "users", "transactions", "repeat", "slow_repeat", "bcrypt_rounds", "seed")
+
+
+def change(baseline: float, candidate: float) -> float:
+    """
+    The relative change from baseline to candidate in percent.
+    """
+    if not baseline:
+        return 0.0 if not candidate else float("inf")
+    return (candidate - baseline) / baseline * 100
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> List[dict]:
+    """
+    :return: One row per benchmark present in both runs, with the change of every metric and
+    the gated metrics that regressed beyond the threshold.
+    """
+    rows = []
+    for name, base in baseline["results"].items():
+        new = candidate["results"].get(name)
+        if new is None:
+            continue
+        changes: Dict[str, float] = {}
+        regressions = []
+        for metric, higher_is_better in METRICS:
+            if metric not in base or metric not in new:
+                continue
+            changes[metric] = change(base[metric], new[metric])
+            worse = -changes[metric] if higher_is_better else changes[metric]
+            if metric in GATED and worse > threshold:
+                regressions.append(metric)
+        rows.append({"name": name, "baseline": base, "candidate": new, "changes": changes,
+                     "regressions": regressions})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Tolerated change in percent.")
+    args = parser.parse_args()
+
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+
+    for parameter in PARAMETERS:
+        before, after = baseline["meta"].get(parameter), candidate["meta"].get(parameter)
+        if before != after:
+            print(f"Warning: {parameter} differs between the runs ({before} vs {after}).")
+    missing = sorted(set(baseline["results"]) ^ set(candidate["results"]))
+    if missing:
+        print(f"Only in one of the runs: {', '.join(missing)}")
+
+    print(f"{'benchmark':<40} {'ops/s':>21} {'p50':>9} {'p95':>9} {'p99':>9} {'peak mem':>9}")
+    rows = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        changes = row["changes"]
+        ops = f"{row['baseline']['ops_per_sec']:>9.1f} -> {row['candidate']['ops_per_sec']:>9.1f}"
+        cells = "".join(f" {changes[metric]:>+8.1f}%" if metric in changes else f" {'':>9}"
+                        for metric, _ in METRICS[1:])
+        flag = f"  REGRESSION ({', '.join(row['regressions'])})" if row["regressions"] else ""
+        print(f"{row['name']:<40} {ops} {changes['ops_per_sec']:>+6.1f}%{cells}{flag}")
+
+    regressed = [row["name"] for row in rows if row["regressions"]]
+    if regressed:
+        print(f"{len(regressed)} of {len(rows)} benchmarks regressed by more than {args.threshold:g}%.")
+        sys.exit(1)
+    print(f"No regression beyond {args.threshold:g}% in {len(rows)} benchmarks.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Latency under concurrent load of a request handler calling the synchronous crud layer inline
+("before") versus awaiting the thread-pool backed async crud layer ("after").
+
+Both handlers are served in-process through an ASGI transport from a single event loop,
+like one uvicorn worker. --db-latency-ms adds a simulated network round trip to each query,
+which is needed to see the effect against the in-memory mongomock stand-in.
+
+Usage:
+    python -m benchmarks.load_test_async_crud --clients 200 --requests 2000 --rate 400 --db-latency-ms 5
+    python -m benchmarks.load_test_async_crud --uri mongodb://localhost:27017 --clients 200
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.crud import crud_user, async_crud_user
+from app.models.user import User
+from benchmarks.common import connect_database, summarize
+
+
+def build_app(db_latency: float) -> FastAPI:
+    get_user_by_username = crud_user.get_user_by_username
+    if db_latency:
+        def get_user_by_username(username: str, _query=crud_user.get_user_by_username):
+            time.sleep(db_latency)
+            return _query(username)
+
+        crud_user.get_user_by_username = get_user_by_username
+        async_crud_user.get_user_by_username = async_crud_user.asyncify(get_user_by_username)
+
+    app = FastAPI()
+
+    @app.get("/blocking/{username}")
+    async def blocking(username: str):
+        return get_user_by_username(username)
+
+    @app.get("/offloaded/{username}")
+    async def offloaded(username: str):
+        return await async_crud_user.get_user_by_username(username)
+
+    return app
+
+
+async def run_load(app: FastAPI, path: str, clients: int, total_requests: int, rate: float):
+    """
+    Sends total_requests at a fixed arrival rate from up to clients concurrent connections.
+    Latency is measured from each request's scheduled send time, so time spent waiting
+    for a blocked event loop is counted instead of hidden.
+    """
+    samples = []
+    next_request = 0
+
+    async def client(http: httpx.AsyncClient, started: float):
+        nonlocal next_request
+        while next_request < total_requests:
+            scheduled = started + next_request / rate
+            next_request += 1
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            response = await http.get(path)
+            samples.append(time.perf_counter() - scheduled)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http, started) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return samples, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB URI of a local mongod. Defaults to an in-memory mongomock.")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--rate", type=float, default=400.0, help="Target arrival rate in requests/sec.")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    connect_database(args.uri)
+    User(username="benchmark", email="benchmark@example.com", hashed_password="x").save()
+    app = build_app(args.db_latency_ms / 1000)
+
+    for name in ("blocking", "offloaded"):
+        samples, elapsed = asyncio.run(run_load(app, f"/{name}/benchmark", args.clients, args.requests, args.rate))
+        summary = summarize(samples)
+        print(f"{name:<10} {args.clients} clients  {len(samples) / elapsed:>8.1f} req/s  p50 {summary['p50_ms']:>9.2f} ms"
+              f"  p99 {summary['p99_ms']:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
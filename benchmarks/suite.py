@@ -0,0 +1,193 @@
+"""
+Reproducible benchmark suite of the CRUD, authentication and report hot paths.
+
+Seeds a database with --users synthetic users and --transactions transactions from a fixed seed,
+builds the rollups and balance checkpoints the reports read, then times each benchmark and reports
+ops/sec, p50/p95/p99 latency and the peak memory allocated by a single call. Peak memory is measured
+with tracemalloc in a separate call, so tracing does not slow down the timed calls.
+
+Results are written as JSON with --output, along with the parameters and environment of the run,
+and two result files are compared with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.suite --output results/main.json
+    python -m benchmarks.suite --uri mongodb://localhost:27017 --users 1000 --transactions 200000
+    python -m benchmarks.suite --only crud_transactions. --repeat 50
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from bson import ObjectId
+
+from app.crud import crud_balances, crud_reports, crud_rollups, crud_transactions, crud_user
+from app.database import database
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.utils import security
+from app.utils.config import get_settings
+from benchmarks.common import (connect_database, format_summary, insert_in_chunks, summarize, synthetic_transactions,
+                               time_calls)
+
+PASSWORD = "benchmark-password"
+SEED = 42
+AS_OF = datetime(2024, 1, 1)
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # Called with a random generator seeded for this benchmark, so runs of a subset pick the same inputs.
+    func: Callable[[random.Random], object]
+    repeat: int
+
+
+def seed_database(users: int, transactions: int) -> List[ObjectId]:
+    """
+    Inserts the synthetic users, all with PASSWORD, and their transactions, then builds the
+    rollups and balance checkpoints.
+    :return: The ids of the users.
+    """
+    hashed_password = security.hash_plain_password(PASSWORD)
+    user_ids = [ObjectId() for _ in range(users)]
+    User._get_collection().insert_many([
+        {"_id": user_id, "username": f"user-{index}", "email": f"user-{index}@example.com",
+         "hashed_password": hashed_password, "is_admin": False}
+        for index, user_id in enumerate(user_ids)
+    ])
+    insert_in_chunks(Transaction._get_collection(), synthetic_transactions(user_ids, transactions, seed=SEED))
+    crud_rollups.rebuild_rollups()
+    crud_balances.build_all_checkpoints(now=AS_OF)
+    return user_ids
+
+
+def build_benchmarks(user_ids: List[ObjectId], repeat: int, slow_repeat: int) -> List[Benchmark]:
+    transaction_ids = [row["_id"] for row in Transaction._get_collection().find({}, {"_id": 1}).limit(10_000)]
+    created = iter(range(sys.maxsize))
+
+    def create_user(rng: random.Random):
+        index = next(created)
+        return crud_user.create_user(UserCreate(username=f"new-user-{index}", email=f"new-user-{index}@example.com",
+                                                password=PASSWORD))
+
+    def username(rng: random.Random) -> str:
+        return f"user-{rng.randrange(len(user_ids))}"
+
+    benchmarks = [
+        Benchmark("crud_user.create_user", create_user, slow_repeat),
+        Benchmark("security.authenticate_user", lambda rng: security.authenticate_user(username(rng), PASSWORD),
+                  slow_repeat),
+        Benchmark("crud_user.get_user_by_username", lambda rng: crud_user.get_user_by_username(username(rng)), repeat),
+        Benchmark("crud_transactions.get_transaction_by_id",
+                  lambda rng: crud_transactions.get_transaction_by_id(str(rng.choice(transaction_ids))), repeat),
+        Benchmark("crud_transactions.get_user_transactions",
+                  lambda rng: crud_transactions.get_user_transactions(rng.choice(user_ids)), repeat),
+        Benchmark("crud_transactions.get_all_transactions", lambda rng: crud_transactions.get_all_transactions(),
+                  slow_repeat),
+        Benchmark("crud_reports.get_summary",
+                  lambda rng: crud_reports.get_summary('month', user_id=rng.choice(user_ids)), repeat),
+        Benchmark("crud_rollups.get_dashboard", lambda rng: crud_rollups.get_dashboard(rng.choice(user_ids)), repeat),
+        Benchmark("crud_balances.get_balance_as_of",
+                  lambda rng: crud_balances.get_balance_as_of(rng.choice(user_ids), AS_OF), repeat),
+    ]
+    try:
+        from app.crud import crud_insights
+    except ImportError:
+        print("numpy is not installed, skipping crud_insights.get_insights.")
+    else:
+        benchmarks.append(Benchmark("crud_insights.get_insights",
+                                    lambda rng: crud_insights.get_insights(rng.choice(user_ids), as_of=AS_OF),
+                                    repeat))
+    return benchmarks
+
+
+def peak_memory_kib(func: Callable[[], object]) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB URI of a local mongod. Defaults to an in-memory mongomock.")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per benchmark.")
+    parser.add_argument("--slow-repeat", type=int, default=10,
+                        help="Calls of the bcrypt and full-collection benchmarks.")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None,
+                        help="Overrides BCRYPT_ROUNDS, e.g. 4 for quick runs. Results are only comparable "
+                             "between runs with the same cost.")
+    parser.add_argument("--only", nargs="+", default=None, help="Run the benchmarks whose name starts with these.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    if args.bcrypt_rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+        get_settings.cache_clear()
+
+    connect_database(args.uri)
+    database.ensure_indexes()
+    user_ids = seed_database(args.users, args.transactions)
+
+    results: Dict[str, dict] = {}
+    for benchmark in build_benchmarks(user_ids, args.repeat, args.slow_repeat):
+        if args.only and not benchmark.name.startswith(tuple(args.only)):
+            continue
+        rng = random.Random(f"{SEED}:{benchmark.name}")
+        call = functools.partial(benchmark.func, rng)
+        call()
+        summary = summarize(time_calls(call, benchmark.repeat))
+        summary["peak_memory_kib"] = peak_memory_kib(call)
+        results[benchmark.name] = summary
+        print(f"{format_summary(benchmark.name, summary)}  peak {summary['peak_memory_kib']:>9.1f} KiB")
+
+    if args.output:
+        report = {
+            "meta": {
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "backend": "mongod" if args.uri else "mongomock",
+                "users": args.users,
+                "transactions": args.transactions,
+                "repeat": args.repeat,
+                "slow_repeat": args.slow_repeat,
+                "bcrypt_rounds": get_settings().bcrypt_rounds,
+                "seed": SEED,
+            },
+            "results": results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
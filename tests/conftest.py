@@ -0,0 +1,44 @@
+"""
+Shared fixtures: every test runs against a fresh in-memory mongomock database.
+"""
+
+import os
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import mongomock
+import pytest
+from mongoengine import connect, disconnect
+
+from app.models.user import User
+from app.utils import http_cache, security, versions
+
+TEST_DB_NAME = "pfm_test"
+
+
+@pytest.fixture(autouse=True)
+def database():
+    disconnect()
+    client = connect(db=TEST_DB_NAME, mongo_client_class=mongomock.MongoClient)
+    yield client[TEST_DB_NAME]
+    client.drop_database(TEST_DB_NAME)
+    disconnect()
+
+
+@pytest.fixture(autouse=True)
+def caches():
+    """
+    Gives each test empty principal, token, data version and response caches.
+    """
+    for get_cache in (security.get_principal_cache, security.get_token_cache, versions.get_versions,
+                      http_cache.get_response_cache):
+        get_cache.cache_clear()
+    yield
+
+
+@pytest.fixture
+def user() -> User:
+    return User(username="alice", email="alice@example.com", hashed_password="not-a-hash").save()
@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from app.crud import crud_balances
+from app.models.balance import BalanceCheckpoint
+from app.models.user import User
+
+
+def checkpoint(user, month: int) -> None:
+    BalanceCheckpoint(user=user, as_of=datetime(2024, month, 1), balance=0.0).save()
+
+
+def fields(user, date, amount=25.0, transaction_type="expense", **extra) -> dict:
+    return {"user": user.id, "date": date, "type": transaction_type, "amount": amount, **extra}
+
+
+@pytest.fixture
+def checkpoints(user):
+    for month in range(2, 6):
+        checkpoint(user, month)
+    return user
+
+
+def remaining(user):
+    return [checkpoint.as_of.month for checkpoint in BalanceCheckpoint.objects(user=user.id).order_by("as_of")]
+
+
+def test_removal_and_addition_of_the_same_transaction_cancel_out(checkpoints):
+    date = datetime(2024, 2, 10)
+    changes = [(fields(checkpoints, date, category="old"), -1), (fields(checkpoints, date, category="new"), 1)]
+
+    assert crud_balances.invalidate_checkpoints(changes) == 0
+    assert remaining(checkpoints) == [2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("changed", [{"amount": 30.0}, {"transaction_type": "income"}, {"date": datetime(2024, 2, 11)}])
+def test_changing_what_the_balance_depends_on_invalidates(checkpoints, changed):
+    before = fields(checkpoints, datetime(2024, 2, 10))
+    after = fields(checkpoints, **{"date": datetime(2024, 2, 10), **changed})
+
+    assert crud_balances.invalidate_checkpoints([(before, -1), (after, 1)]) == 3
+    assert remaining(checkpoints) == [2]
+
+
+def test_the_earliest_net_change_of_each_user_decides(checkpoints, user):
+    other = User(username="bob", email="bob@example.com", hashed_password="not-a-hash").save()
+    for month in range(2, 6):
+        checkpoint(other, month)
+    moved = fields(checkpoints, datetime(2024, 1, 5))
+    changes = [
+        (moved, -1), (moved, 1),
+        (fields(checkpoints, datetime(2024, 4, 20)), 1),
+        (fields(checkpoints, datetime(2024, 3, 2)), -1),
+        (fields(other, datetime(2024, 4, 15)), 1),
+        (fields(checkpoints, None), 1),
+    ]
+
+    assert crud_balances.invalidate_checkpoints(changes) == 3
+    assert remaining(checkpoints) == [2, 3]
+    assert remaining(other) == [2, 3, 4]
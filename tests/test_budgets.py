@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+
+from app.crud import crud_budgets, crud_transactions
+from app.models.budget import BudgetSpend
+from app.schemas.budget import BudgetCreate
+from app.schemas.transaction import TransactionCreate
+
+NOW = datetime(2024, 3, 15)
+
+
+def expense(amount: float, date: datetime = datetime(2024, 3, 12)) -> TransactionCreate:
+    return TransactionCreate(type="expense", amount=amount, description="Groceries", date=date, category="food")
+
+
+def food_budget(user, period="monthly"):
+    return crud_budgets.create_budget(user.id, BudgetCreate(category="food", period=period, limit=100), now=NOW)
+
+
+@pytest.mark.parametrize("period, key", [("weekly", "2024-W11"), ("monthly", "2024-03"), ("yearly", "2024")])
+def test_period_start_inverts_period_key(period, key):
+    assert crud_budgets.period_key(period, NOW) == key
+    assert crud_budgets.period_key(period, crud_budgets.period_start(period, key)) == key
+    assert crud_budgets.period_start(period, key) == crud_budgets.period_bounds(period, NOW)[0]
+
+
+def test_create_budget_seeds_from_existing_expenses(user):
+    crud_transactions.create_transaction(user.id, expense(30.0))
+    crud_transactions.create_transaction(user.id, expense(99.0, date=datetime(2024, 2, 10)))
+
+    assert food_budget(user).spent == 30.0
+    crud_transactions.create_transaction(user.id, expense(20.0))
+
+    assert crud_budgets.get_budget_statuses(user.id, now=NOW)[0].spent == 50.0
+    assert crud_budgets.verify_budget_spend() == []
+
+
+def test_expense_written_while_seeding_is_not_lost(user, monkeypatch):
+    crud_transactions.create_transaction(user.id, expense(30.0))
+    spent_in_period = crud_budgets._spent_in_period
+    calls = []
+
+    def racing_spent_in_period(*args):
+        spent = spent_in_period(*args)
+        if not calls:
+            # Written after the seed was counted but before it is stored, its $inc lands first.
+            crud_transactions.create_transaction(user.id, expense(20.0))
+        calls.append(spent)
+        return spent
+
+    monkeypatch.setattr(crud_budgets, "_spent_in_period", racing_spent_in_period)
+    food_budget(user)
+
+    assert BudgetSpend.objects(user=user.id).first().spent == 50.0
+    assert crud_budgets.verify_budget_spend() == []
+
+
+@pytest.mark.parametrize("period", ["weekly", "monthly", "yearly"])
+def test_verify_reports_and_repair_corrects_drift(user, period):
+    crud_transactions.create_transaction(user.id, expense(30.0))
+    food_budget(user, period)
+    BudgetSpend.objects(user=user.id).update_one(inc__spent=-12.5)
+
+    drifts = crud_budgets.verify_budget_spend()
+    assert [(drift.period, drift.expected_spent, drift.actual_spent) for drift in drifts] == [(period, 30.0, 17.5)]
+
+    assert crud_budgets.repair_budget_spend() == 1
+    assert crud_budgets.verify_budget_spend() == []
+    assert BudgetSpend.objects(user=user.id).first().spent == 30.0
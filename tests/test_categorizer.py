@@ -0,0 +1,115 @@
+import pytest
+from fastapi import HTTPException
+
+from app.crud import crud_categories, crud_transactions
+from app.models.transaction import Transaction
+from app.schemas.category import CategoryRuleCreate
+from app.utils.categorizer import Categorizer, Rule, validate_rule
+
+
+def test_higher_priority_wins_whatever_the_order():
+    categorizer = Categorizer([Rule("food", "coffee"), Rule("treats", "coffee shop", priority=5)])
+
+    assert categorizer.categorize("Coffee Shop Downtown") == "treats"
+    assert categorizer.categorize("Coffee beans") == "food"
+
+
+def test_ties_are_won_by_the_earlier_rule():
+    assert Categorizer([Rule("first", "coffee"), Rule("second", "coffee")]).categorize("coffee") == "first"
+    assert Categorizer([Rule("first", "cof+ee", is_regex=True),
+                        Rule("second", "coffee", is_regex=True)]).categorize("coffee") == "first"
+
+
+@pytest.mark.parametrize("keyword_priority, regex_priority, expected", [
+    (1, 0, "keyword"),
+    (0, 1, "regex"),
+    (0, 0, "keyword"),
+])
+def test_keyword_and_regex_rules_compete_by_priority(keyword_priority, regex_priority, expected):
+    categorizer = Categorizer([
+        Rule("keyword", "uber", priority=keyword_priority),
+        Rule("regex", r"uber\s+eats", is_regex=True, priority=regex_priority),
+    ])
+
+    assert categorizer.categorize("UBER EATS order 42") == expected
+
+
+def test_regex_ranks_beyond_ten_rules():
+    # The winning rule is read from the name of its empty group, r0 to r11 here.
+    rules = [Rule(f"category-{index}", f"token{index}\\b", is_regex=True, priority=-index) for index in range(12)]
+    categorizer = Categorizer(rules)
+
+    assert categorizer.categorize("token11 token1") == "category-1"
+    assert categorizer.categorize("token11") == "category-11"
+    assert categorizer.categorize("token10 and token11") == "category-10"
+
+
+def test_keywords_match_whole_words_case_insensitively():
+    categorizer = Categorizer([Rule("bars", "bar"), Rule("transport", "city bus")])
+
+    assert categorizer.categorize("Corner BAR, Main St.") == "bars"
+    assert categorizer.categorize("Barn supplies") is None
+    assert categorizer.categorize("CITY  BUS ticket") == "transport"
+    assert categorizer.categorize("city center bus") is None
+    assert categorizer.categorize("") is None
+    assert categorizer.categorize(None) is None
+
+
+def test_regex_matches_anywhere_in_the_description():
+    categorizer = Categorizer([Rule("rent", r"rent\s+\d{4}-\d{2}", is_regex=True)])
+
+    assert categorizer.categorize("Monthly RENT 2024-03 payment") == "rent"
+    assert categorizer.categorize("line one\nrent 2024-03") == "rent"
+    assert categorizer.categorize("rented car") is None
+
+
+@pytest.mark.parametrize("pattern, is_regex", [
+    ("(unclosed", True),
+    ("(coffee|tea)", True),
+    ("*", True),
+    ("!!!", False),
+    ("", False),
+])
+def test_invalid_patterns_are_rejected(pattern, is_regex):
+    with pytest.raises(ValueError):
+        validate_rule(pattern, is_regex)
+
+
+def test_non_capturing_groups_are_accepted():
+    validate_rule("(?:coffee|tea)", True)
+
+
+def test_create_rule_rejects_invalid_patterns(user):
+    with pytest.raises(HTTPException) as error:
+        crud_categories.create_rule(user.id, CategoryRuleCreate(category="drinks", pattern="(tea", is_regex=True))
+
+    assert error.value.status_code == 400
+    assert crud_categories.get_rules(user.id) == []
+
+
+def test_rule_changes_invalidate_the_cached_categorizer(user):
+    assert len(crud_categories.get_categorizer(user.id)) == 0
+
+    rule = crud_categories.create_rule(user.id, CategoryRuleCreate(category="drinks", pattern="coffee"))
+    assert crud_categories.get_categorizer(user.id).categorize("coffee") == "drinks"
+
+    crud_categories.create_rule(user.id, CategoryRuleCreate(category="treats", pattern="coffee", priority=1))
+    assert crud_categories.get_categorizer(user.id).categorize("coffee") == "treats"
+
+    crud_categories.delete_rule(user.id, str(rule.id))
+    assert len(crud_categories.get_categorizer(user.id)) == 1
+
+
+def test_imports_are_categorized_with_the_current_rules(user):
+    crud_categories.create_rule(user.id, CategoryRuleCreate(category="drinks", pattern="coffee"))
+    rows = [
+        {"type": "expense", "amount": 3.0, "description": "Coffee", "date": "2024-03-01T08:00:00"},
+        {"type": "expense", "amount": 3.0, "description": "Coffee", "date": "2024-03-02T08:00:00",
+         "category": "kept"},
+        {"type": "expense", "amount": 9.0, "description": "Books", "date": "2024-03-03T08:00:00"},
+    ]
+
+    crud_transactions.bulk_create_transactions(user.id, rows)
+
+    assert [row.get("category") for row in Transaction._get_collection().find().sort("date", 1)] \
+        == ["drinks", "kept", None]
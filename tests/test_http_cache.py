@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.transaction import Transaction
+from app.crud import crud_budgets, crud_rollups
+from app.schemas.budget import BudgetCreate
+from app.utils import security, versions
+
+
+@pytest.fixture
+def client(user) -> TestClient:
+    token = security.create_access_token(data={"sub": user.username})
+    return TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+
+def create(client: TestClient, amount: float, date: str) -> dict:
+    response = client.post("/transactions/", json={"type": "income", "amount": amount, "date": date})
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.mark.parametrize("path", ["/reports/balance", "/transactions/me"])
+def test_matching_etag_is_answered_with_304(client, path):
+    create(client, 100.0, "2024-03-01T00:30:00+02:00")
+    response = client.get(path)
+    assert response.status_code == 200
+
+    revalidated = client.get(path, headers={"If-None-Match": response.headers["ETag"]})
+
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.parametrize("date", ["2024-03-01T00:30:00", "2024-03-01T00:30:00+02:00"])
+def test_writes_change_the_etag(client, date):
+    create(client, 100.0, date)
+    first = client.get("/reports/balance")
+
+    create(client, 50.0, date)
+    second = client.get("/reports/balance", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()["balance"] == 150.0
+
+
+def test_deletes_change_the_etag(client):
+    create(client, 100.0, "2024-03-01T00:30:00+02:00")
+    first = client.get("/reports/balance")
+
+    transaction_id = Transaction._get_collection().find_one()["_id"]
+    assert client.delete(f"/transactions/{transaction_id}").status_code == 200
+    second = client.get("/reports/balance", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.json()["balance"] == 0.0
+
+
+def test_versions_are_bumped_after_the_derived_data(client, user, monkeypatch):
+    crud_budgets.create_budget(user.id, BudgetCreate(category="food", period="monthly", limit=100))
+    seen_at_bump = []
+    bump = versions.bump
+
+    def checking_bump(scopes):
+        # What a report request arriving right after the bump would read and cache under the new ETag.
+        seen_at_bump.append((crud_rollups.get_balance(user.id).balance,
+                             crud_budgets.get_budget_statuses(user.id)[0].spent))
+        bump(scopes)
+
+    monkeypatch.setattr(versions, "bump", checking_bump)
+    response = client.post("/transactions/", json={"type": "expense", "amount": 30.0, "category": "food",
+                                                   "date": datetime.utcnow().isoformat()})
+
+    assert response.status_code == 201
+    assert seen_at_bump == [(-30.0, 30.0)]
@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from app.crud import crud_transactions
+from app.importers import statement
+from app.models.transaction import Transaction
+
+STATEMENT = """date,description,amount
+2024-03-05,Coffee Shop,-25.00
+2024-03-05,Coffee Shop,25.00
+2024-03-06,Salary,1000.00
+"""
+
+
+def test_refund_is_not_a_duplicate_of_the_purchase(user):
+    result = statement.import_statement(user.id, io.StringIO(STATEMENT), 'csv')
+
+    assert (result.inserted, result.duplicates, result.failed) == (3, 0, 0)
+    rows = Transaction._get_collection().find({'description': 'Coffee Shop'})
+    assert sorted((row['type'], row['amount']) for row in rows) == [('expense', 25.0), ('income', 25.0)]
+
+
+def test_importing_a_statement_twice_is_idempotent(user):
+    statement.import_statement(user.id, io.StringIO(STATEMENT), 'csv')
+
+    result = statement.import_statement(user.id, io.StringIO(STATEMENT), 'csv')
+
+    assert (result.inserted, result.duplicates, result.failed) == (0, 3, 0)
+    assert Transaction.objects(user=user.id).count() == 3
+
+
+def test_rehash_restores_deduplication_of_earlier_imports(user):
+    statement.import_statement(user.id, io.StringIO(STATEMENT), 'csv')
+    Transaction._get_collection().update_many({}, [{'$set': {'import_hash': {'$concat': ['old-', '$import_hash']}}}])
+
+    assert crud_transactions.rehash_imported_transactions(batch_size=2) == 3
+    result = statement.import_statement(user.id, io.StringIO(STATEMENT), 'csv')
+    assert (result.inserted, result.duplicates) == (0, 3)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("25.00", 25.0),
+    ("-25.00", -25.0),
+    ("(25.00)", -25.0),
+    ("12,50", 12.5),
+    ("0,125", 0.125),
+    ("1,234", 1234.0),
+    ("1.234", 1234.0),
+    ("1,234.56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("-1.234.567,89", -1234567.89),
+    ("1 234,56", 1234.56),
+    ("1234.5", 1234.5),
+])
+def test_parse_amount(value, expected):
+    assert statement.parse_amount(value) == expected
+
+
+@pytest.mark.parametrize("value", ["1,2,3", "12,345,67", "1,23.45", "1.234.5,6", "12.34,56", "1,234.5.6", "abc"])
+def test_parse_amount_rejects_misplaced_separators(value):
+    with pytest.raises(ValueError):
+        statement.parse_amount(value)
+
+
+def test_unparseable_amounts_are_reported(user):
+    csv_statement = "date,description,amount\n2024-03-05,Rent,\"1,234.56\"\n2024-03-06,Typo,\"1,23.45\"\n"
+
+    result = statement.import_statement(user.id, io.StringIO(csv_statement), 'csv')
+
+    assert (result.inserted, result.failed) == (1, 1)
+    assert result.errors[0].row == 1
+    assert Transaction._get_collection().find_one()['amount'] == 1234.56
@@ -0,0 +1,29 @@
+from app.utils import metrics, password_pool
+from app.utils.config import get_settings
+
+
+def test_default_pool_is_sized_from_the_settings(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_WORKERS", "2")
+    get_settings.cache_clear()
+    try:
+        pool = password_pool.PasswordHashPool()
+        assert pool.max_workers == 2
+        assert pool._executor._max_workers == 2
+        pool.shutdown()
+    finally:
+        get_settings.cache_clear()
+
+
+def test_explicit_sizes_are_kept():
+    pool = password_pool.PasswordHashPool(max_workers=1, max_queue=0)
+    assert (pool.max_workers, pool.max_queue, pool._executor._max_workers) == (1, 0, 1)
+    pool.shutdown()
+
+
+def test_metrics_scrape_does_not_create_the_pool():
+    password_pool.shutdown_password_pool()
+
+    rendered = metrics.render()
+
+    assert "password_hash_queue_depth 0" in rendered
+    assert password_pool.get_password_pool.cache_info().currsize == 0
@@ -0,0 +1,148 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.user import User
+from app.utils import rate_limit, security
+
+BURST = 3
+RATE = 1 / 60
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def backend(clock, monkeypatch) -> rate_limit.MemoryBackend:
+    backend = rate_limit.MemoryBackend(max_keys=100, sweep_interval=300, clock=clock)
+    monkeypatch.setattr(rate_limit, "_backend", backend)
+    return backend
+
+
+def test_burst_then_retry_after(backend):
+    assert [backend.consume("key", BURST, RATE) for _ in range(BURST)] == [0, 0, 0]
+
+    assert backend.consume("key", BURST, RATE) == pytest.approx(60)
+
+
+def test_rejected_attempts_do_not_extend_the_wait(backend, clock):
+    for _ in range(BURST + 5):
+        backend.consume("key", BURST, RATE)
+    clock.advance(20)
+
+    assert backend.consume("key", BURST, RATE) == pytest.approx(40)
+
+
+def test_refill(backend, clock):
+    for _ in range(BURST):
+        backend.consume("key", BURST, RATE)
+
+    clock.advance(60)
+    assert backend.consume("key", BURST, RATE) == 0
+    assert backend.consume("key", BURST, RATE) == pytest.approx(60)
+
+    clock.advance(BURST * 60)
+    assert [backend.consume("key", BURST, RATE) for _ in range(BURST)] == [0, 0, 0]
+
+
+def test_reset_refills(backend):
+    for _ in range(BURST):
+        backend.consume("key", BURST, RATE)
+
+    backend.reset("key")
+
+    assert backend.consume("key", BURST, RATE) == 0
+
+
+def test_sweep_drops_full_buckets(backend, clock):
+    backend.consume("idle", BURST, RATE)
+    backend.consume("busy", BURST, RATE)
+    clock.advance(200)
+    for _ in range(BURST):
+        backend.consume("busy", BURST, RATE)
+    assert len(backend) == 2
+
+    clock.advance(100)
+    backend.consume("busy", BURST, RATE)
+
+    assert len(backend) == 1
+
+
+def test_least_recently_used_keys_are_evicted(clock):
+    backend = rate_limit.MemoryBackend(max_keys=2, sweep_interval=300, clock=clock)
+    backend.consume("a", 1, RATE)
+    backend.consume("b", 1, RATE)
+    backend.consume("a", 1, RATE)
+
+    backend.consume("c", 1, RATE)
+
+    assert len(backend) == 2
+    assert backend.consume("a", 1, RATE) > 0
+    assert backend.consume("b", 1, RATE) == 0
+
+
+def test_every_attempt_takes_a_username_token_until_a_success(backend):
+    burst = rate_limit.get_settings().login_username_burst
+    # In flight at once, from different IPs: none of them has failed yet.
+    for index in range(burst):
+        assert rate_limit.check_login(f"203.0.113.{index}", "alice") == 0
+    assert rate_limit.check_login("198.51.100.1", "alice") > 0
+
+    rate_limit.reset_login("alice")
+    assert rate_limit.check_login("198.51.100.1", "alice") == 0
+
+
+@pytest.mark.parametrize("variable", ["LOGIN_IP_PER_MINUTE", "LOGIN_USERNAME_PER_MINUTE",
+                                      "LOGIN_IP_BURST", "LOGIN_USERNAME_BURST"])
+def test_a_zero_limit_is_disabled(backend, monkeypatch, variable):
+    monkeypatch.setenv(variable, "0")
+    rate_limit.get_settings.cache_clear()
+    try:
+        for _ in range(50):
+            rate_limit.check_login("203.0.113.1", "alice")
+        limited_ip = variable.startswith("LOGIN_USERNAME")
+        assert (rate_limit.check_login("203.0.113.1", "bob") > 0) == limited_ip
+        assert (rate_limit.check_login("198.51.100.1", "alice") > 0) == (not limited_ip)
+    finally:
+        rate_limit.get_settings.cache_clear()
+
+
+@pytest.fixture
+def client(backend) -> TestClient:
+    User(username="alice", email="alice@example.com",
+         hashed_password=security.hash_plain_password("correct-password")).save()
+    return TestClient(app)
+
+
+def login(client: TestClient, password: str):
+    return client.post("/users/login", json={"username": "alice", "email": "alice@example.com", "password": password})
+
+
+def test_correct_logins_are_not_locked_out(client):
+    burst = rate_limit.get_settings().login_username_burst
+    for _ in range(burst * 2):
+        assert login(client, "correct-password").status_code == 200
+
+
+def test_failed_logins_lock_the_username(client):
+    burst = rate_limit.get_settings().login_username_burst
+    for _ in range(burst):
+        assert login(client, "wrong-password").status_code == 401
+
+    response = login(client, "correct-password")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
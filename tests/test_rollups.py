@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.crud import crud_rollups, crud_transactions
+from app.models.rollup import MonthlyRollup
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionCreate
+
+PLUS_TWO = timezone(timedelta(hours=2))
+MINUS_FIVE = timezone(timedelta(hours=-5))
+
+
+def rollups(user) -> dict:
+    return {
+        (rollup['month'], rollup['type']): (rollup['total'], rollup['count'])
+        for rollup in MonthlyRollup.objects(user=user.id).as_pymongo()
+        if rollup['count']
+    }
+
+
+@pytest.mark.parametrize("date, expected", [
+    (datetime(2024, 3, 1, 0, 30), "2024-03"),
+    (datetime(2024, 3, 1, 0, 30, tzinfo=PLUS_TWO), "2024-02"),
+    (datetime(2024, 2, 29, 20, 0, tzinfo=MINUS_FIVE), "2024-03"),
+    (datetime(2024, 3, 1, tzinfo=timezone.utc), "2024-03"),
+])
+def test_month_key_is_the_utc_month(date, expected):
+    assert crud_rollups.month_key(date) == expected
+
+
+def test_naive_utc_leaves_naive_dates_alone():
+    date = datetime(2024, 3, 1, 0, 30)
+    assert crud_rollups.naive_utc(date) is date
+    assert crud_rollups.naive_utc(datetime(2024, 3, 1, 0, 30, tzinfo=PLUS_TWO)) == datetime(2024, 2, 29, 22, 30)
+
+
+@pytest.mark.parametrize("date", [
+    datetime(2024, 3, 1, 0, 30),
+    datetime(2024, 3, 1, 0, 30, tzinfo=PLUS_TWO),
+    datetime(2024, 2, 29, 20, 0, tzinfo=MINUS_FIVE),
+])
+def test_create_update_and_delete_keep_rollups_consistent(user, date):
+    crud_transactions.create_transaction(
+        user.id, TransactionCreate(type="expense", amount=25.0, description="Groceries", date=date))
+    crud_transactions.create_transaction(
+        user.id, TransactionCreate(type="income", amount=1000.0, description="Salary", date=datetime(2024, 1, 15)))
+    assert crud_rollups.verify_rollups() == []
+
+    transaction_id = Transaction._get_collection().find_one({"type": "expense"})["_id"]
+    crud_transactions.update_transaction(str(transaction_id), TransactionCreate(
+        type="expense", amount=40.0, description="Groceries", date=date + timedelta(days=1)))
+    assert crud_rollups.verify_rollups() == []
+
+    crud_transactions.delete_transaction_by_id(str(transaction_id))
+    assert crud_rollups.verify_rollups() == []
+    assert rollups(user) == {("2024-01", "income"): (1000.0, 1)}
+
+
+def test_incremental_rollups_match_a_rebuild(user):
+    rows = [
+        {"type": "expense", "amount": 10.0, "date": datetime(2024, 3, 1, 0, 30, tzinfo=PLUS_TWO)},
+        {"type": "expense", "amount": 20.0, "date": "2024-02-29T20:00:00-05:00"},
+        {"type": "income", "amount": 500.0, "date": "2024-03-31T23:30:00Z"},
+        {"type": "expense", "amount": 5.0, "date": datetime(2024, 3, 15)},
+    ]
+    crud_transactions.bulk_create_transactions(user.id, rows)
+    incremental = rollups(user)
+
+    crud_rollups.rebuild_rollups()
+    assert rollups(user) == incremental
+    assert incremental == {
+        ("2024-02", "expense"): (10.0, 1),
+        ("2024-03", "expense"): (25.0, 2),
+        ("2024-03", "income"): (500.0, 1),
+    }
@@ -0,0 +1,67 @@
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.crud import crud_rollups
+from app.main import app
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.utils import security
+
+TRANSACTION = {"type": "expense", "amount": 25.0, "description": "Groceries", "date": "2024-03-05T12:00:00"}
+
+
+def client_for(user: User) -> TestClient:
+    token = security.create_access_token(data={"sub": user.username})
+    return TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.fixture
+def owner(user) -> TestClient:
+    return client_for(user)
+
+
+@pytest.fixture
+def intruder() -> TestClient:
+    return client_for(User(username="mallory", email="mallory@example.com", hashed_password="not-a-hash").save())
+
+
+@pytest.fixture
+def transaction_id(owner) -> str:
+    assert owner.post("/transactions/", json=TRANSACTION).status_code == 201
+    return str(Transaction._get_collection().find_one()["_id"])
+
+
+def test_owner_can_read_update_and_delete(owner, transaction_id):
+    assert owner.get(f"/transactions/{transaction_id}").json()["amount"] == 25.0
+
+    response = owner.put(f"/transactions/{transaction_id}", json={**TRANSACTION, "amount": 40.0})
+    assert response.status_code == 200
+    assert owner.get(f"/transactions/{transaction_id}").json()["amount"] == 40.0
+
+    assert owner.delete(f"/transactions/{transaction_id}").status_code == 200
+    assert owner.get(f"/transactions/{transaction_id}").status_code == 404
+
+
+@pytest.mark.parametrize("method", ["get", "put", "delete"])
+def test_anonymous_requests_are_rejected(transaction_id, method):
+    response = TestClient(app).request(method, f"/transactions/{transaction_id}", json=TRANSACTION)
+
+    assert response.status_code == 401
+    assert Transaction._get_collection().find_one()["amount"] == 25.0
+
+
+@pytest.mark.parametrize("method", ["get", "put", "delete"])
+def test_other_users_transactions_are_not_found(intruder, transaction_id, user, method):
+    response = intruder.request(method, f"/transactions/{transaction_id}", json={**TRANSACTION, "amount": 1.0})
+
+    assert response.status_code == 404
+    assert Transaction._get_collection().find_one()["amount"] == 25.0
+    assert crud_rollups.verify_rollups() == []
+
+
+@pytest.mark.parametrize("method", ["get", "put", "delete"])
+def test_missing_transactions_are_not_found(owner, method):
+    response = owner.request(method, f"/transactions/{ObjectId()}", json=TRANSACTION)
+
+    assert response.status_code == 404
@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.crud import crud_user
+from app.main import app
+from app.schemas.user import UserCreate
+from app.utils import password_pool
+
+NEW_USER = {"username": "bob", "email": "bob@example.com", "password": "secret-password"}
+
+
+@pytest.fixture
+def saturated_pool(monkeypatch):
+    pool = password_pool.PasswordHashPool(max_workers=1, max_queue=0)
+    monkeypatch.setattr("app.utils.security.get_password_pool", lambda: pool)
+    yield pool
+    pool.shutdown()
+
+
+def test_register(user):
+    response = TestClient(app).post("/users/register", json=NEW_USER)
+
+    assert response.status_code == 200
+    assert response.json() == {"username": "bob", "email": "bob@example.com"}
+
+
+def test_register_a_taken_username(user):
+    response = TestClient(app).post("/users/register", json={**NEW_USER, "username": user.username})
+
+    assert response.status_code == 400
+
+
+def test_create_user_raises_when_the_pool_is_saturated(saturated_pool):
+    with pytest.raises(password_pool.PasswordPoolSaturated):
+        crud_user.create_user(UserCreate(**NEW_USER))
+
+
+def test_register_answers_503_when_the_pool_is_saturated(saturated_pool):
+    response = TestClient(app).post("/users/register", json=NEW_USER)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
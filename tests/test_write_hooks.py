@@ -0,0 +1,196 @@
+"""
+Behavior of the derived data maintained by transaction writes: monthly rollups, balance checkpoints,
+budget spend counters, export partitions and data versions, with naive and offset-aware dates.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import logging
+
+import pytest
+
+from app.crud import crud_balances, crud_budgets, crud_exports, crud_rollups, crud_transactions
+from app.models.balance import BalanceCheckpoint
+from app.models.budget import BudgetSpend
+from app.models.transaction import Transaction
+from app.schemas.budget import BudgetCreate
+from app.schemas.transaction import TransactionCreate
+from app.utils import versions
+
+PLUS_TWO = timezone(timedelta(hours=2))
+NOW = datetime(2024, 5, 1)
+
+
+def naive(year, month, day, hour=12):
+    return datetime(year, month, day, hour)
+
+
+def aware(year, month, day, hour=12):
+    return datetime(year, month, day, hour, tzinfo=PLUS_TWO)
+
+
+DATE_KINDS = pytest.mark.parametrize("make_date", [naive, aware], ids=["naive", "aware"])
+
+
+def expense(date, amount=25.0, category="food"):
+    return TransactionCreate(type="expense", amount=amount, description="Groceries", date=date, category=category)
+
+
+def income(date, amount=1000.0):
+    return TransactionCreate(type="income", amount=amount, description="Salary", date=date)
+
+
+def transaction_id(description: str) -> str:
+    return str(Transaction._get_collection().find_one({"description": description})["_id"])
+
+
+def stored_transactions(user):
+    return list(Transaction._get_collection().find({"user": user.id}))
+
+
+def expected_balance(user, as_of: datetime) -> float:
+    return sum(
+        row["amount"] if row["type"] == "income" else -row["amount"]
+        for row in stored_transactions(user)
+        if row["date"] <= as_of
+    )
+
+
+def assert_derived_data_consistent(user):
+    assert crud_rollups.verify_rollups() == []
+
+    for as_of in (naive(2024, 1, 31), naive(2024, 2, 29), naive(2024, 3, 31), NOW):
+        assert crud_balances.get_balance_as_of(user.id, as_of).balance == pytest.approx(expected_balance(user, as_of))
+
+    spent = defaultdict(float)
+    for row in stored_transactions(user):
+        if row["type"] == "expense" and row.get("category") == "food":
+            spent[crud_budgets.period_key("monthly", row["date"])] += row["amount"]
+    counters = {
+        counter["period_key"]: counter["spent"]
+        for counter in BudgetSpend.objects(user=user.id, category="food", period="monthly").as_pymongo()
+        if counter["spent"]
+    }
+    assert counters == pytest.approx(dict(spent))
+
+    stale_months = {partition["month"] for partition in crud_exports.get_stale_partitions()}
+    assert {crud_rollups.month_key(row["date"]) for row in stored_transactions(user)} <= stale_months
+
+
+@pytest.fixture(autouse=True)
+def no_swallowed_errors(caplog):
+    """
+    Fails the test when a derived-data hook raised, since _record_changes only logs its errors.
+    """
+    yield
+    errors = [record.getMessage() for record in caplog.records if record.levelno >= logging.ERROR]
+    assert errors == []
+
+
+@pytest.fixture
+def history(user):
+    """
+    A salary per month from January to April 2024, a monthly food budget and checkpoints up to NOW.
+    """
+    crud_budgets.create_budget(user.id, BudgetCreate(category="food", period="monthly", limit=100), now=naive(2024, 1, 1))
+    for month in range(1, 5):
+        crud_transactions.create_transaction(user.id, income(naive(2024, month, 1)))
+    crud_balances.build_checkpoints(user.id, now=NOW)
+    assert BalanceCheckpoint.objects(user=user.id).count() == 4
+    return user
+
+
+def test_dates_are_stored_and_returned_as_naive_utc(user):
+    created = crud_transactions.create_transaction(user.id, expense(datetime(2024, 3, 1, 0, 30, tzinfo=PLUS_TWO)))
+
+    assert created.date == datetime(2024, 2, 29, 22, 30)
+    assert stored_transactions(user)[0]["date"] == datetime(2024, 2, 29, 22, 30)
+
+
+@DATE_KINDS
+def test_create(history, make_date):
+    crud_transactions.create_transaction(history.id, expense(make_date(2024, 2, 10)))
+
+    assert [checkpoint.as_of for checkpoint in BalanceCheckpoint.objects(user=history.id)] == [naive(2024, 2, 1, 0)]
+    assert_derived_data_consistent(history)
+
+
+@DATE_KINDS
+def test_backdated_update_invalidates_checkpoints(history, make_date):
+    crud_transactions.create_transaction(history.id, expense(naive(2024, 3, 20), amount=60.0))
+    crud_balances.build_checkpoints(history.id, now=NOW)
+    assert BalanceCheckpoint.objects(user=history.id).count() == 4
+
+    updated = crud_transactions.update_transaction(transaction_id("Groceries"), expense(make_date(2024, 1, 10), 60.0))
+
+    assert updated
+    assert BalanceCheckpoint.objects(user=history.id, as_of__gt=naive(2024, 1, 10, 0)).count() == 0
+    assert_derived_data_consistent(history)
+
+
+def test_update_across_a_utc_month_boundary(history):
+    crud_transactions.create_transaction(history.id, expense(naive(2024, 3, 20), amount=60.0))
+
+    crud_transactions.update_transaction(transaction_id("Groceries"),
+                                         expense(datetime(2024, 3, 1, 0, 30, tzinfo=PLUS_TWO), 60.0))
+
+    assert stored_transactions(history)[-1]["date"] == datetime(2024, 2, 29, 22, 30)
+    assert BudgetSpend.objects(user=history.id, period_key="2024-03").first().spent == 0
+    assert BudgetSpend.objects(user=history.id, period_key="2024-02").first().spent == 60.0
+    assert_derived_data_consistent(history)
+
+
+@DATE_KINDS
+def test_delete(history, make_date):
+    crud_transactions.create_transaction(history.id, expense(make_date(2024, 2, 10), amount=150.0))
+    crud_balances.build_checkpoints(history.id, now=NOW)
+
+    crud_transactions.delete_transaction_by_id(transaction_id("Groceries"))
+
+    assert BalanceCheckpoint.objects(user=history.id, as_of__gt=naive(2024, 2, 1, 0)).count() == 0
+    assert crud_budgets.get_budget_statuses(history.id, now=naive(2024, 2, 15))[0].spent == 0
+    assert_derived_data_consistent(history)
+
+
+@DATE_KINDS
+def test_bulk_import(history, make_date):
+    rows = [expense(make_date(2024, 2, day), amount=10.0 * day).dict() for day in range(1, 4)]
+    rows.append({"type": "expense", "amount": 5.0, "date": "2024-03-01T00:30:00+02:00", "category": "food"})
+
+    result = crud_transactions.bulk_create_transactions(history.id, rows)
+
+    assert (result.inserted, result.failed) == (4, 0)
+    assert_derived_data_consistent(history)
+
+
+def test_category_only_update_keeps_checkpoints(history):
+    crud_transactions.create_transaction(history.id, expense(naive(2024, 2, 10)))
+    crud_balances.build_checkpoints(history.id, now=NOW)
+
+    # The same instant as the stored date, only the category changes.
+    crud_transactions.update_transaction(transaction_id("Groceries"), expense(aware(2024, 2, 10, hour=14), category="other"))
+
+    assert BalanceCheckpoint.objects(user=history.id).count() == 4
+    assert_derived_data_consistent(history)
+
+
+def test_writes_bump_the_data_version(user):
+    before = versions.get_version(user.id)
+    everyone_before = versions.get_version(versions.ALL_USERS)
+
+    crud_transactions.create_transaction(user.id, expense(aware(2024, 2, 10)))
+
+    assert versions.get_version(user.id) != before
+    assert versions.get_version(versions.ALL_USERS) != everyone_before
+
+
+def test_exported_partitions_become_stale_again_when_written(user):
+    crud_transactions.create_transaction(user.id, expense(naive(2024, 2, 10)))
+    for partition in crud_exports.get_stale_partitions():
+        crud_exports.mark_exported(partition, NOW)
+    assert crud_exports.get_stale_partitions() == []
+
+    crud_transactions.create_transaction(user.id, expense(datetime(2024, 3, 1, 0, 30, tzinfo=PLUS_TWO)))
+
+    assert [partition["month"] for partition in crud_exports.get_stale_partitions()] == ["2024-02"]